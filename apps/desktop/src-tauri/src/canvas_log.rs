@@ -0,0 +1,252 @@
+//! 画布操作日志（`canvas.ops.jsonl`）的读取与重放，格式与后端 `ProjectStorage.patch_canvas` 一致：
+//! 首行为 `{"base": 版本, "checksum": canvas.json 的 sha256}`，其后每行一个 `{"v", "at", "ops"}` 补丁。
+
+use std::fs;
+use std::path::{Path, PathBuf};
+
+use hex::encode as hex_encode;
+use serde_json::Value;
+use sha2::{Digest, Sha256};
+
+const CANVAS_LOG: &str = "canvas.ops.jsonl";
+const CANVAS_LOG_PENDING: &str = "canvas.ops.compact";
+
+fn log_candidates(project_dir: &Path) -> [PathBuf; 2] {
+  [project_dir.join(CANVAS_LOG), project_dir.join(CANVAS_LOG_PENDING)]
+}
+
+/// 在 `canvas.json` 的内容上重放属于它的操作日志，返回最新画布与版本。
+///
+/// 日志首行的校验和与 `canvas_raw` 不一致时说明画布已被整体保存，日志作废；
+/// 遇到损坏或版本不连续的行时停在其之前的版本。这里只读不写，截断与合并由后端负责。
+pub fn replay(project_dir: &Path, canvas_raw: &[u8], canvas: Value, manifest_version: u64) -> (Value, u64) {
+  let checksum = hex_encode(Sha256::digest(canvas_raw));
+  for candidate in log_candidates(project_dir) {
+    let Ok(content) = fs::read_to_string(&candidate) else {
+      continue;
+    };
+    let mut lines = content.lines();
+    let Some(header) = lines.next().and_then(|line| serde_json::from_str::<Value>(line).ok()) else {
+      continue;
+    };
+    if header.get("checksum").and_then(Value::as_str) != Some(checksum.as_str()) {
+      continue;
+    }
+    let Some(mut version) = header.get("base").and_then(Value::as_u64) else {
+      continue;
+    };
+    let mut document = canvas;
+    for line in lines {
+      let Ok(entry) = serde_json::from_str::<Value>(line) else {
+        break;
+      };
+      if entry.get("v").and_then(Value::as_u64) != Some(version + 1) {
+        break;
+      }
+      let Some(ops) = entry.get("ops").and_then(Value::as_array) else {
+        break;
+      };
+      match apply_patch(&document, ops) {
+        Ok(patched) => document = patched,
+        Err(_) => break,
+      }
+      version += 1;
+    }
+    return (document, version);
+  }
+  (canvas, manifest_version)
+}
+
+/// 不解析画布，从操作日志末行读取已记录的最新版本。
+pub fn logged_version(project_dir: &Path) -> u64 {
+  let Ok(content) = fs::read_to_string(project_dir.join(CANVAS_LOG)) else {
+    return 0;
+  };
+  content
+    .lines()
+    .rev()
+    .filter_map(|line| serde_json::from_str::<Value>(line).ok())
+    .find_map(|entry| entry.get("v").and_then(Value::as_u64))
+    .unwrap_or(0)
+}
+
+/// 整体保存画布后删除旧日志，它们已被新的 `canvas.json` 取代。
+pub fn discard(project_dir: &Path) -> Result<(), String> {
+  for candidate in log_candidates(project_dir) {
+    if candidate.exists() {
+      fs::remove_file(&candidate).map_err(|err| err.to_string())?;
+    }
+  }
+  Ok(())
+}
+
+/// 依次应用 RFC 6902 的 `add`/`remove`/`replace`/`move`/`copy`/`test` 操作并返回新文档。
+pub fn apply_patch(document: &Value, ops: &[Value]) -> Result<Value, String> {
+  let mut result = document.clone();
+  for (index, op) in ops.iter().enumerate() {
+    apply_op(&mut result, op).map_err(|err| format!("第 {} 个操作无法应用：{}", index + 1, err))?;
+  }
+  Ok(result)
+}
+
+fn apply_op(document: &mut Value, op: &Value) -> Result<(), String> {
+  let kind = op.get("op").and_then(Value::as_str).ok_or("缺少 op")?;
+  let path = parse_pointer(op.get("path").and_then(Value::as_str).ok_or("缺少 path")?)?;
+  let value = || op.get("value").cloned().ok_or_else(|| "缺少 value".to_string());
+  let from = || parse_pointer(op.get("from").and_then(Value::as_str).ok_or("缺少 from")?);
+  match kind {
+    "add" => add(document, &path, value()?),
+    "remove" => remove(document, &path).map(|_| ()),
+    "replace" => {
+      remove(document, &path)?;
+      add(document, &path, value()?)
+    }
+    "move" => {
+      let from = from()?;
+      if path.len() > from.len() && path[..from.len()] == from[..] {
+        return Err("不能移动到自身的子节点".to_string());
+      }
+      let moved = remove(document, &from)?;
+      add(document, &path, moved)
+    }
+    "copy" => {
+      let copied = resolve(document, &from()?).cloned().ok_or("from 指向的节点不存在")?;
+      add(document, &path, copied)
+    }
+    "test" => {
+      if resolve(document, &path) == Some(&value()?) {
+        Ok(())
+      } else {
+        Err("test 不匹配".to_string())
+      }
+    }
+    other => Err(format!("不支持的操作 {}", other)),
+  }
+}
+
+fn parse_pointer(pointer: &str) -> Result<Vec<String>, String> {
+  if pointer.is_empty() {
+    return Ok(Vec::new());
+  }
+  if !pointer.starts_with('/') {
+    return Err(format!("无效的 JSON Pointer：{}", pointer));
+  }
+  Ok(pointer[1..].split('/').map(|token| token.replace("~1", "/").replace("~0", "~")).collect())
+}
+
+fn array_index(token: &str, len: usize, allow_end: bool) -> Result<usize, String> {
+  if allow_end && token == "-" {
+    return Ok(len);
+  }
+  if token.is_empty() || !token.bytes().all(|byte| byte.is_ascii_digit()) || (token.len() > 1 && token.starts_with('0')) {
+    return Err(format!("无效的数组下标 {}", token));
+  }
+  let index: usize = token.parse().map_err(|_| format!("无效的数组下标 {}", token))?;
+  let limit = if allow_end { len } else { len.saturating_sub(1) };
+  if index > limit || (!allow_end && len == 0) {
+    return Err(format!("数组下标 {} 越界", token));
+  }
+  Ok(index)
+}
+
+fn resolve<'a>(document: &'a Value, path: &[String]) -> Option<&'a Value> {
+  path.iter().try_fold(document, |node, token| match node {
+    Value::Object(map) => map.get(token),
+    Value::Array(items) => array_index(token, items.len(), false).ok().map(|index| &items[index]),
+    _ => None,
+  })
+}
+
+fn parent_mut<'a>(document: &'a mut Value, path: &[String]) -> Result<&'a mut Value, String> {
+  let mut node = document;
+  for token in &path[..path.len() - 1] {
+    node = match node {
+      Value::Object(map) => map.get_mut(token),
+      Value::Array(items) => {
+        let index = array_index(token, items.len(), false)?;
+        items.get_mut(index)
+      }
+      _ => None,
+    }
+    .ok_or_else(|| format!("路径 {} 不存在", token))?;
+  }
+  Ok(node)
+}
+
+fn add(document: &mut Value, path: &[String], value: Value) -> Result<(), String> {
+  let Some(last) = path.last() else {
+    *document = value;
+    return Ok(());
+  };
+  match parent_mut(document, path)? {
+    Value::Object(map) => {
+      map.insert(last.clone(), value);
+      Ok(())
+    }
+    Value::Array(items) => {
+      let index = array_index(last, items.len(), true)?;
+      items.insert(index, value);
+      Ok(())
+    }
+    _ => Err("父节点不是对象或数组".to_string()),
+  }
+}
+
+fn remove(document: &mut Value, path: &[String]) -> Result<Value, String> {
+  let last = path.last().ok_or("不能删除根节点")?;
+  match parent_mut(document, path)? {
+    Value::Object(map) => map.remove(last).ok_or_else(|| format!("路径 {} 不存在", last)),
+    Value::Array(items) => {
+      let index = array_index(last, items.len(), false)?;
+      Ok(items.remove(index))
+    }
+    _ => Err("父节点不是对象或数组".to_string()),
+  }
+}
+
+#[cfg(test)]
+mod tests {
+  use super::*;
+  use serde_json::json;
+
+  #[test]
+  fn applies_rfc6902_operations() {
+    let original = json!({"store": {"a": {"x": 1, "tags": ["a"]}, "b": {"x": 2}}});
+    let ops = json!([
+      {"op": "test", "path": "/store/a/x", "value": 1},
+      {"op": "replace", "path": "/store/a/x", "value": 5},
+      {"op": "add", "path": "/store/a/tags/-", "value": "b"},
+      {"op": "copy", "from": "/store/b", "path": "/store/c"},
+      {"op": "move", "from": "/store/b", "path": "/store/d"},
+      {"op": "remove", "path": "/store/a/tags/0"},
+      {"op": "add", "path": "/meta~1x", "value": true}
+    ]);
+    let patched = apply_patch(&original, ops.as_array().unwrap()).unwrap();
+    assert_eq!(
+      patched,
+      json!({"store": {"a": {"x": 5, "tags": ["b"]}, "c": {"x": 2}, "d": {"x": 2}}, "meta/x": true})
+    );
+    assert!(apply_patch(&original, json!([{"op": "remove", "path": "/missing"}]).as_array().unwrap()).is_err());
+  }
+
+  #[test]
+  fn replays_log_that_belongs_to_canvas() {
+    let dir = std::env::temp_dir().join(format!("dc-canvas-log-{}", std::process::id()));
+    fs::create_dir_all(&dir).unwrap();
+    let raw = b"{}";
+    let checksum = hex_encode(Sha256::digest(raw));
+    let log = format!(
+      "{}\n{}\n{}\n{{\"v\":4,\"ops\":[{{\"op\"",
+      json!({"base": 2, "checksum": checksum}),
+      json!({"v": 3, "at": 0, "ops": [{"op": "add", "path": "/a", "value": 1}]}),
+      json!({"v": 5, "at": 0, "ops": [{"op": "add", "path": "/b", "value": 2}]}),
+    );
+    fs::write(dir.join(CANVAS_LOG), log).unwrap();
+
+    assert_eq!(replay(&dir, raw, json!({}), 2), (json!({"a": 1}), 3));
+    assert_eq!(replay(&dir, b"{ }", json!({}), 7), (json!({}), 7));
+    discard(&dir).unwrap();
+    assert!(!dir.join(CANVAS_LOG).exists());
+    fs::remove_dir_all(&dir).unwrap();
+  }
+}
@@ -11,6 +11,8 @@ use sha2::{Digest, Sha256};
 use tauri::State;
 use uuid::Uuid;
 
+use crate::canvas_log;
+
 const PROJECT_FOLDER: &str = "DreamCanvas";
 const PROJECT_SUBDIR: &str = "projects";
 
@@ -94,6 +96,7 @@ impl ProjectManager {
       updated_at: now,
       version: "1.0.0".to_string(),
       canvas_checksum: String::new(),
+      canvas_version: 0,
     };
     let payload = ProjectPayload {
       manifest: manifest.clone(),
@@ -105,8 +108,13 @@ impl ProjectManager {
   }
 
   pub fn load(&self, project_id: &str) -> Result<ProjectPayload, String> {
-    let manifest = read_json::<ProjectManifest>(&self.manifest_path(project_id))?;
-    let canvas = read_json::<Value>(&self.canvas_path(project_id)).unwrap_or_else(|_| json!({}));
+    let mut manifest = read_json::<ProjectManifest>(&self.manifest_path(project_id))?;
+    let canvas_raw = fs::read(self.canvas_path(project_id)).unwrap_or_default();
+    let canvas = serde_json::from_slice::<Value>(&canvas_raw).unwrap_or_else(|_| json!({}));
+    // 后端的增量保存只追加操作日志，需重放后才是最新画布。
+    let (canvas, canvas_version) =
+      canvas_log::replay(&self.project_dir(project_id), &canvas_raw, canvas, manifest.canvas_version);
+    manifest.canvas_version = canvas_version;
     let assets = read_json::<Vec<AssetPayload>>(&self.assets_path(project_id)).unwrap_or_default();
     let history = read_json::<Vec<GenerationRecord>>(&self.history_path(project_id)).unwrap_or_default();
     Ok(ProjectPayload { manifest, canvas, assets, history })
@@ -125,11 +133,13 @@ impl ProjectManager {
     let manifest = ProjectManifest {
       updated_at: now,
       canvas_checksum: checksum,
+      canvas_version: payload.manifest.canvas_version.max(canvas_log::logged_version(&project_dir)) + 1,
       ..payload.manifest.clone()
     };
 
     write_json(&self.manifest_path(project_id), &manifest)?;
     write_json(&self.canvas_path(project_id), &payload.canvas)?;
+    canvas_log::discard(&project_dir)?;
     write_json(&self.assets_path(project_id), &payload.assets)?;
     write_json(&self.history_path(project_id), &payload.history)?;
 
@@ -157,6 +167,8 @@ pub struct ProjectManifest {
   pub updated_at: u64,
   pub version: String,
   pub canvas_checksum: String,
+  #[serde(default)]
+  pub canvas_version: u64,
 }
 
 #[derive(Debug, Serialize, Deserialize, Clone)]
@@ -20,6 +20,10 @@ export interface CreateTaskPayload {
   size?: string;
   batch?: number;
   projectId?: string;
+  /** 指定种子可复现结果；相同参数与种子的请求会直接复用后端的结果缓存。 */
+  seed?: number;
+  /** 同一次操作的重试沿用同一个键，后端会返回已创建的任务而不是重复提交。 */
+  idempotencyKey?: string;
 }
 
 async function fetchJson<T>(input: RequestInfo, init?: RequestInit): Promise<T> {
@@ -147,12 +151,14 @@ export function createProject(name: string): Promise<ProjectPayload> {
 export async function createGenerationTask(payload: CreateTaskPayload): Promise<GenerationTask> {
   const response = await fetchJson<{ task: GenerationTask }>(`${API_BASE_URL}/jimeng/tasks`, {
     method: "POST",
+    headers: payload.idempotencyKey ? { "Idempotency-Key": payload.idempotencyKey } : undefined,
     body: JSON.stringify({
       prompt: payload.prompt,
       model: payload.model ?? "sdxl",
       size: payload.size ?? "1024x1024",
       batch: payload.batch ?? 1,
       projectId: payload.projectId,
+      seed: payload.seed,
     }),
   });
   return response.task;
@@ -165,6 +171,50 @@ export async function fetchTask(taskId: string): Promise<GenerationTask> {
   return response.task;
 }
 
+export function supportsTaskEvents(): boolean {
+  return typeof window !== "undefined" && typeof window.EventSource !== "undefined";
+}
+
+export interface TaskEventHandlers {
+  onTask: (task: GenerationTask) => void;
+  /** 每条事件处理后回报其游标，重新订阅时从该游标续传。 */
+  onCursor?: (cursor: number) => void;
+  /** 请求的游标已被移出服务端缓冲区，期间的事件无法回放，调用方应重新拉取任务状态。 */
+  onReset?: () => void;
+  onError?: (event: Event) => void;
+}
+
+export function subscribeTaskEvents(
+  taskIds: string[],
+  cursor: number,
+  handlers: TaskEventHandlers
+): () => void {
+  // 从上次收到的游标续传；首次订阅传 0，回放订阅建立前缓冲区内的事件。
+  // 连接断开后浏览器自动重连时会携带 Last-Event-ID，服务端据此续传。
+  const params = new URLSearchParams({ cursor: String(cursor) });
+  taskIds.forEach((taskId) => params.append("taskId", taskId));
+  const source = new EventSource(`${API_BASE_URL}/jimeng/events?${params.toString()}`);
+  source.addEventListener("task", (event) => {
+    try {
+      const payload = JSON.parse((event as MessageEvent<string>).data) as {
+        cursor: number;
+        task: GenerationTask;
+      };
+      handlers.onTask(payload.task);
+      handlers.onCursor?.(payload.cursor);
+    } catch (err) {
+      console.warn("解析任务事件失败", err);
+    }
+  });
+  source.addEventListener("reset", () => {
+    handlers.onReset?.();
+  });
+  if (handlers.onError) {
+    source.addEventListener("error", handlers.onError);
+  }
+  return () => source.close();
+}
+
 export async function cancelTask(taskId: string): Promise<GenerationTask> {
   const response = await fetchJson<{ task: GenerationTask }>(
     `${API_BASE_URL}/jimeng/tasks/${taskId}/cancel`,
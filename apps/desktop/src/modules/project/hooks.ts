@@ -1,45 +1,85 @@
 import { useEffect, useRef } from "react";
 
-import { fetchTask } from "./api";
+import { fetchTask, subscribeTaskEvents, supportsTaskEvents } from "./api";
 import { useProjectStore } from "./state";
+import type { GenerationTask } from "./types";
 
 const TERMINAL_STATUSES = new Set(["succeeded", "failed", "cancelled"]);
 
+function pendingTaskKey(tasks: Record<string, GenerationTask>): string {
+  return Object.values(tasks)
+    .filter((task) => !TERMINAL_STATUSES.has(task.status))
+    .map((task) => task.taskId)
+    .sort()
+    .join(",");
+}
+
 export function useTaskPolling(pollInterval = 2000) {
-  const { tasks, refreshTask } = useProjectStore((state) => ({
-    tasks: state.tasks,
-    refreshTask: state.refreshTask,
-  }));
+  // 以排序后的未完成任务 ID 作为依赖：任务状态刷新不会导致重新订阅，只有待跟踪的任务集合变化才会。
+  const pendingKey = useProjectStore((state) => pendingTaskKey(state.tasks));
+  const refreshTask = useProjectStore((state) => state.refreshTask);
   const isMountedRef = useRef(true);
+  const cursorRef = useRef(0);
+  const subscribedRef = useRef<Set<string>>(new Set());
 
   useEffect(() => {
     isMountedRef.current = true;
-    const pendingIds = Object.values(tasks)
-      .filter((task) => !TERMINAL_STATUSES.has(task.status))
-      .map((task) => task.taskId);
+    const pendingIds = pendingKey ? pendingKey.split(",") : [];
+
+    const refreshAll = async (taskIds: string[]) => {
+      for (const taskId of taskIds) {
+        try {
+          const task = await fetchTask(taskId);
+          if (isMountedRef.current) {
+            refreshTask(task);
+          }
+        } catch (err) {
+          console.warn("轮询任务失败", err);
+        }
+      }
+    };
 
     if (pendingIds.length === 0) {
+      subscribedRef.current = new Set();
       return () => {
         isMountedRef.current = false;
       };
     }
 
-    const timer = setInterval(async () => {
-      for (const taskId of pendingIds) {
-        try {
-          const task = await fetchTask(taskId);
+    if (supportsTaskEvents()) {
+      // 新加入的任务在上次游标之前的事件不会回放，订阅后补拉一次它们的当前状态。
+      const added = pendingIds.filter((taskId) => !subscribedRef.current.has(taskId));
+      const resumed = cursorRef.current > 0;
+      subscribedRef.current = new Set(pendingIds);
+      const unsubscribe = subscribeTaskEvents(pendingIds, cursorRef.current, {
+        onTask: (task) => {
           if (isMountedRef.current) {
             refreshTask(task);
           }
-        } catch (err) {
-          console.warn("轮询任务失败", err);
-        }
+        },
+        onCursor: (cursor) => {
+          cursorRef.current = Math.max(cursorRef.current, cursor);
+        },
+        onReset: () => {
+          void refreshAll(pendingIds);
+        },
+      });
+      if (resumed && added.length > 0) {
+        void refreshAll(added);
       }
+      return () => {
+        isMountedRef.current = false;
+        unsubscribe();
+      };
+    }
+
+    const timer = setInterval(() => {
+      void refreshAll(pendingIds);
     }, pollInterval);
 
     return () => {
       isMountedRef.current = false;
       clearInterval(timer);
     };
-  }, [tasks, pollInterval, refreshTask]);
+  }, [pendingKey, pollInterval, refreshTask]);
 }
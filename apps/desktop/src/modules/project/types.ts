@@ -9,6 +9,7 @@ export interface ProjectManifest {
   updatedAt: number;
   version: string;
   canvasChecksum: string;
+  canvasVersion?: number;
 }
 
 export type CanvasSnapshot = TLStoreSnapshot | null;
@@ -1,3 +1,10 @@
+param(
+    [string]$BaseUrl = "http://127.0.0.1:18500",
+    [switch]$Standin,
+    [int]$StandinPort = 18600,
+    [string[]]$StandinArgs = @()
+)
+
 Write-Host "[DreamCanvas] 启动 k6 性能压测脚本" -ForegroundColor Cyan
 
 $k6 = Get-Command k6 -ErrorAction SilentlyContinue
@@ -10,4 +17,21 @@ if (-not (Test-Path $script)) {
     throw "缺少性能脚本：$script"
 }
 
-& $k6.Source run $script
+$standinProcess = $null
+if ($Standin) {
+    # 启动本地即梦模拟服务；后端需以 DC_JIMENG_BASE_URL=http://127.0.0.1:$StandinPort 启动。
+    $apiPath = Join-Path $PSScriptRoot "..\src-py"
+    $arguments = @("-m", "poetry", "run", "python", "-m", "dreamcanvas.devtools.jimeng_standin", "--port", $StandinPort) + $StandinArgs
+    $standinProcess = Start-Process -FilePath "python" -ArgumentList $arguments -WorkingDirectory $apiPath -PassThru -NoNewWindow
+    Write-Host "[DreamCanvas] 即梦模拟服务：http://127.0.0.1:$StandinPort" -ForegroundColor Cyan
+    Start-Sleep -Seconds 2
+}
+
+try {
+    & $k6.Source run -e "BASE_URL=$BaseUrl" $script
+}
+finally {
+    if ($standinProcess) {
+        Stop-Process -Id $standinProcess.Id -ErrorAction SilentlyContinue
+    }
+}
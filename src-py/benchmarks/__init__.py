@@ -0,0 +1 @@
+"""后端性能基准脚本，使用 ``python -m benchmarks.<name>`` 在 src-py 目录下运行。"""
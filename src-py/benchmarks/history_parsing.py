@@ -0,0 +1,162 @@
+"""对比 ``get_history_by_ids`` 响应的两种解析方式：优化前的逐次完整解析 vs ``JimengHistoryParser``。
+
+使用 ``tests/fixtures/jimeng`` 中录制的响应，模拟每个任务经历 6 次排队、3 次生成中、1 次完成的轮询，
+统计每条响应的解码 + 解析耗时与内存分配峰值::
+
+    python -m benchmarks.history_parsing --tasks 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from dreamcanvas.models.tasks import TaskStatus
+from dreamcanvas.services import json_codec
+from dreamcanvas.services.jimeng_client import JimengHistoryParser, JimengSubmissionResult, _format_queue_message
+
+_FIXTURES = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "jimeng"
+_HISTORY_ID = "8312457690881"
+_SEQUENCE = ["queued"] * 6 + ["running"] * 3 + ["succeeded"]
+
+
+def _legacy_uploaded(history: Dict[str, Any]) -> set[str]:
+    draft_content = history.get("draft_content")
+    if not draft_content:
+        return set()
+    try:
+        data = json.loads(draft_content)
+    except (TypeError, json.JSONDecodeError):
+        return set()
+    uploaded: set[str] = set()
+    for component in data.get("component_list", []):
+        for ability in component.get("abilities", {}).get("blend", {}).get("ability_list", []):
+            if ability.get("image_uri_list"):
+                uploaded.update(ability["image_uri_list"])
+    return uploaded
+
+
+def _legacy_images(history: Dict[str, Any]) -> List[str]:
+    result: List[str] = []
+    uploaded = _legacy_uploaded(history)
+    for resource in history.get("resources") or []:
+        if resource.get("type") != "image":
+            continue
+        url = (resource.get("image_info") or {}).get("image_url")
+        if url and (not uploaded or resource.get("key") not in uploaded):
+            result.append(url)
+    if result:
+        return result
+    for item in history.get("item_list") or []:
+        image = item.get("image") or {}
+        large_images = image.get("large_images") or []
+        result.extend(large["image_url"] for large in large_images if large.get("image_url"))
+        if not large_images and image.get("image_url"):
+            result.append(image["image_url"])
+    return list(dict.fromkeys(result))
+
+
+def _legacy_parse(history_id: str, history: Dict[str, Any]) -> JimengSubmissionResult:
+    """优化前 ``JimengClient._parse_history`` 的等价实现，仅用于对比。"""
+
+    queue_info = history.get("queue_info")
+    queue_message = _format_queue_message(queue_info) if queue_info else None
+    error_code = next((str(history[key]) for key in ("err_code", "task_err_code", "error_code") if history.get(key)), None)
+    error_message = None
+    for key in ("err_msg", "task_err_msg", "status_msg", "error_msg"):
+        value = history.get(key)
+        if isinstance(value, str) and value.strip():
+            error_message = value.strip()
+            break
+    result_urls = _legacy_images(history)
+    status_code = history.get("status")
+    if status_code == 50 and result_urls:
+        status = TaskStatus.SUCCEEDED
+    elif error_code or status_code in {60, 70}:
+        status = TaskStatus.FAILED
+    elif queue_info:
+        status = TaskStatus.QUEUED
+    else:
+        status = TaskStatus.RUNNING
+    return JimengSubmissionResult(
+        history_id=history_id,
+        status=status,
+        result_urls=result_urls,
+        queue_message=queue_message,
+        queue_info=queue_info,
+        error_code=error_code,
+        error_message=error_message,
+        raw=history,
+    )
+
+
+def _responses() -> List[bytes]:
+    fixtures = {name: (_FIXTURES / f"history_{name}.json").read_bytes() for name in set(_SEQUENCE)}
+    return [fixtures[name] for name in _SEQUENCE]
+
+
+def _legacy(tasks: int) -> Callable[[], Tuple[int, List[Any]]]:
+    responses = _responses()
+
+    def run() -> Tuple[int, List[Any]]:
+        # 两种实现都保留全部结果以比较常驻内存；旧实现的结果通过 raw 引用整条原始历史记录。
+        kept: List[Any] = []
+        for _ in range(tasks):
+            for body in responses:
+                data = json.loads(body)["data"]
+                kept.append(_legacy_parse(_HISTORY_ID, data[_HISTORY_ID]))
+        return tasks * len(responses), kept
+
+    return run
+
+
+def _current(tasks: int) -> Callable[[], Tuple[int, List[Any]]]:
+    responses = _responses()
+    parser = JimengHistoryParser()
+
+    def run() -> Tuple[int, List[Any]]:
+        kept: List[Any] = []
+        for index in range(tasks):
+            history_id = f"{_HISTORY_ID}-{index}"
+            for body in responses:
+                data = json_codec.loads(body)["data"]
+                kept.append(parser.parse(history_id, data[_HISTORY_ID]))
+        return tasks * len(responses), kept
+
+    return run
+
+
+def _measure(name: str, factory: Callable[[int], Callable[[], Tuple[int, List[Any]]]], tasks: int) -> Dict[str, Any]:
+    run = factory(tasks)
+    started = time.process_time()
+    parsed, _ = run()
+    cpu = time.process_time() - started
+
+    run = factory(tasks)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"name": name, "parsed": parsed, "usPerResponse": cpu / parsed * 1e6, "peakKiB": peak / 1024}
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    print(f"json backend: {json_codec.BACKEND}")
+    for name, factory in (("legacy", _legacy), ("parser", _current)):
+        result = _measure(name, factory, args.tasks)
+        print(
+            f"{result['name']:<8} responses={result['parsed']:>7} "
+            f"per-response={result['usPerResponse']:>7.2f}us retained-peak={result['peakKiB']:>10.1f}KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
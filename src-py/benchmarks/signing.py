@@ -0,0 +1,141 @@
+"""即梦请求签名的微基准：对比逐字符 ``SystemRandom.choice`` 的旧实现与当前的缓存/批量实现。
+
+每一项输出每秒可完成的次数（越高越好）::
+
+    python -m benchmarks.signing --seconds 1.0
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import secrets
+import time
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from dreamcanvas.services.jimeng_client import APP_SDK_VERSION, APP_VERSION, AID, JimengClient, JimengTokenManager
+
+_API_PATH = "/mweb/v1/get_history_by_ids"
+_ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+class _LegacyTokenManager:
+    """优化前的签名实现，仅用于对比。"""
+
+    def __init__(self, sessionid: str) -> None:
+        self._sessionid = sessionid
+        self._random = secrets.SystemRandom()
+        self._web_id = "".join(self._random.choice("0123456789") for _ in range(19))
+        self._user_id = "".join(self._random.choice("0123456789") for _ in range(19))
+
+    def get_token(self, api_path: str) -> Dict[str, str]:
+        timestamp = str(int(time.time()))
+        return {
+            "cookie": self._generate_cookie(timestamp),
+            "msToken": self._generate_random_string(107),
+            "sign": self._generate_sign(api_path, timestamp),
+            "a_bogus": self._generate_random_string(32),
+            "device_time": timestamp,
+        }
+
+    def _generate_sign(self, api_path: str, timestamp: str) -> str:
+        sign_str = f"9e2c|{api_path[-7:]}|7|{APP_VERSION}|{timestamp}||11ac"
+        return hashlib.md5(sign_str.encode("utf-8")).hexdigest()
+
+    def _generate_cookie(self, timestamp: str) -> str:
+        expire_date = time.strftime("%a, %d-%b-%Y %H:%M:%S GMT", time.gmtime(int(timestamp) + 60 * 24 * 60 * 60))
+        hashed = hashlib.md5(f"{self._sessionid}{timestamp}".encode("utf-8")).hexdigest()
+        parts = [
+            f"sessionid={self._sessionid}",
+            f"sessionid_ss={self._sessionid}",
+            f"_tea_web_id={self._web_id}",
+            f"web_id={self._web_id}",
+            f"_v2_spipe_web_id={self._web_id}",
+            f"uid_tt={self._user_id}",
+            f"uid_tt_ss={self._user_id}",
+            f"sid_tt={self._sessionid}",
+            f"sid_guard={self._sessionid}%7C{timestamp}%7C5184000%7C{expire_date}",
+            f"ssid_ucp_v1=1.0.0-{hashed}",
+            f"sid_ucp_v1=1.0.0-{hashed}",
+            "store-region=cn-gd",
+            "store-region-src=uid",
+            "is_staff_user=false",
+        ]
+        return "; ".join(parts)
+
+    def _generate_random_string(self, length: int) -> str:
+        return "".join(self._random.choice(_ALPHABET) for _ in range(length))
+
+
+def _legacy_headers(token: Dict[str, str]) -> Dict[str, str]:
+    headers = {
+        "accept": "application/json, text/plain, */*",
+        "accept-language": "zh-CN,zh;q=0.9",
+        "app-sdk-version": APP_SDK_VERSION,
+        "appid": AID,
+        "appvr": APP_VERSION,
+        "content-type": "application/json",
+        "cookie": token["cookie"],
+        "device-time": token["device_time"],
+        "lan": "zh-Hans",
+        "loc": "cn",
+        "origin": "https://jimeng.jianying.com",
+        "pf": "7",
+        "priority": "u=1, i",
+        "referer": "https://jimeng.jianying.com/ai-tool/generate",
+        "sec-ch-ua": '"Google Chrome";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": '"Windows"',
+        "sec-fetch-dest": "empty",
+        "sec-fetch-mode": "cors",
+        "sec-fetch-site": "same-origin",
+        "sign": token["sign"],
+        "sign-ver": "1",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    }
+    headers["msToken"] = token["msToken"]
+    headers["a-bogus"] = token["a_bogus"]
+    return headers
+
+
+def _cases() -> List[Tuple[str, Callable[[], object], Callable[[], object]]]:
+    legacy = _LegacyTokenManager("benchmark-session")
+    current = JimengTokenManager(sessionid="benchmark-session")
+    client = JimengClient(sessionid="benchmark-session")
+    token = current.get_token(_API_PATH)
+    timestamp = token["device_time"]
+    return [
+        ("random_tokens", lambda: legacy._generate_random_string(139), lambda: current._generate_random_string(139)),
+        ("cookie", lambda: legacy._generate_cookie(timestamp), lambda: current._cookie(timestamp)),
+        ("get_token", lambda: legacy.get_token(_API_PATH), lambda: current.get_token(_API_PATH)),
+        ("build_headers", lambda: _legacy_headers(token), lambda: client._build_headers(_API_PATH, token, include_tokens=True)),
+        (
+            "sign_request",
+            lambda: _legacy_headers(legacy.get_token(_API_PATH)),
+            lambda: client._build_headers(_API_PATH, client._token_manager.get_token(_API_PATH), include_tokens=True),
+        ),
+    ]
+
+
+def _rate(func: Callable[[], object], seconds: float) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    loops = max(1, int(number * seconds / 0.2))
+    best = min(timer.repeat(repeat=3, number=loops))
+    return loops / best
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="每项每轮的大致测量时长")
+    args = parser.parse_args(argv)
+
+    for name, legacy, current in _cases():
+        before = _rate(legacy, args.seconds)
+        after = _rate(current, args.seconds)
+        print(f"{name:<14} legacy={before:>12,.0f}/s current={after:>12,.0f}/s speedup={after / before:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""对比任务状态更新的两种实现：逐次 ``model_copy`` 与原地修改 ``TaskRecord``。
+
+模拟 10k 个任务各收到若干次轮询结果（排队 → 运行 → 成功，其间有若干次结果未变化），
+分别按旧版 ``_apply_submission`` 与当前实现的路径处理，统计每次更新的 CPU 耗时与内存分配量::
+
+    python -m benchmarks.task_records --tasks 10000 --updates 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from dreamcanvas.models.tasks import GenerationTaskInfo, TaskStatus
+from dreamcanvas.services.task_registry import TaskRecord
+
+_RESULT_URLS = ["https://example.invalid/a.png"]
+
+Poll = Tuple[TaskStatus, Dict[str, Any] | None, List[str]]
+
+
+def _metadata(index: int) -> Dict[str, Any]:
+    return {
+        "model": "3.0",
+        "size": "1024x1024",
+        "batch": 1,
+        "account": "default",
+        "historyId": f"history-{index}",
+        "projectId": f"project-{index % 16}",
+    }
+
+
+def _polls(updates: int) -> List[Poll]:
+    """前一半为排队（队列位置每两次轮询前进一位），随后运行中，最后一次成功。"""
+
+    polls: List[Poll] = []
+    queued = max(1, updates // 2)
+    for step in range(updates):
+        if step == updates - 1:
+            polls.append((TaskStatus.SUCCEEDED, None, _RESULT_URLS))
+        elif step < queued:
+            polls.append((TaskStatus.QUEUED, {"queue_status": 1, "queue_idx": queued - step // 2}, []))
+        else:
+            polls.append((TaskStatus.RUNNING, None, []))
+    return polls
+
+
+def _legacy(tasks: int, updates: int) -> Callable[[], int]:
+    now = int(time.time() * 1000)
+    table: Dict[str, GenerationTaskInfo] = {
+        f"task-{index}": GenerationTaskInfo(
+            task_id=f"task-{index}",
+            prompt="benchmark",
+            status=TaskStatus.QUEUED,
+            metadata=_metadata(index),
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(tasks)
+    }
+    polls = _polls(updates)
+
+    def run() -> int:
+        applied = 0
+        for status, queue_info, urls in polls:
+            for task_id, task in table.items():
+                applied += 1
+                metadata = dict(task.metadata)
+                if queue_info:
+                    metadata["queueInfo"] = queue_info
+                result_uris = urls or task.result_uris
+                if (
+                    task.status == status.value
+                    and metadata == task.metadata
+                    and result_uris == task.result_uris
+                    and task.error_code is None
+                    and task.error_message is None
+                ):
+                    continue
+                table[task_id] = task.model_copy(
+                    update={
+                        "metadata": metadata,
+                        "status": status,
+                        "updated_at": int(time.time() * 1000),
+                        "result_uris": result_uris,
+                        "error_code": None,
+                        "error_message": None,
+                    }
+                )
+                # 旧版提交时由任务日志（以及每个 SSE 订阅者）各做一次 model_dump。
+                table[task_id].model_dump(by_alias=True, mode="json")
+        return applied
+
+    return run
+
+
+def _records(tasks: int, updates: int) -> Callable[[], int]:
+    now = int(time.time() * 1000)
+    table: Dict[str, TaskRecord] = {
+        f"task-{index}": TaskRecord(
+            task_id=f"task-{index}",
+            prompt="benchmark",
+            status=TaskStatus.QUEUED.value,
+            metadata=_metadata(index),
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(tasks)
+    }
+    polls = _polls(updates)
+
+    def run() -> int:
+        applied = 0
+        for status, queue_info, urls in polls:
+            for record in table.values():
+                applied += 1
+                record.apply_result(status, urls or record.result_uris, None, None)
+                if queue_info:
+                    record.set_metadata("queueInfo", queue_info)
+                if not record.dirty:
+                    continue
+                # 与 JimengService._commit_task 一致：提交时只导出供事件与日志使用的字典。
+                record.touch(int(time.time() * 1000))
+                record.dirty.clear()
+                record.to_payload()
+        # API 只在需要时构建 pydantic 快照：这里模拟每个任务最终被读取一次。
+        for record in table.values():
+            record.to_model()
+        return applied
+
+    return run
+
+
+def _measure(name: str, factory: Callable[[int, int], Callable[[], int]], tasks: int, updates: int) -> Dict[str, Any]:
+    # tracemalloc 会显著拖慢执行，CPU 耗时与内存分配分两轮、各用一张新表测量。
+    run = factory(tasks, updates)
+    started = time.process_time()
+    applied = run()
+    cpu = time.process_time() - started
+
+    run = factory(tasks, updates)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "name": name,
+        "updates": applied,
+        "cpuMs": cpu * 1000,
+        "usPerUpdate": cpu / applied * 1e6,
+        "peakBytes": peak,
+        "bytesPerUpdate": peak / applied,
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--updates", type=int, default=8, help="每个任务收到的轮询结果次数")
+    args = parser.parse_args(argv)
+
+    for name, factory in (("model_copy", _legacy), ("task_record", _records)):
+        result = _measure(name, factory, args.tasks, args.updates)
+        print(
+            f"{result['name']:<12} updates={result['updates']:>7} cpu={result['cpuMs']:>9.1f}ms "
+            f"per-update={result['usPerUpdate']:>7.2f}us peak={result['peakBytes'] / 1024:>9.1f}KiB "
+            f"bytes/update={result['bytesPerUpdate']:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
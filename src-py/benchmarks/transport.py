@@ -0,0 +1,178 @@
+"""对比轮询请求在两种连接池布局下的延迟：API 与 CDN 共用一个连接池 vs 各自独立。
+
+在本机启动一个模拟即梦的 ASGI 服务：``/mweb/v1/get_history_by_ids`` 几毫秒内返回小 JSON，
+``/cdn/image.webp`` 以限速方式返回较大的图片。测量期间持续有 ``--downloads`` 个并发下载，
+同时以 ``--concurrency`` 路并发发送轮询请求，统计轮询的 p50/p99 延迟；
+另外对比首个请求在冷启动与预热（``JimengClient.warmup``）后的耗时::
+
+    python -m benchmarks.transport --polls 400 --downloads 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import uvicorn
+
+from dreamcanvas.services.jimeng_client import JimengClient
+from dreamcanvas.services.transport import TransportConfig, build_api_client, build_cdn_client
+
+_CHUNK = 64 * 1024
+
+
+def _standin_app(image_bytes: int, chunk_delay: float, api_delay: float) -> Callable[..., Awaitable[None]]:
+    chunk = b"\0" * _CHUNK
+
+    async def app(scope: Dict[str, Any], receive: Callable[..., Awaitable[Any]], send: Callable[..., Awaitable[None]]) -> None:
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        if path.startswith("/cdn/"):
+            headers = [(b"content-type", b"image/webp"), (b"content-length", str(image_bytes).encode())]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            remaining = image_bytes
+            while remaining > 0:
+                size = min(_CHUNK, remaining)
+                remaining -= size
+                await asyncio.sleep(chunk_delay)
+                await send({"type": "http.response.body", "body": chunk[:size], "more_body": remaining > 0})
+            return
+        while (await receive()).get("more_body"):
+            pass
+        await asyncio.sleep(api_delay)
+        body = json.dumps({"ret": "0", "data": {}}).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+class _Server:
+    """在独立线程的事件循环中运行 uvicorn，避免与被测客户端争用同一个循环。"""
+
+    def __init__(self, app: Callable[..., Awaitable[None]]) -> None:
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+        self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+
+    def __enter__(self) -> "_Server":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+        self._sock.close()
+
+
+def _client(url: str, config: TransportConfig, *, shared: bool) -> JimengClient:
+    client = JimengClient(sessionid="benchmark", transport=config)
+    client._client = build_api_client(config, base_url=url)
+    client._cdn_client = client._client if shared else build_cdn_client(config)
+    return client
+
+
+def _percentile(samples: List[float], ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def _measure_polls(url: str, config: TransportConfig, args: argparse.Namespace, *, shared: bool) -> Dict[str, Any]:
+    client = _client(url, config, shared=shared)
+    stop = asyncio.Event()
+    downloaded = 0
+
+    async def download() -> None:
+        nonlocal downloaded
+        while not stop.is_set():
+            downloaded += len(await client.fetch_resource(f"{url}/cdn/image.webp"))
+
+    latencies: List[float] = []
+    remaining = args.polls
+
+    async def poll() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await client.fetch_histories(["history-1"])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    downloads = [asyncio.create_task(download()) for _ in range(args.downloads)]
+    await asyncio.sleep(0.2)
+    started = time.perf_counter()
+    await asyncio.gather(*(poll() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*downloads)
+    await client._client.aclose()
+    if not shared:
+        await client._cdn_client.aclose()
+    return {
+        "name": "shared-pool" if shared else "split-pools",
+        "p50": statistics.median(latencies),
+        "p99": _percentile(latencies, 0.99),
+        "max": max(latencies),
+        "downloadMiBps": downloaded / 1024 / 1024 / elapsed,
+    }
+
+
+async def _measure_first_request(url: str, config: TransportConfig, *, warm: bool, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        client = _client(url, config, shared=False)
+        if warm:
+            await client.warmup()
+        started = time.perf_counter()
+        await client.fetch_histories(["history-1"])
+        samples.append((time.perf_counter() - started) * 1000)
+        await client.aclose()
+    return statistics.median(samples)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    app = _standin_app(args.image_kib * 1024, args.chunk_delay, args.api_delay)
+    config = TransportConfig(http2=args.http2, max_connections=args.api_connections, cdn_max_connections=args.cdn_connections)
+    with _Server(app) as server:
+        for shared in (True, False):
+            result = await _measure_polls(server.url, config, args, shared=shared)
+            print(
+                f"{result['name']:<12} polls={args.polls} downloads={args.downloads} "
+                f"p50={result['p50']:>7.1f}ms p99={result['p99']:>7.1f}ms max={result['max']:>7.1f}ms "
+                f"download={result['downloadMiBps']:>6.1f}MiB/s"
+            )
+        cold = await _measure_first_request(server.url, config, warm=False, rounds=args.rounds)
+        warm = await _measure_first_request(server.url, config, warm=True, rounds=args.rounds)
+        print(f"first-request cold={cold:.2f}ms warm={warm:.2f}ms")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=4, help="并发轮询路数")
+    parser.add_argument("--downloads", type=int, default=24, help="测量期间持续进行的并发下载数")
+    parser.add_argument("--image-kib", type=int, default=1024)
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="模拟 CDN 带宽：每 64KiB 的间隔秒数")
+    parser.add_argument("--api-delay", type=float, default=0.005, help="模拟 API 处理耗时（秒）")
+    parser.add_argument("--api-connections", type=int, default=20)
+    parser.add_argument("--cdn-connections", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=20, help="首个请求耗时的测量轮数")
+    parser.add_argument("--http2", action="store_true")
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,22 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import json
+from typing import Any, AsyncIterator, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-from ..models.tasks import GenerationTaskInfo, TaskStatus
+from ..models.tasks import TERMINAL_STATUSES, GenerationTaskInfo, TaskStatus
+from ..services.idempotency import IdempotencyConflictError
 from ..services.jimeng import JimengService
 
 router = APIRouter()
 
+_MAX_LONG_POLL_SECONDS = 60.0
+_MAX_BATCH_ITEMS = 500
+
 
 class CreateTaskRequest(BaseModel):
     prompt: str
@@ -22,6 +28,8 @@ class CreateTaskRequest(BaseModel):
     reference_image: str | None = Field(default=None, alias="referenceImage")
     simulate_delay_ms: int | None = Field(default=None, alias="simulateDelayMs")
     simulate_error_code: str | None = Field(default=None, alias="simulateErrorCode")
+    idempotency_key: str | None = Field(default=None, alias="idempotencyKey", max_length=200)
+    seed: int | None = Field(default=None, ge=1, le=999_999_999)
 
     def to_payload(self) -> Dict[str, Any]:
         return self.model_dump(by_alias=True, exclude_none=True)
@@ -31,6 +39,14 @@ class CreateTaskResponse(BaseModel):
     task: GenerationTaskInfo
 
 
+class BatchCreateTaskRequest(BaseModel):
+    items: List[CreateTaskRequest] = Field(min_length=1, max_length=_MAX_BATCH_ITEMS)
+
+
+class BatchCreateTaskResponse(BaseModel):
+    tasks: List[GenerationTaskInfo]
+
+
 class HistoryResponse(BaseModel):
     task: GenerationTaskInfo
 
@@ -49,27 +65,140 @@ async def _get_service(request: Request) -> JimengService:
 @router.post("/tasks", response_model=CreateTaskResponse)
 async def create_task(
     payload: CreateTaskRequest,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=200),
     service: JimengService = Depends(_get_service),
 ) -> CreateTaskResponse:
+    """创建任务；``Idempotency-Key`` 请求头（或 ``idempotencyKey`` 字段）相同的重试返回同一个任务。
+
+    同一个键换了请求参数时返回 409，并附上该键已绑定的任务 ID。
+    """
+
     try:
-        task = await service.submit_task(payload.to_payload())
+        task = await service.submit_task(payload.to_payload(), idempotency_key=idempotency_key)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=409, detail={"message": str(exc), "taskId": exc.task_id}) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     return CreateTaskResponse(task=task)
 
 
+@router.post("/tasks:batch", response_model=BatchCreateTaskResponse)
+async def create_tasks_batch(
+    payload: BatchCreateTaskRequest,
+    stream: bool = Query(default=False),
+    accept: str | None = Header(default=None),
+    service: JimengService = Depends(_get_service),
+):
+    """批量创建任务：一次性放入本地队列并立即返回全部任务 ID。
+
+    携带 ``stream=true`` 或 ``Accept: application/x-ndjson`` 时改为 NDJSON 流，
+    每个任务被上游接受（拿到 historyId）或提前结束时输出一行，全部输出后结束。
+    """
+
+    bus = service.events
+    cursor = bus.cursor
+    try:
+        tasks = await service.submit_batch([item.to_payload() for item in payload.items])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not stream and "application/x-ndjson" not in (accept or ""):
+        return BatchCreateTaskResponse(tasks=tasks)
+
+    indices = {task.task_id: index for index, task in enumerate(tasks)}
+
+    def _line(index: int, task: Dict[str, Any]) -> str | None:
+        metadata = task.get("metadata") or {}
+        status = task.get("status")
+        if metadata.get("historyId"):
+            line: Dict[str, Any] = {"index": index, "taskId": task["taskId"], "status": status, "historyId": metadata["historyId"]}
+        elif status in TERMINAL_STATUSES:
+            line = {"index": index, "taskId": task["taskId"], "status": status, "error": task.get("errorMessage")}
+        else:
+            return None
+        return json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    async def _stream() -> AsyncIterator[str]:
+        pending = dict(indices)
+        # 入队前已记下游标，期间发生的变更会被补发，不会漏掉提交得很快的任务。
+        for task in tasks:
+            line = _line(pending[task.task_id], task.model_dump(by_alias=True, mode="json"))
+            if line is not None:
+                del pending[task.task_id]
+                yield line
+        if not pending:
+            return
+        async for event in bus.subscribe(cursor=cursor, task_ids=set(pending)):
+            if event is None:
+                continue
+            index = pending.get(event.task_id)
+            if index is None:
+                continue
+            line = _line(index, event.payload)
+            if line is not None:
+                del pending[event.task_id]
+                yield line
+                if not pending:
+                    break
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+
 @router.get("/history", response_model=HistoryResponse)
 async def get_history(
     task_id: str = Query(alias="taskId"),
+    wait: float = Query(default=0.0, ge=0.0, le=_MAX_LONG_POLL_SECONDS),
+    since_updated_at: int | None = Query(default=None, alias="sinceUpdatedAt"),
     service: JimengService = Depends(_get_service),
 ) -> HistoryResponse:
+    """查询任务；携带 ``wait`` 时进入长轮询，直到任务更新或等待超时。"""
+
     try:
-        task = await service.get_task(task_id)
+        if wait > 0:
+            task = await service.wait_for_task(task_id, since_updated_at=since_updated_at, timeout=wait)
+        else:
+            task = await service.get_task(task_id)
     except KeyError as exc:
         raise HTTPException(status_code=404, detail="任务不存在") from exc
     return HistoryResponse(task=task)
 
 
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    task_ids: List[str] = Query(default_factory=list, alias="taskId"),
+    project_ids: List[str] = Query(default_factory=list, alias="projectId"),
+    cursor: int | None = Query(default=None, ge=0),
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    service: JimengService = Depends(_get_service),
+) -> StreamingResponse:
+    """以 SSE 推送任务变更，可按任务或项目过滤，并支持基于游标的断点续传。"""
+
+    bus = service.events
+    # 浏览器自动重连时携带的 Last-Event-ID 比初始 cursor 更新，优先使用。
+    resume = int(last_event_id) if last_event_id and last_event_id.isdigit() else cursor
+
+    async def _stream() -> AsyncIterator[str]:
+        yield "retry: 3000\n\n"
+        start = resume
+        if resume is not None:
+            _, reset = bus.events_since(resume)
+            if reset:
+                data = json.dumps({"cursor": bus.cursor})
+                yield f"event: reset\ndata: {data}\n\n"
+                if resume > bus.cursor:
+                    start = 0
+        async for event in bus.subscribe(cursor=start, task_ids=set(task_ids), project_ids=set(project_ids)):
+            if await request.is_disconnected():
+                break
+            yield ": keep-alive\n\n" if event is None else event.to_sse()
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/tasks/{task_id}/cancel", response_model=CancelResponse)
 async def cancel_task(
     task_id: str,
@@ -0,0 +1,66 @@
+"""项目画布增量保存 API。"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from pydantic import BaseModel, Field
+
+from ..services.canvas_patch import CanvasConflictError, CanvasPatchError
+from ..services.project_io import AsyncProjectStorage
+
+router = APIRouter()
+
+# 项目 ID 由 uuid4().hex 生成（桌面端为 Uuid::simple），限定格式避免路径穿越。
+ProjectId = Path(pattern=r"^[0-9a-f]{32}$")
+
+
+class CanvasPatchRequest(BaseModel):
+    base_version: int = Field(alias="baseVersion", ge=0)
+    ops: List[Dict[str, Any]] = Field(min_length=1)
+
+    model_config = {"populate_by_name": True}
+
+
+class CanvasPatchResponse(BaseModel):
+    version: int
+    updated_at: int = Field(alias="updatedAt")
+    pending_ops: int = Field(alias="pendingOps")
+    compacting: bool
+
+    model_config = {"populate_by_name": True}
+
+
+async def _get_storage(request: Request) -> AsyncProjectStorage:
+    storage: AsyncProjectStorage | None = getattr(request.app.state, "project_io", None)
+    if storage is None:
+        raise RuntimeError("ProjectStorage 尚未初始化")
+    return storage
+
+
+@router.patch("/{project_id}/canvas", response_model=CanvasPatchResponse, response_model_by_alias=True)
+async def patch_canvas(
+    payload: CanvasPatchRequest,
+    project_id: str = ProjectId,
+    storage: AsyncProjectStorage = Depends(_get_storage),
+) -> CanvasPatchResponse:
+    """以 JSON Patch 增量保存画布；``baseVersion`` 不是最新版本时返回 409 与当前版本。"""
+
+    try:
+        result = await storage.patch_canvas(project_id, payload.ops, base_version=payload.base_version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail="项目不存在") from exc
+    except CanvasConflictError as exc:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": str(exc), "currentVersion": exc.current_version},
+        ) from exc
+    except CanvasPatchError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return CanvasPatchResponse(
+        version=result.version,
+        updated_at=result.updated_at,
+        pending_ops=result.pending_ops,
+        compacting=result.compacting,
+    )
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 
-from . import jimeng, system, tools
+from . import jimeng, projects, system, tools
 
 
 def register_routes(app: FastAPI) -> None:
@@ -8,4 +8,5 @@ def register_routes(app: FastAPI) -> None:
 
     app.include_router(system.router, prefix="/system", tags=["system"])
     app.include_router(jimeng.router, prefix="/jimeng", tags=["jimeng"])
+    app.include_router(projects.router, prefix="/projects", tags=["projects"])
     app.include_router(tools.router, prefix="/tools", tags=["tools"])
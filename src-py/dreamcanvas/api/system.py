@@ -2,21 +2,21 @@
 
 from __future__ import annotations
 
-import shutil
+import asyncio
 from datetime import datetime, timezone
-from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 
 from ..config.settings import get_settings
+from ..services.blob_store import BlobStore, write_backup
 from ..services.jimeng import JimengService
-from ..services.projects import ProjectStorage
+from ..services.project_io import AsyncProjectStorage
 
 router = APIRouter()
 
 
-async def _get_storage(request: Request) -> ProjectStorage:
-    storage: ProjectStorage | None = getattr(request.app.state, "project_storage", None)
+async def _get_storage(request: Request) -> AsyncProjectStorage:
+    storage: AsyncProjectStorage | None = getattr(request.app.state, "project_io", None)
     if storage is None:
         raise RuntimeError("ProjectStorage 尚未初始化")
     return storage
@@ -31,35 +31,45 @@ async def _get_jimeng(request: Request) -> JimengService:
 
 @router.get("/diagnostics")
 async def diagnostics(
-    storage: ProjectStorage = Depends(_get_storage),
+    request: Request,
+    storage: AsyncProjectStorage = Depends(_get_storage),
     jimeng: JimengService = Depends(_get_jimeng),
 ) -> dict[str, object]:
     settings = get_settings()
-    tasks = await jimeng.list_tasks()
+    jimeng_stats = await jimeng.diagnostics()
+    registry = jimeng_stats["registry"]
+    blob_store: BlobStore | None = getattr(request.app.state, "blob_store", None)
     return {
         "version": settings.version,
         "phase": settings.phase,
         "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
         "logDir": str(settings.log_dir),
-        "projects": storage.diagnostics(),
+        "projects": {**await storage.diagnostics(), "io": storage.stats()},
+        "blobs": await asyncio.to_thread(blob_store.stats) if blob_store is not None else None,
         "tasks": {
-            "total": len(tasks),
-            "active": sum(1 for task in tasks if task.status in {"queued", "running"}),
+            "total": registry["total"],
+            "active": registry["active"],
         },
+        "jimeng": jimeng_stats,
     }
 
 
 @router.post("/backup")
-async def trigger_backup(storage: ProjectStorage = Depends(_get_storage)) -> dict[str, str]:
+async def trigger_backup(request: Request, storage: AsyncProjectStorage = Depends(_get_storage)) -> dict[str, str]:
     settings = get_settings()
     backup_root = settings.backups_dir
     backup_root.mkdir(parents=True, exist_ok=True)
 
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
-    base_name = backup_root / f"{timestamp}-projects"
+    blob_store: BlobStore | None = getattr(request.app.state, "blob_store", None)
 
     try:
-        archive_path = Path(shutil.make_archive(str(base_name), "zip", root_dir=storage.root))
+        archive_path = await asyncio.to_thread(
+            write_backup,
+            storage.root,
+            backup_root / f"{timestamp}-projects.zip",
+            blob_store,
+        )
     except (FileNotFoundError, OSError) as exc:
         raise HTTPException(status_code=500, detail=f"创建备份失败：{exc}") from exc
 
@@ -67,3 +77,13 @@ async def trigger_backup(storage: ProjectStorage = Depends(_get_storage)) -> dic
         "status": "succeeded",
         "path": str(archive_path),
     }
+
+
+@router.post("/blobs/gc")
+async def collect_blobs(request: Request, storage: AsyncProjectStorage = Depends(_get_storage)) -> dict[str, int]:
+    blob_store: BlobStore | None = getattr(request.app.state, "blob_store", None)
+    if blob_store is None:
+        raise HTTPException(status_code=409, detail="未启用资源去重存储")
+    released = await asyncio.to_thread(blob_store.prune, storage.root)
+    removed, freed = await asyncio.to_thread(blob_store.gc)
+    return {"releasedRefs": released, "removedBlobs": removed, "freedBytes": freed}
@@ -1,12 +1,26 @@
+import asyncio
 import logging
 
 from fastapi import FastAPI
 
 from .api.routes import register_routes
 from .config.settings import get_settings
+from .services.account_pool import AccountPool, parse_accounts
+from .services.admission import AdmissionController
+from .services.asset_downloader import AssetDownloader
+from .services.blob_store import BlobStore
+from .services.idempotency import IdempotencyCache
 from .services.jimeng import JimengService
+from .services.poll_scheduler import PollPolicy
+from .services.project_io import AsyncProjectStorage
+from .services.project_writes import ProjectWriteQueue
 from .services.projects import ProjectStorage
+from .services.resilience import CircuitBreaker, RetryPolicy
+from .services.result_cache import ResultCache
 from .services.secret_manager import SecretManager, SecretStoreError
+from .services.task_journal import TaskJournal
+from .services.task_registry import TaskArchive, TaskRegistry
+from .services.transport import TransportConfig, parse_proxies
 
 logger = logging.getLogger(__name__)
 
@@ -32,18 +46,87 @@ def create_app() -> FastAPI:
         logger.warning("加载凭据时出现问题：%s", exc)
     app.state.secret_manager = secret_manager
 
-    project_storage = ProjectStorage(settings.projects_dir)
+    project_storage = ProjectStorage(
+        settings.projects_dir,
+        compact_ops=settings.canvas_compact_ops,
+        compact_bytes=settings.canvas_compact_kb * 1024,
+    )
     app.state.project_storage = project_storage
+    project_io = AsyncProjectStorage(project_storage, max_workers=settings.project_io_workers)
+    app.state.project_io = project_io
+    blob_store = BlobStore(settings.projects_dir / ".blobs") if settings.asset_dedupe else None
+    app.state.blob_store = blob_store
+    result_cache = (
+        ResultCache(
+            settings.tasks_dir / "result-cache",
+            max_bytes=settings.jimeng_result_cache_max_mb * 1024 * 1024,
+            max_age=settings.jimeng_result_cache_max_age,
+        )
+        if settings.jimeng_result_cache_max_mb > 0
+        else None
+    )
 
-    jimeng_config = (secrets_payload or {}).get("jimeng") if isinstance(secrets_payload, dict) else None
-    proxy_config = (secrets_payload or {}).get("proxy") if isinstance(secrets_payload, dict) else None
-    if not jimeng_config or not (jimeng_config.get("sessionid") or "").strip():
+    jimeng_config = secrets_payload.get("jimeng") if secrets_payload is not None else None
+    proxy_config = parse_proxies(secrets_payload.get("proxy") if secrets_payload is not None else None)
+    try:
+        accounts = parse_accounts(jimeng_config)
+    except ValueError:
         logger.warning("未检测到有效的即梦凭据，将以离线占位配置启动，仅供调试使用。")
-        jimeng_config = {"sessionid": "placeholder", "account_name": "offline"}
+        accounts = [{"sessionid": "placeholder", "account_name": "offline"}]
+    else:
+        logger.info("已加载 %d 个即梦账号：%s", len(accounts), ", ".join(item["account_name"] for item in accounts))
+    pool = AccountPool.from_config(
+        accounts,
+        proxies=proxy_config,
+        admission=AdmissionController(
+            max_concurrent=settings.jimeng_max_concurrent,
+            rate=settings.jimeng_submit_rate,
+            burst=settings.jimeng_submit_burst,
+        ),
+        retry_policy=RetryPolicy(attempts=settings.jimeng_retry_attempts, deadline=settings.jimeng_retry_deadline),
+        breaker=CircuitBreaker(
+            failure_threshold=settings.jimeng_breaker_threshold,
+            reset_timeout=settings.jimeng_breaker_reset,
+        ),
+        transport=TransportConfig(
+            base_url=settings.jimeng_base_url,
+            http2=settings.jimeng_http2,
+            max_connections=settings.jimeng_max_connections,
+            max_keepalive=settings.jimeng_max_keepalive,
+            keepalive_expiry=settings.jimeng_keepalive_expiry,
+            cdn_max_connections=settings.jimeng_cdn_max_connections,
+            cdn_read_timeout=settings.jimeng_cdn_read_timeout,
+        ),
+    )
     app.state.jimeng_service = JimengService(
-        config=jimeng_config,
+        config=accounts,
         proxy_config=proxy_config,
-        project_storage=project_storage,
+        poll_interval=settings.jimeng_poll_interval,
+        poll_policy=PollPolicy(
+            base_interval=settings.jimeng_poll_interval,
+            floor=settings.jimeng_poll_floor,
+            ceiling=settings.jimeng_poll_ceiling,
+            jitter=settings.jimeng_poll_jitter,
+        ),
+        project_storage=project_io,
+        project_writes=ProjectWriteQueue(project_io, window=settings.project_write_window),
+        journal=TaskJournal(settings.tasks_dir / "journal"),
+        registry=TaskRegistry(
+            max_terminal=settings.jimeng_max_terminal_tasks,
+            terminal_ttl=settings.jimeng_terminal_task_ttl,
+            trace_limit=settings.jimeng_trace_limit,
+        ),
+        archive=TaskArchive(settings.tasks_dir / "archive.sqlite3"),
+        pool=pool,
+        idempotency=IdempotencyCache(window=settings.jimeng_idempotency_window),
+        dedupe_identical=settings.jimeng_dedupe_identical,
+        downloader=AssetDownloader(
+            max_concurrent=settings.jimeng_download_concurrency,
+            per_task=settings.jimeng_download_per_task,
+            max_background=settings.jimeng_download_background,
+        ),
+        blob_store=blob_store,
+        result_cache=result_cache,
     )
 
     register_routes(app)
@@ -52,9 +135,30 @@ def create_app() -> FastAPI:
     async def health_check() -> dict[str, str]:
         return {"status": "ok", "phase": settings.phase}
 
+    @app.on_event("startup")
+    async def restore_services() -> None:
+        if blob_store is not None:
+            # 先释放已被删除资源的引用，避免 relink 把它们重新链接回项目目录。
+            await asyncio.to_thread(blob_store.prune, settings.projects_dir)
+            await asyncio.to_thread(blob_store.relink, settings.projects_dir)
+            await asyncio.to_thread(blob_store.gc)
+        await project_io.reconcile()
+        await app.state.jimeng_service.restore()
+        if settings.jimeng_warmup:
+            # 预热在后台进行，不阻塞服务就绪。
+            app.state.jimeng_warmup = asyncio.create_task(app.state.jimeng_service.warmup())
+
     @app.on_event("shutdown")
     async def shutdown_services() -> None:
+        warmup = getattr(app.state, "jimeng_warmup", None)
+        if warmup is not None and not warmup.done():
+            warmup.cancel()
         await app.state.jimeng_service.aclose()
+        if blob_store is not None:
+            await asyncio.to_thread(blob_store.close)
+        if result_cache is not None:
+            await asyncio.to_thread(result_cache.close)
+        await project_io.aclose()
 
     return app
 
@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -8,13 +9,18 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class AppSettings(BaseSettings):
     """应用级配置，读取 `.env` 或系统环境变量。"""
 
-    model_config = SettingsConfigDict(env_prefix="DC_", env_file=".env", extra="ignore")
+    # 环境变量留空（如 ``DC_JIMENG_MAX_CONCURRENT=``）按 None 处理，可选项即回到“不限”或默认行为。
+    model_config = SettingsConfigDict(env_prefix="DC_", env_file=".env", extra="ignore", env_parse_none_str="")
 
     phase: str = Field(default="P0", description="当前里程碑阶段标识")
     version: str = Field(default="0.1.0", description="后端版本号")
     log_dir: Path = Field(default=Path.home() / "AppData/Local/DreamCanvas/logs")
     projects_dir: Path = Field(default=Path.home() / "AppData/Roaming/DreamCanvas/projects")
     backups_dir: Path = Field(default=Path.home() / "AppData/Roaming/DreamCanvas/backups")
+    tasks_dir: Path = Field(
+        default=Path.home() / "AppData/Roaming/DreamCanvas/tasks",
+        description="即梦任务日志目录，用于重启后恢复任务",
+    )
     python_bin: Path | None = Field(default=None, description="外部 Python 路径覆盖")
     secrets_path: Path = Field(default=Path("config/secrets.enc"), description="加密凭据文件路径")
     secrets_plaintext_path: Path = Field(
@@ -22,6 +28,40 @@ class AppSettings(BaseSettings):
         description="明文凭据回退路径，仅限本地开发使用",
     )
     secrets_passphrase: str | None = Field(default=None, description="运行期解密凭据的主口令")
+    asset_dedupe: bool = Field(default=True, description="是否将下载的资源纳入按内容去重的共享存储")
+    project_io_workers: int = Field(default=4, ge=1, description="执行项目读写的线程数，读写不占用事件循环")
+    project_write_window: float = Field(default=0.05, ge=0, description="同一项目的结果入库合并等待时长（秒），窗口内的写入合并为一次保存")
+    canvas_compact_ops: int = Field(default=200, ge=1, description="画布操作日志累计多少个补丁后合并回 canvas.json")
+    canvas_compact_kb: int = Field(default=1024, ge=1, description="画布操作日志超过多少 KiB 后合并回 canvas.json")
+    jimeng_poll_interval: float = Field(default=3.0, gt=0, description="即梦任务基础轮询间隔（秒）")
+    jimeng_poll_floor: float = Field(default=1.0, gt=0, description="自适应轮询间隔下限（秒）")
+    jimeng_poll_ceiling: float = Field(default=30.0, gt=0, description="自适应轮询间隔上限（秒）")
+    jimeng_poll_jitter: float = Field(default=0.1, ge=0, le=0.5, description="轮询间隔随机抖动比例")
+    jimeng_max_concurrent: Optional[int] = Field(default=4, ge=1, description="单个账号同时生成中的任务上限，留空表示不限")
+    jimeng_submit_rate: Optional[float] = Field(default=0.5, gt=0, description="单个账号每秒允许的提交次数，留空表示不限")
+    jimeng_submit_burst: int = Field(default=2, ge=1, description="提交限速允许的突发次数")
+    jimeng_retry_attempts: int = Field(default=3, ge=1, description="幂等请求（轮询、下载）的最大尝试次数")
+    jimeng_retry_deadline: float = Field(default=20.0, gt=0, description="幂等请求重试的总时限（秒）")
+    jimeng_breaker_threshold: int = Field(default=5, ge=1, description="连续失败多少次后熔断单个账号")
+    jimeng_breaker_reset: float = Field(default=30.0, gt=0, description="熔断后等待多久放行探测请求（秒）")
+    jimeng_base_url: str | None = Field(default=None, description="即梦 API 地址，留空使用官方地址；压测时指向本地模拟服务")
+    jimeng_http2: bool = Field(default=False, description="即梦请求是否启用 HTTP/2（需安装 h2）")
+    jimeng_max_connections: int = Field(default=20, ge=1, description="每个账号 API 连接池的最大连接数")
+    jimeng_max_keepalive: int = Field(default=10, ge=0, description="每个账号 API 连接池保留的空闲连接数")
+    jimeng_keepalive_expiry: float = Field(default=30.0, ge=0, description="空闲连接保留时长（秒）")
+    jimeng_cdn_max_connections: int = Field(default=8, ge=1, description="结果图片下载连接池的最大连接数")
+    jimeng_cdn_read_timeout: float = Field(default=60.0, gt=0, description="结果图片下载的读取超时（秒）")
+    jimeng_download_concurrency: int = Field(default=8, ge=1, description="全局同时进行的结果图片下载数")
+    jimeng_download_per_task: int = Field(default=4, ge=1, description="单个任务内并行下载的结果图片数")
+    jimeng_download_background: int = Field(default=4, ge=1, description="预览图之后补拉原图等后台下载最多占用的并发数")
+    jimeng_warmup: bool = Field(default=True, description="启动后是否预先建立到即梦的连接")
+    jimeng_idempotency_window: float = Field(default=600.0, ge=0, description="提交幂等键的有效时长（秒），0 表示关闭")
+    jimeng_dedupe_identical: bool = Field(default=False, description="未携带幂等键时是否合并参数完全相同的进行中提交")
+    jimeng_result_cache_max_mb: int = Field(default=1024, ge=0, description="固定种子结果缓存的容量上限（MiB），0 表示关闭")
+    jimeng_result_cache_max_age: float = Field(default=7 * 24 * 60 * 60, gt=0, description="结果缓存条目的有效期（秒）")
+    jimeng_max_terminal_tasks: int = Field(default=5000, ge=0, description="内存中保留的终态任务上限")
+    jimeng_terminal_task_ttl: float = Field(default=24 * 60 * 60, ge=0, description="终态任务在内存中的保留时长（秒），0 表示不限")
+    jimeng_trace_limit: int = Field(default=64, ge=1, description="单个任务保留的 trace 事件数")
 
 
 class Settings(AppSettings):
@@ -0,0 +1 @@
+"""开发与压测辅助工具，不参与正式服务运行。"""
@@ -0,0 +1,357 @@
+"""本地模拟即梦上游的 HTTP 服务，用于离线压测完整的后端链路。
+
+实现 ``/mweb/v1/aigc_draft/generate``、``/mweb/v1/get_history_by_ids`` 与结果图片地址，
+响应结构与真实接口一致（参见 ``tests/fixtures/jimeng``），因此 ``JimengClient`` 的签名、
+请求与解析代码都会被完整执行。排队深度、延迟分布、1015 限流、错误注入与图片大小均可配置::
+
+    python -m dreamcanvas.devtools.jimeng_standin --port 18600 --queue-depth 20 --submit-rate 2
+
+然后以 ``DC_JIMENG_BASE_URL=http://127.0.0.1:18600`` 启动后端即可。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+_CHUNK = 64 * 1024
+_STATUS_QUEUED = 20
+_STATUS_RUNNING = 42
+_STATUS_FAILED = 30
+_STATUS_DONE = 50
+_IMAGE_PREFIX = "tos-cn-i-standin"
+
+
+@dataclass(slots=True)
+class StandinConfig:
+    """模拟服务的行为参数；时间单位均为秒，比例取值 0~1。"""
+
+    queue_depth: int = 0
+    queue_drain: float = 2.0
+    generate_seconds: float = 8.0
+    generate_sigma: float = 0.3
+    api_latency: float = 0.03
+    api_latency_sigma: float = 0.5
+    submit_rate: float | None = None
+    submit_burst: int = 5
+    throttle_ratio: float = 0.0
+    error_ratio: float = 0.0
+    fail_ratio: float = 0.0
+    image_bytes: int = 512 * 1024
+    preview_bytes: int = 96 * 1024
+    image_chunk_delay: float = 0.0
+    seed: int | None = None
+
+
+@dataclass(slots=True)
+class _Generation:
+    history_id: str
+    submit_id: str
+    prompt: str
+    model: str
+    batch: int
+    draft_content: str
+    created: float
+    dequeue_at: float
+    finish_at: float
+    fails: bool
+    polls: int = 0
+
+
+class JimengStandin:
+    """模拟服务的状态：生成任务、排队与令牌桶；``app`` 为可直接交给 uvicorn 的 ASGI 应用。
+
+    新任务排在 ``queue_depth`` 个虚拟任务与尚未出队的本地任务之后，按 ``queue_drain`` 个/秒出队；
+    生成耗时服从以 ``generate_seconds`` 为中位数的对数正态分布，API 延迟同理。
+    """
+
+    def __init__(self, config: StandinConfig | None = None, *, clock: Any = time.time) -> None:
+        self.config = config or StandinConfig()
+        self._clock = clock
+        self._random = random.Random(self.config.seed)
+        self._generations: Dict[str, _Generation] = {}
+        self._tokens = float(self.config.submit_burst)
+        self._refilled = clock()
+        self._counters = {"generate": 0, "history": 0, "images": 0, "throttled": 0, "errors": 0}
+        self.app = self._build_app()
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        queued = sum(1 for item in self._generations.values() if item.dequeue_at > now)
+        return {**self._counters, "tasks": len(self._generations), "queued": queued}
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Jimeng stand-in", docs_url=None, redoc_url=None, openapi_url=None)
+
+        @app.post("/mweb/v1/aigc_draft/generate")
+        async def generate(request: Request) -> Response:
+            failure = await self._api_preamble(request, query_tokens=True)
+            if failure is not None:
+                return failure
+            self._counters["generate"] += 1
+            if not self._take_submit_token() or self._random.random() < self.config.throttle_ratio:
+                self._counters["throttled"] += 1
+                return JSONResponse({"ret": "1015", "errmsg": "请求过于频繁，请稍后再试", "data": None})
+            generation = self._create(await request.json())
+            return JSONResponse(
+                {
+                    "ret": "0",
+                    "errmsg": "success",
+                    "systime": str(int(self._clock())),
+                    "logid": uuid.uuid4().hex,
+                    "data": {
+                        "aigc_data": {
+                            "generate_type": 1,
+                            "history_record_id": generation.history_id,
+                            "submit_id": generation.submit_id,
+                            "status": _STATUS_QUEUED,
+                            "created_time": generation.created,
+                        }
+                    },
+                }
+            )
+
+        @app.post("/mweb/v1/get_history_by_ids")
+        async def get_history_by_ids(request: Request) -> Response:
+            failure = await self._api_preamble(request, query_tokens=False)
+            if failure is not None:
+                return failure
+            self._counters["history"] += 1
+            body = await request.json()
+            base = str(request.base_url).rstrip("/")
+            data = {
+                history_id: self._history(self._generations[history_id], base)
+                for history_id in body.get("history_ids") or []
+                if history_id in self._generations
+            }
+            return JSONResponse({"ret": "0", "errmsg": "success", "systime": str(int(self._clock())), "data": data})
+
+        @app.head("/")
+        @app.get("/")
+        async def root() -> Response:
+            return Response(status_code=200)
+
+        @app.get(f"/{_IMAGE_PREFIX}/{{name}}")
+        async def image(name: str) -> Response:
+            self._counters["images"] += 1
+            size = self.config.preview_bytes if "image-1080" in name else self.config.image_bytes
+            headers = {"content-length": str(size)}
+            return StreamingResponse(self._image_body(name, size), media_type="image/webp", headers=headers)
+
+        @app.get("/__standin/stats")
+        async def standin_stats() -> Dict[str, Any]:
+            return self.stats()
+
+        return app
+
+    async def _api_preamble(self, request: Request, *, query_tokens: bool) -> Response | None:
+        """模拟 API 延迟与错误注入，并检查签名相关的请求头与查询参数是否齐全。"""
+
+        config = self.config
+        if config.api_latency > 0:
+            await asyncio.sleep(self._lognormal(config.api_latency, config.api_latency_sigma))
+        if self._random.random() < config.error_ratio:
+            self._counters["errors"] += 1
+            return JSONResponse({"ret": "-1", "errmsg": "internal error"}, status_code=500)
+        headers = request.headers
+        missing = [name for name in ("sign", "device-time", "cookie") if not headers.get(name)]
+        token_source = request.query_params if query_tokens else headers
+        missing.extend(name for name in ("msToken", "a_bogus" if query_tokens else "a-bogus") if not token_source.get(name))
+        if missing:
+            return JSONResponse({"ret": "1014", "errmsg": f"签名参数缺失：{', '.join(missing)}", "data": None})
+        return None
+
+    def _take_submit_token(self) -> bool:
+        rate = self.config.submit_rate
+        if rate is None:
+            return True
+        now = self._clock()
+        self._tokens = min(float(self.config.submit_burst), self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _create(self, payload: Dict[str, Any]) -> _Generation:
+        config = self.config
+        now = self._clock()
+        try:
+            metrics = json.loads(payload.get("metrics_extra") or "{}")
+            draft = json.loads(payload.get("draft_content") or "{}")
+            core = draft["component_list"][0]["abilities"]["generate"]["core_param"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            metrics, core = {}, {}
+        ahead = config.queue_depth + sum(1 for item in self._generations.values() if item.dequeue_at > now)
+        dequeue_at = now + ahead / config.queue_drain if ahead else now
+        generation = _Generation(
+            history_id=str(self._random.randrange(10**12, 10**13)),
+            submit_id=str(payload.get("submit_id") or uuid.uuid4()),
+            prompt=str(core.get("prompt") or ""),
+            model=str(core.get("model") or (payload.get("extend") or {}).get("root_model") or ""),
+            batch=max(1, min(int(metrics.get("generateCount") or core.get("generate_count") or 1), 4)),
+            draft_content=str(payload.get("draft_content") or ""),
+            created=now,
+            dequeue_at=dequeue_at,
+            finish_at=dequeue_at + self._lognormal(config.generate_seconds, config.generate_sigma),
+            fails=self._random.random() < config.fail_ratio,
+        )
+        self._generations[generation.history_id] = generation
+        return generation
+
+    def _history(self, generation: _Generation, base: str) -> Dict[str, Any]:
+        now = self._clock()
+        generation.polls += 1
+        if now < generation.dequeue_at:
+            status = _STATUS_QUEUED
+        elif now < generation.finish_at:
+            status = _STATUS_RUNNING
+        else:
+            status = _STATUS_FAILED if generation.fails else _STATUS_DONE
+        done = status == _STATUS_DONE
+        items = [self._item(generation, index, base) for index in range(generation.batch)] if done else []
+        history: Dict[str, Any] = {
+            "history_record_id": generation.history_id,
+            "submit_id": generation.submit_id,
+            "created_time": generation.created,
+            "status": status,
+            "finish_time": int(generation.finish_at) if status in (_STATUS_DONE, _STATUS_FAILED) else 0,
+            "history_group_key": generation.prompt,
+            "draft_content": generation.draft_content,
+            "model_info": {"model_req_key": generation.model, "model_name": "图片 3.0"},
+            "task": {
+                "task_id": generation.history_id[-6:],
+                "submit_id": generation.submit_id,
+                "status": status,
+                "history_id": generation.history_id,
+                "create_time": int(generation.created),
+                "finish_time": int(generation.finish_at) if done else 0,
+                "resp_ret": {"ret": "0"},
+            },
+            "generate_type": 1,
+            "total_image_count": generation.batch,
+            "finished_image_count": generation.batch if done else 0,
+            "confirm_status": 1,
+            "image": None,
+            "resources": [],
+            "item_list": items,
+        }
+        if status == _STATUS_QUEUED:
+            position = max(1, math.ceil((generation.dequeue_at - now) * self.config.queue_drain))
+            history["queue_info"] = {
+                "queue_idx": position,
+                "priority": 1,
+                "queue_status": 1,
+                "queue_length": position + self._random.randint(0, max(1, self.config.queue_depth)),
+                "polling_config": {"interval_seconds": 5, "timeout_seconds": 86400},
+                "priority_queue_display_threshold": {
+                    "waiting_time_threshold": int(position / self.config.queue_drain),
+                    "queue_idx_threshold": 0,
+                    "queue_length_threshold": 0,
+                },
+            }
+        if status == _STATUS_FAILED:
+            history["err_code"] = "2038"
+            history["err_msg"] = "生成失败，请稍后重试"
+        return history
+
+    def _item(self, generation: _Generation, index: int, base: str) -> Dict[str, Any]:
+        uri = f"{_IMAGE_PREFIX}/{generation.history_id}{index:02d}"
+        expires = int(generation.finish_at) + 86400
+        url = f"{base}/{uri}~tplv-heycan-image-2400.webp?x-expires={expires}&x-signature=standin"
+        return {
+            "common_attr": {
+                "id": f"{generation.history_id}-{index}",
+                "cover_url": f"{base}/{uri}~tplv-heycan-image-1080.webp?x-expires={expires}&x-signature=standin",
+            },
+            "image": {
+                "format": "webp",
+                "large_images": [{"image_uri": uri, "image_url": url, "width": 2048, "height": 2048, "format": "webp"}],
+            },
+        }
+
+    async def _image_body(self, name: str, size: int) -> AsyncIterator[bytes]:
+        # 每张图片以文件名开头，内容各不相同，避免被资源去重合并。
+        head = name.encode("utf-8")[:size]
+        filler = b"\0" * _CHUNK
+        sent = 0
+        while sent < size:
+            if sent == 0:
+                chunk = head + filler[: min(_CHUNK, size) - len(head)]
+            else:
+                chunk = filler[: min(_CHUNK, size - sent)]
+            sent += len(chunk)
+            if self.config.image_chunk_delay > 0:
+                await asyncio.sleep(self.config.image_chunk_delay)
+            yield chunk
+
+    def _lognormal(self, median: float, sigma: float) -> float:
+        if median <= 0:
+            return 0.0
+        return self._random.lognormvariate(math.log(median), sigma) if sigma > 0 else median
+
+
+class StandinServer:
+    """在独立线程中运行模拟服务，供测试与基准脚本使用::
+
+        with StandinServer(StandinConfig(generate_seconds=0.1)) as server:
+            client = JimengClient(sessionid="x", transport=TransportConfig(base_url=server.url))
+    """
+
+    def __init__(self, config: StandinConfig | None = None, *, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.standin = JimengStandin(config)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self.url = f"http://{host}:{self._sock.getsockname()[1]}"
+        self._server = uvicorn.Server(uvicorn.Config(self.standin.app, log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+
+    def __enter__(self) -> "StandinServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+        self._sock.close()
+
+
+def _parse_args(argv: List[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18600)
+    defaults = StandinConfig()
+    for item in fields(StandinConfig):
+        flag = "--" + item.name.replace("_", "-")
+        default = getattr(defaults, item.name)
+        kind = int if item.name in {"queue_depth", "submit_burst", "image_bytes", "preview_bytes", "seed"} else float
+        parser.add_argument(flag, type=kind, default=default)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = _parse_args(argv)
+    config = StandinConfig(**{item.name: getattr(args, item.name) for item in fields(StandinConfig)})
+    standin = JimengStandin(config)
+    print(f"即梦模拟服务监听 http://{args.host}:{args.port}，参数：{config}")
+    uvicorn.run(standin.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,8 @@ class ProjectManifest(CamelModel):
     updated_at: int = Field(alias="updatedAt")
     version: str = "1.0.0"
     canvas_checksum: str = Field(default="", alias="canvasChecksum")
+    # 画布版本，每次整体保存或增量补丁后加一；增量保存以它检测并发写入。
+    canvas_version: int = Field(default=0, alias="canvasVersion")
 
 
 class AssetPayload(CamelModel):
@@ -16,6 +16,10 @@ class TaskStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# 终态取值（字符串形式），任务注册表、任务日志与接口层共用。
+TERMINAL_STATUSES = frozenset({TaskStatus.SUCCEEDED.value, TaskStatus.FAILED.value, TaskStatus.CANCELLED.value})
+
+
 class GenerationTaskInfo(BaseModel):
     task_id: str = Field(alias="taskId")
     prompt: str
@@ -0,0 +1,213 @@
+"""即梦多账号客户端池与负载选择。"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Sequence
+
+from .admission import AdmissionController
+from .jimeng_client import JimengClient
+from .resilience import CircuitBreaker, RetryPolicy
+from .transport import TransportConfig
+
+if TYPE_CHECKING:  # pragma: no cover
+    from httpx._types import ProxiesTypes
+
+    from .jimeng import _PendingSubmission
+
+_DEFAULT_ERROR_WINDOW = 20
+_DEFAULT_UNHEALTHY_AFTER = 3
+_DEFAULT_UNHEALTHY_FOR = 60.0
+_ERROR_RATE_WEIGHT = 10.0
+# 真实 sessionid 只由字母、数字与 ``-``/``_`` 组成；模板中的中文说明等占位内容不会被当作账号。
+_SESSIONID_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+def _account_id(sessionid: str) -> str:
+    return hashlib.sha256(sessionid.encode("utf-8")).hexdigest()[:8]
+
+
+def parse_accounts(config: object) -> List[Dict[str, str]]:
+    """解析 secrets 中的 ``jimeng`` 配置，返回 ``[{"sessionid", "account_name"}]``。
+
+    兼容三种写法：单个账号对象、``{"accounts": [...]}`` 以及直接给出账号列表；其他形状视为配置无效。
+    sessionid 为空或仍是模板占位文字的条目会被跳过，重复的 sessionid 只保留第一个。
+    未填写 ``account_name`` 时按 sessionid 摘要命名为 ``account-<8 位十六进制>``，
+    名称与账号在列表中的位置无关：任务日志按名称路由轮询，调整账号顺序后重启不会串号。
+    """
+
+    raw: List[object]
+    if isinstance(config, dict):
+        nested = config.get("accounts")
+        raw = list(nested) if isinstance(nested, list) else [config]
+    elif isinstance(config, (list, tuple)):
+        raw = list(config)
+    elif config is None:
+        raw = []
+    else:
+        raise ValueError("即梦凭据格式无效，应为账号对象或账号列表")
+    accounts: List[Dict[str, str]] = []
+    names: set[str] = set()
+    sessions: set[str] = set()
+    for item in raw:
+        if not isinstance(item, dict):
+            continue
+        sessionid = str(item.get("sessionid") or "").strip()
+        if not _SESSIONID_PATTERN.match(sessionid) or sessionid in sessions:
+            continue
+        sessions.add(sessionid)
+        name = str(item.get("account_name") or item.get("description") or "").strip()
+        if not name:
+            name = f"account-{_account_id(sessionid)}"
+        elif name in names:
+            name = f"{name}-{_account_id(sessionid)}"
+        names.add(name)
+        accounts.append({"sessionid": sessionid, "account_name": name})
+    if not accounts:
+        raise ValueError("即梦凭据缺少 sessionid，请在 secrets 中填写后重试")
+    return accounts
+
+
+@dataclass(slots=True)
+class AccountSlot:
+    """池中的单个账号：客户端、准入控制、本地提交队列与健康统计。"""
+
+    name: str
+    client: JimengClient
+    admission: AdmissionController | None = None
+    queue: "OrderedDict[str, _PendingSubmission]" = field(default_factory=OrderedDict)
+    in_flight: int = 0
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=_DEFAULT_ERROR_WINDOW))
+    consecutive_errors: int = 0
+    unhealthy_until: float = 0.0
+    submitted: int = 0
+    errors: int = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def score(self) -> float:
+        """负载评分，越低越优先：生成中任务数 + 本地排队数 + 加权近期错误率。"""
+
+        return self.in_flight + len(self.queue) + self.error_rate * _ERROR_RATE_WEIGHT
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": now >= self.unhealthy_until,
+            "inFlight": self.in_flight,
+            "queued": len(self.queue),
+            "submitted": self.submitted,
+            "errors": self.errors,
+            "errorRate": round(self.error_rate, 3),
+            "score": round(self.score(), 3),
+            "admission": self.admission.stats() if self.admission is not None else None,
+            "client": self.client.stats() if hasattr(self.client, "stats") else None,
+        }
+
+
+class AccountPool:
+    """按负载与健康度为新任务挑选账号。
+
+    连续 ``unhealthy_after`` 次调用失败的账号在 ``unhealthy_for`` 秒内不参与选择；
+    所有账号都不健康时仍选择评分最低的账号，避免请求被直接拒绝。
+    已提交任务的轮询始终使用任务所属账号，由调用方通过 ``get`` 获取。
+    """
+
+    def __init__(
+        self,
+        slots: Sequence[AccountSlot],
+        *,
+        unhealthy_after: int = _DEFAULT_UNHEALTHY_AFTER,
+        unhealthy_for: float = _DEFAULT_UNHEALTHY_FOR,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not slots:
+            raise ValueError("账号池至少需要一个账号")
+        self._slots: Dict[str, AccountSlot] = {}
+        for slot in slots:
+            if slot.name in self._slots:
+                raise ValueError(f"账号名称重复：{slot.name}")
+            self._slots[slot.name] = slot
+        self._unhealthy_after = max(1, unhealthy_after)
+        self._unhealthy_for = unhealthy_for
+        self._clock = clock
+
+    @classmethod
+    def from_config(
+        cls,
+        config: object,
+        *,
+        proxies: ProxiesTypes | None = None,
+        admission: AdmissionController | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        transport: TransportConfig | None = None,
+    ) -> "AccountPool":
+        """按 secrets 配置创建账号池；多账号时每个账号使用 ``admission``/``breaker`` 的独立副本。"""
+
+        accounts = parse_accounts(config)
+        slots = []
+        for account in accounts:
+            shared = len(accounts) == 1
+            client = JimengClient(
+                sessionid=account["sessionid"],
+                account_name=account["account_name"],
+                proxies=proxies,
+                transport=transport,
+                retry_policy=retry_policy,
+                breaker=breaker if shared or breaker is None else breaker.clone(),
+            )
+            limiter = admission if shared or admission is None else admission.clone()
+            slots.append(AccountSlot(name=client.account_label, client=client, admission=limiter))
+        return cls(slots)
+
+    def __iter__(self) -> Iterator[AccountSlot]:
+        return iter(self._slots.values())
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, name: str) -> AccountSlot | None:
+        return self._slots.get(name)
+
+    @property
+    def default(self) -> AccountSlot:
+        return next(iter(self._slots.values()))
+
+    def is_healthy(self, slot: AccountSlot) -> bool:
+        return self._clock() >= slot.unhealthy_until
+
+    def ranked(self) -> List[AccountSlot]:
+        """按评分从低到高排列，健康账号排在不健康账号之前。"""
+
+        now = self._clock()
+        return sorted(self._slots.values(), key=lambda slot: (now < slot.unhealthy_until, slot.score()))
+
+    def select(self) -> AccountSlot:
+        return self.ranked()[0]
+
+    def record(self, slot: AccountSlot, ok: bool) -> None:
+        slot.outcomes.append(ok)
+        if ok:
+            slot.consecutive_errors = 0
+            return
+        slot.errors += 1
+        slot.consecutive_errors += 1
+        if slot.consecutive_errors >= self._unhealthy_after:
+            slot.unhealthy_until = self._clock() + self._unhealthy_for
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        return [slot.stats(now) for slot in self._slots.values()]
+
+    async def aclose(self) -> None:
+        for slot in self._slots.values():
+            await slot.client.aclose()
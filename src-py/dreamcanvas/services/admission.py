@@ -0,0 +1,172 @@
+"""即梦任务提交的账号级准入控制。"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+_DEFAULT_RECOVERY = 0.1
+_DEFAULT_MIN_RATE_RATIO = 0.1
+_DEFAULT_BACKOFF = 5.0
+_DEFAULT_MAX_BACKOFF = 120.0
+
+THROTTLED_CODE = "1015"
+
+
+class AdmissionController:
+    """单个账号的提交准入：并发上限 + 令牌桶限速 + 限流退避。
+
+    - ``max_concurrent`` 限制同时处于生成中的任务数，任务进入终态后调用 ``release`` 归还；
+    - ``rate``/``burst`` 构成令牌桶，限制每秒提交次数，允许 ``burst`` 次突发；
+    - 上游返回 1015（请求过于频繁）时调用 ``on_throttled``：速率减半并暂停一段指数增长的
+      冷却时间；之后每次成功提交按 ``recovery`` 比例线性恢复（AIMD），
+      使吞吐稳定在账号可承受的速率附近，而不是退化成大量失败。
+
+    参数为 ``None`` 表示不限制对应维度。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+        recovery: float = _DEFAULT_RECOVERY,
+        min_rate_ratio: float = _DEFAULT_MIN_RATE_RATIO,
+        backoff: float = _DEFAULT_BACKOFF,
+        max_backoff: float = _DEFAULT_MAX_BACKOFF,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError("max_concurrent 必须大于 0")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self._options: Dict[str, Any] = {
+            "max_concurrent": max_concurrent,
+            "rate": rate,
+            "burst": burst,
+            "recovery": recovery,
+            "min_rate_ratio": min_rate_ratio,
+            "backoff": backoff,
+            "max_backoff": max_backoff,
+            "clock": clock,
+        }
+        self._max_concurrent = max_concurrent
+        self._target_rate = rate
+        self._rate = rate
+        self._min_rate = rate * min_rate_ratio if rate is not None else None
+        self._burst = float(max(1, burst if burst is not None else 1))
+        self._recovery = max(0.0, recovery)
+        self._backoff = backoff
+        self._max_backoff = max(backoff, max_backoff)
+        self._clock = clock
+        self._tokens = self._burst
+        self._refilled_at = clock()
+        self._cooldown_until = 0.0
+        self._throttle_streak = 0
+        self._running = 0
+        self._changed = asyncio.Event()
+        self._admitted = 0
+        self._throttled = 0
+
+    def clone(self) -> "AdmissionController":
+        """以相同配置创建一个状态独立的新控制器，供其他账号使用。"""
+
+        return AdmissionController(**self._options)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def try_acquire(self) -> bool:
+        """立即尝试占用一个并发名额与一个令牌，成功返回 ``True``。"""
+
+        if self._max_concurrent is not None and self._running >= self._max_concurrent:
+            return False
+        now = self._clock()
+        if now < self._cooldown_until:
+            return False
+        self._refill(now)
+        if self._rate is not None and self._tokens < 1:
+            return False
+        if self._rate is not None:
+            self._tokens -= 1
+        self._running += 1
+        self._admitted += 1
+        return True
+
+    async def acquire(self) -> None:
+        """等待直到可以提交；并发已满时等待 ``release``，令牌不足或冷却中时按需休眠。"""
+
+        while not self.try_acquire():
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.wait_time())
+            except asyncio.TimeoutError:
+                pass
+
+    def wait_time(self) -> float | None:
+        """距离下一次可能获得准入的秒数；受并发上限约束时返回 ``None``。"""
+
+        if self._max_concurrent is not None and self._running >= self._max_concurrent:
+            return None
+        now = self._clock()
+        wait = max(0.0, self._cooldown_until - now)
+        if self._rate is not None:
+            self._refill(now)
+            if self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self._rate)
+        return wait
+
+    def occupy(self) -> None:
+        """登记一个无需准入即已在生成中的任务（例如重启后恢复的任务）。"""
+
+        self._running += 1
+
+    def release(self) -> None:
+        self._running = max(0, self._running - 1)
+        self._changed.set()
+
+    def refund(self) -> None:
+        """归还已获取但未实际使用的名额与令牌。"""
+
+        self._running = max(0, self._running - 1)
+        if self._rate is not None:
+            self._tokens = min(self._burst, self._tokens + 1)
+        self._changed.set()
+
+    def on_success(self) -> None:
+        self._throttle_streak = 0
+        if self._rate is not None and self._target_rate is not None and self._rate < self._target_rate:
+            self._rate = min(self._target_rate, self._rate + self._target_rate * self._recovery)
+
+    def on_throttled(self) -> None:
+        now = self._clock()
+        self._refill(now)
+        self._throttled += 1
+        if self._rate is not None and self._min_rate is not None:
+            self._rate = max(self._min_rate, self._rate / 2)
+        self._tokens = 0.0
+        cooldown = min(self._max_backoff, self._backoff * (2**self._throttle_streak))
+        self._throttle_streak += 1
+        self._cooldown_until = max(self._cooldown_until, now + cooldown)
+        self._changed.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "maxConcurrent": self._max_concurrent,
+            "rate": round(self._rate, 4) if self._rate is not None else None,
+            "targetRate": self._target_rate,
+            "tokens": round(self._tokens, 3),
+            "cooldownSeconds": round(max(0.0, self._cooldown_until - self._clock()), 3),
+            "admitted": self._admitted,
+            "throttled": self._throttled,
+        }
+
+    def _refill(self, now: float) -> None:
+        if self._rate is not None:
+            elapsed = max(0.0, now - self._refilled_at)
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._refilled_at = now
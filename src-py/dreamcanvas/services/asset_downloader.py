@@ -0,0 +1,227 @@
+"""生成结果的流式下载：分块写入临时文件并计算 SHA-256，fsync 后原子替换到目标路径。"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+from .jimeng_client import DOWNLOAD_CHUNK_SIZE, JimengClient
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_CONCURRENT = 8
+_DEFAULT_PER_TASK = 4
+
+
+@dataclass(slots=True)
+class DownloadResult:
+    """单个文件的下载结果与耗时统计。"""
+
+    url: str
+    path: Path
+    size: int
+    duration: float
+    sha256: str
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.duration if self.duration > 0 else float(self.size)
+
+
+class AssetDownloader:
+    """并发受限的结果下载器。
+
+    ``max_concurrent`` 限制整个服务同时进行的下载数，``per_task`` 限制单个任务内并行下载的图片数。
+    ``background=True`` 的下载（例如预览图之后补拉的原图）优先级较低：有前台下载等待时不占用空闲名额，
+    且最多同时占用 ``max_background`` 个名额（默认为总数的一半），给新到的前台下载留出余量。
+    每个文件以固定大小的分块写入同目录下的临时文件，写盘在线程池中进行，不阻塞事件循环；
+    全部写完后 fsync 并 ``os.replace`` 到目标路径，读者不会看到写了一半的文件。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int = _DEFAULT_MAX_CONCURRENT,
+        per_task: int = _DEFAULT_PER_TASK,
+        max_background: int | None = None,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> None:
+        if max_concurrent < 1 or per_task < 1:
+            raise ValueError("下载并发数必须大于 0")
+        self._available = max_concurrent
+        self._foreground_waiting = 0
+        self._condition = asyncio.Condition()
+        self._background = asyncio.Semaphore(max_background or max(1, max_concurrent // 2))
+        self._per_task = per_task
+        self._chunk_size = chunk_size
+        self._active = 0
+        self._active_background = 0
+        self._completed = 0
+        self._failed = 0
+        self._bytes = 0
+        self._seconds = 0.0
+
+    async def download_all(
+        self,
+        client: JimengClient,
+        items: Sequence[Tuple[str, Path]],
+        *,
+        background: bool = False,
+    ) -> List[DownloadResult | BaseException]:
+        """并行下载 ``(url, 目标路径)`` 列表，按输入顺序返回结果；单个失败以异常对象返回。"""
+
+        limit = asyncio.Semaphore(self._per_task)
+
+        async def _one(url: str, target: Path) -> DownloadResult:
+            async with limit:
+                return await self.download(client, url, target, background=background)
+
+        return list(await asyncio.gather(*(_one(url, target) for url, target in items), return_exceptions=True))
+
+    async def download(
+        self,
+        client: JimengClient,
+        url: str,
+        target: Path,
+        *,
+        background: bool = False,
+    ) -> DownloadResult:
+        async with contextlib.AsyncExitStack() as stack:
+            if background:
+                await stack.enter_async_context(self._background)
+            await self._acquire(background)
+            stack.push_async_callback(self._release)
+            self._active += 1
+            if background:
+                self._active_background += 1
+            started = time.perf_counter()
+            try:
+                size, digest = await client.stream_resource(
+                    url,
+                    lambda chunks: self._write(chunks, target),
+                    chunk_size=self._chunk_size,
+                )
+            except BaseException:
+                self._failed += 1
+                raise
+            finally:
+                self._active -= 1
+                if background:
+                    self._active_background -= 1
+        result = DownloadResult(
+            url=url,
+            path=target,
+            size=size,
+            duration=time.perf_counter() - started,
+            sha256=digest,
+        )
+        self._completed += 1
+        self._bytes += result.size
+        self._seconds += result.duration
+        logger.debug(
+            "下载完成 %s：%d 字节，%.0f ms，%.1f KiB/s",
+            target.name,
+            result.size,
+            result.duration * 1000,
+            result.bytes_per_second / 1024,
+        )
+        return result
+
+    async def copy_local(self, url: str, source: Path, target: Path) -> DownloadResult:
+        """把本地已有的结果文件（例如结果缓存）按与下载相同的方式写入目标路径。"""
+
+        started = time.perf_counter()
+        size, digest = await asyncio.to_thread(_copy_file, source, target, self._chunk_size)
+        return DownloadResult(url=url, path=target, size=size, duration=time.perf_counter() - started, sha256=digest)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "activeBackground": self._active_background,
+            "completed": self._completed,
+            "failed": self._failed,
+            "bytes": self._bytes,
+            "bytesPerSecond": round(self._bytes / self._seconds, 1) if self._seconds > 0 else 0.0,
+        }
+
+    async def _acquire(self, background: bool) -> None:
+        async with self._condition:
+            if background:
+                await self._condition.wait_for(lambda: self._available > 0 and not self._foreground_waiting)
+            else:
+                self._foreground_waiting += 1
+                try:
+                    await self._condition.wait_for(lambda: self._available > 0)
+                finally:
+                    self._foreground_waiting -= 1
+                    # 前台不再等待时唤醒被压住的后台下载。
+                    self._condition.notify_all()
+            self._available -= 1
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._available += 1
+            self._condition.notify_all()
+
+    async def _write(self, chunks: AsyncIterator[bytes], target: Path) -> Tuple[int, str]:
+        temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.part")
+        handle: IO[bytes] = await asyncio.to_thread(_open_temp, temp_path)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(_append, handle, digest, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(_commit, handle, temp_path, target)
+        except BaseException:
+            await asyncio.to_thread(_discard, handle, temp_path)
+            raise
+        return size, digest.hexdigest()
+
+
+def _copy_file(source: Path, target: Path, chunk_size: int) -> Tuple[int, str]:
+    temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.part")
+    handle = _open_temp(temp_path)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(source, "rb") as reader:
+            while chunk := reader.read(chunk_size):
+                _append(handle, digest, chunk)
+                size += len(chunk)
+        _commit(handle, temp_path, target)
+    except BaseException:
+        _discard(handle, temp_path)
+        raise
+    return size, digest.hexdigest()
+
+
+def _open_temp(path: Path) -> IO[bytes]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, "wb")
+
+
+def _append(handle: IO[bytes], digest: Any, chunk: bytes) -> None:
+    handle.write(chunk)
+    digest.update(chunk)
+
+
+def _commit(handle: IO[bytes], temp_path: Path, target: Path) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+    os.replace(temp_path, target)
+
+
+def _discard(handle: IO[bytes], temp_path: Path) -> None:
+    if not handle.closed:
+        handle.close()
+    temp_path.unlink(missing_ok=True)
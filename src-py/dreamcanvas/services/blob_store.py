@@ -0,0 +1,276 @@
+"""项目资源的内容寻址存储：相同内容只在磁盘上保存一份。"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from .project_catalog import CATALOG_NAME
+
+logger = logging.getLogger(__name__)
+
+_DB_NAME = "refs.sqlite3"
+
+
+class BlobStore:
+    """按 SHA-256 存放资源文件的共享目录，路径为 ``<root>/<ab>/<cd>/<digest>``。
+
+    项目目录中的资源文件（``AssetPayload.uri`` 指向的路径保持不变）以硬链接指向同一个 blob，
+    因此同一张上游图片被多个项目引用或重复下载时只占用一份磁盘空间。
+    每个 ``(project_id, asset_id)`` 在 SQLite 中登记一条引用，``gc`` 只删除没有任何引用、
+    且不再被项目文件硬链接的 blob。文件系统不支持硬链接时退化为普通副本，引用照常登记。
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def adopt(self, path: Path, digest: str, *, project_id: str, asset_id: str, relative_path: str) -> bool:
+        """把刚写入的项目文件纳入存储，返回内容是否已存在（即本次写入被去重）。"""
+
+        blob = self.blob_path(digest)
+        with self._lock:
+            deduped = blob.exists()
+            if deduped:
+                if not _same_file(blob, path):
+                    _replace_with_link(blob, path)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(path, blob)
+                except OSError:
+                    shutil.copy2(path, blob)
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)",
+                    (digest, blob.stat().st_size),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO refs (project_id, asset_id, path, digest) VALUES (?, ?, ?, ?)",
+                    (project_id, asset_id, relative_path, digest),
+                )
+        return deduped
+
+    def release(self, project_id: str, asset_id: str | None = None) -> int:
+        """移除项目（或其中单个资源）的引用，返回移除的条数；blob 本身由 ``gc`` 回收。"""
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if asset_id is None:
+                    cursor = conn.execute("DELETE FROM refs WHERE project_id = ?", (project_id,))
+                else:
+                    cursor = conn.execute(
+                        "DELETE FROM refs WHERE project_id = ? AND asset_id = ?",
+                        (project_id, asset_id),
+                    )
+            return cursor.rowcount
+
+    def prune(self, projects_root: Path) -> int:
+        """释放已不在项目中的资源引用，返回释放的条数。
+
+        桌面端直接改写 ``assets.json`` 或删除项目目录，服务无法在删除时得知，
+        因此按磁盘上的项目状态对账：引用的文件路径既不是任何资源的 ``uri``、
+        也不是其 ``metadata.previewUri``（原图落地后保留的预览图）时释放；项目目录已不存在时释放全部引用。
+        ``assets.json`` 无法读取的项目跳过，避免误删。
+        """
+
+        with self._lock:
+            if self._conn is None and not (self.root / _DB_NAME).exists():
+                return 0
+            rows = self._connect().execute("SELECT project_id, asset_id, path FROM refs").fetchall()
+        by_project: Dict[str, List[Tuple[str, str]]] = {}
+        for project_id, asset_id, path in rows:
+            by_project.setdefault(project_id, []).append((asset_id, path))
+        released = 0
+        for project_id, refs in by_project.items():
+            project_dir = projects_root / project_id
+            if not (project_dir / "manifest.json").exists():
+                released += self.release(project_id)
+                continue
+            try:
+                assets = json.loads((project_dir / "assets.json").read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                assets = []
+            except (OSError, ValueError):
+                logger.warning("无法读取项目 %s 的资源清单，跳过引用对账", project_id)
+                continue
+            live = _referenced_paths(assets)
+            for asset_id, path in refs:
+                if path not in live:
+                    released += self.release(project_id, asset_id)
+        if released:
+            logger.info("资源存储释放 %d 条已失效的引用", released)
+        return released
+
+    def refcount(self, digest: str) -> int:
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM refs WHERE digest = ?", (digest,)).fetchone()
+        return int(count)
+
+    def gc(self) -> Tuple[int, int]:
+        """删除无引用的 blob，返回 ``(删除数, 释放字节数)``。"""
+
+        removed = 0
+        freed = 0
+        with self._lock:
+            conn = self._connect()
+            referenced = {row[0] for row in conn.execute("SELECT DISTINCT digest FROM refs")}
+            for blob in self._iter_blobs():
+                if blob.name in referenced:
+                    continue
+                stat = blob.stat()
+                if stat.st_nlink > 1:
+                    # 仍有项目文件硬链接到该 blob（例如引用尚未登记），保留。
+                    continue
+                blob.unlink()
+                removed += 1
+                freed += stat.st_size
+                with conn:
+                    conn.execute("DELETE FROM blobs WHERE digest = ?", (blob.name,))
+        if removed:
+            logger.info("资源存储回收 %d 个无引用文件，释放 %d 字节", removed, freed)
+        return removed, freed
+
+    def relink(self, projects_root: Path) -> int:
+        """为缺失的项目资源文件重新建立到 blob 的链接（例如从去重备份恢复后），返回修复数。"""
+
+        repaired = 0
+        with self._lock:
+            for project_id, relative_path, digest in self._refs():
+                target = projects_root / project_id / relative_path
+                blob = self.blob_path(digest)
+                if target.exists() or not blob.exists():
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(blob, target)
+                except OSError:
+                    shutil.copy2(blob, target)
+                repaired += 1
+        if repaired:
+            logger.info("已为 %d 个项目资源重建链接", repaired)
+        return repaired
+
+    def linked_paths(self, projects_root: Path) -> Set[Path]:
+        """返回与 blob 内容相同、可在备份中省略的项目资源文件路径。"""
+
+        paths: Set[Path] = set()
+        with self._lock:
+            for project_id, relative_path, digest in self._refs():
+                target = projects_root / project_id / relative_path
+                if target.exists() and self.blob_path(digest).exists() and _same_file(target, self.blob_path(digest)):
+                    paths.add(target)
+        return paths
+
+    def checkpoint(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._conn is None and not (self.root / _DB_NAME).exists():
+                return {"blobs": 0, "bytes": 0, "refs": 0}
+            conn = self._connect()
+            blobs, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            (refs,) = conn.execute("SELECT COUNT(*) FROM refs").fetchone()
+        return {"blobs": int(blobs), "bytes": int(size), "refs": int(refs)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _refs(self) -> Iterator[Tuple[str, str, str]]:
+        if self._conn is None and not (self.root / _DB_NAME).exists():
+            return iter(())
+        return iter(self._connect().execute("SELECT project_id, path, digest FROM refs").fetchall())
+
+    def _iter_blobs(self) -> Iterator[Path]:
+        for first in self.root.iterdir():
+            if not first.is_dir() or len(first.name) != 2:
+                continue
+            for second in first.iterdir():
+                if second.is_dir():
+                    yield from (item for item in second.iterdir() if item.is_file())
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / _DB_NAME, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refs ("
+                "project_id TEXT NOT NULL, asset_id TEXT NOT NULL, path TEXT NOT NULL, digest TEXT NOT NULL, "
+                "PRIMARY KEY (project_id, asset_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest)")
+            self._conn = conn
+        return self._conn
+
+
+def write_backup(projects_root: Path, archive_path: Path, store: BlobStore | None) -> Path:
+    """把项目目录打包为 zip；启用资源存储时与 blob 内容相同的项目文件只保存 blob 一份。
+
+    恢复时解压到项目目录，服务启动时 ``BlobStore.relink`` 会补回省略的项目文件。
+    """
+
+    skipped: Set[Path] = set()
+    if store is not None:
+        store.checkpoint()
+        skipped = store.linked_paths(projects_root)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path in sorted(projects_root.rglob("*")):
+            if not path.is_file() or path in skipped or path.name.startswith(CATALOG_NAME):
+                # 项目索引可由目录树重建，恢复后启动时会重新对账。
+                continue
+            archive.write(path, path.relative_to(projects_root).as_posix())
+    return archive_path
+
+
+def _referenced_paths(assets: Any) -> Set[str]:
+    """``assets.json`` 中资源引用的项目内文件路径（统一为 ``/`` 分隔）。"""
+
+    paths: Set[str] = set()
+    for item in assets if isinstance(assets, list) else []:
+        if not isinstance(item, dict):
+            continue
+        metadata = item.get("metadata") if isinstance(item.get("metadata"), dict) else {}
+        for value in (item.get("uri"), metadata.get("previewUri")):
+            if isinstance(value, str) and value:
+                paths.add(value.replace("\\", "/"))
+    return paths
+
+
+def _same_file(left: Path, right: Path) -> bool:
+    try:
+        return os.path.samefile(left, right)
+    except OSError:
+        return False
+
+
+def _replace_with_link(blob: Path, path: Path) -> None:
+    temp = path.with_name(f".{path.name}.link")
+    try:
+        os.link(blob, temp)
+    except OSError:
+        # 不支持硬链接时保留项目中的副本。
+        return
+    os.replace(temp, path)
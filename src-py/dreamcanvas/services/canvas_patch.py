@@ -0,0 +1,174 @@
+"""画布增量保存：RFC 6902 JSON Patch 的应用与版本冲突错误。"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+_MISSING = object()
+
+
+class CanvasPatchError(ValueError):
+    """补丁操作格式错误或无法应用到当前画布。"""
+
+
+class CanvasConflictError(RuntimeError):
+    """补丁基于的画布版本不是最新版本，说明存在并发写入。"""
+
+    def __init__(self, project_id: str, base_version: int, current_version: int) -> None:
+        super().__init__(f"项目 {project_id} 的画布已更新到版本 {current_version}，补丁基于版本 {base_version}")
+        self.project_id = project_id
+        self.base_version = base_version
+        self.current_version = current_version
+
+
+def apply_patch(document: Any, operations: Sequence[Mapping[str, Any]]) -> Any:
+    """依次应用 ``add``/``remove``/``replace``/``move``/``copy``/``test`` 操作并返回新文档。
+
+    原文档不会被修改：只复制从根到被修改位置路径上的容器，其余部分与原文档共享，
+    因此调用方可以把返回值当作不可变快照保存。任一操作失败时抛出 ``CanvasPatchError``，
+    已应用的操作一并作废。
+    """
+
+    owned: Dict[int, Any] = {}
+    for index, operation in enumerate(operations, start=1):
+        try:
+            document = _apply(document, operation, owned)
+        except CanvasPatchError as exc:
+            raise CanvasPatchError(f"第 {index} 个操作：{exc}") from None
+    return document
+
+
+def _apply(document: Any, operation: Mapping[str, Any], owned: Dict[int, Any]) -> Any:
+    if not isinstance(operation, Mapping):
+        raise CanvasPatchError("操作必须是对象")
+    op = operation.get("op")
+    path = _parse_pointer(operation.get("path"), "path")
+    if op == "test":
+        if _get(document, path) != _value(operation):
+            raise CanvasPatchError(f"{operation['path']} 的值与预期不符")
+        return document
+    if op == "add":
+        return _add(document, path, _value(operation), owned)
+    if op == "remove":
+        return _remove(document, path, owned)[0]
+    if op == "replace":
+        _get(document, path)
+        return _set(document, path, _value(operation), owned)
+    if op in {"move", "copy"}:
+        source = _parse_pointer(operation.get("from"), "from")
+        if op == "move":
+            if path[: len(source)] == source and len(path) > len(source):
+                raise CanvasPatchError("不能把节点移动到它自己的子节点下")
+            document, value = _remove(document, source, owned)
+        else:
+            value = _get(document, source)
+        return _add(document, path, value, owned)
+    raise CanvasPatchError(f"不支持的操作类型：{op!r}")
+
+
+def _value(operation: Mapping[str, Any]) -> Any:
+    if "value" not in operation:
+        raise CanvasPatchError("缺少 value")
+    return operation["value"]
+
+
+def _parse_pointer(pointer: Any, field: str) -> List[str]:
+    if not isinstance(pointer, str):
+        raise CanvasPatchError(f"{field} 必须是字符串")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise CanvasPatchError(f"{field} 必须以 / 开头：{pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: List[Any], token: str, *, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise CanvasPatchError(f"无效的数组下标：{token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise CanvasPatchError(f"数组下标越界：{index}")
+    return index
+
+
+def _child(node: Any, token: str) -> Any:
+    if isinstance(node, dict):
+        value = node.get(token, _MISSING)
+        if value is _MISSING:
+            raise CanvasPatchError(f"路径不存在：{token!r}")
+        return value
+    if isinstance(node, list):
+        return node[_index(node, token, allow_end=False)]
+    raise CanvasPatchError(f"无法在非容器节点下查找 {token!r}")
+
+
+def _get(document: Any, path: List[str]) -> Any:
+    node = document
+    for token in path:
+        node = _child(node, token)
+    return node
+
+
+def _writable(node: Any, owned: Dict[int, Any]) -> Any:
+    """返回本次补丁内可以原地修改的容器：首次修改时复制一份，之后复用。"""
+
+    if id(node) in owned:
+        return node
+    if isinstance(node, dict):
+        clone: Any = dict(node)
+    elif isinstance(node, list):
+        clone = list(node)
+    else:
+        raise CanvasPatchError("目标的父节点不是对象或数组")
+    # 保存引用，避免对象被回收后 id 被复用。
+    owned[id(clone)] = clone
+    return clone
+
+
+def _parent(document: Any, path: List[str], owned: Dict[int, Any]) -> Tuple[Any, Any]:
+    root = _writable(document, owned)
+    node = root
+    for token in path[:-1]:
+        child = _writable(_child(node, token), owned)
+        if isinstance(node, dict):
+            node[token] = child
+        else:
+            node[_index(node, token, allow_end=False)] = child
+        node = child
+    return root, node
+
+
+def _add(document: Any, path: List[str], value: Any, owned: Dict[int, Any]) -> Any:
+    if not path:
+        return value
+    root, parent = _parent(document, path, owned)
+    if isinstance(parent, dict):
+        parent[path[-1]] = value
+    else:
+        parent.insert(_index(parent, path[-1], allow_end=True), value)
+    return root
+
+
+def _set(document: Any, path: List[str], value: Any, owned: Dict[int, Any]) -> Any:
+    if not path:
+        return value
+    root, parent = _parent(document, path, owned)
+    if isinstance(parent, dict):
+        parent[path[-1]] = value
+    else:
+        parent[_index(parent, path[-1], allow_end=False)] = value
+    return root
+
+
+def _remove(document: Any, path: List[str], owned: Dict[int, Any]) -> Tuple[Any, Any]:
+    if not path:
+        raise CanvasPatchError("不能删除根节点")
+    value = _get(document, path)
+    root, parent = _parent(document, path, owned)
+    if isinstance(parent, dict):
+        del parent[path[-1]]
+    else:
+        del parent[_index(parent, path[-1], allow_end=False)]
+    return root, value
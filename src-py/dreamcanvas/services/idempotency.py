@@ -0,0 +1,155 @@
+"""任务提交的幂等键：在时间窗口内把重复提交合并到已有任务上。"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Sequence, Tuple, TypeVar
+
+_DEFAULT_WINDOW = 600.0
+_DEFAULT_MAX_KEYS = 4096
+
+T = TypeVar("T")
+
+
+class IdempotencyConflictError(RuntimeError):
+    """幂等键已绑定到参数不同的请求上，说明客户端误用了同一个键。"""
+
+    def __init__(self, key: str, task_id: str | None) -> None:
+        super().__init__(f"幂等键 {key} 已用于参数不同的请求")
+        self.key = key
+        self.task_id = task_id
+
+
+def request_fingerprint(payload: Dict[str, Any], *, exclude: Sequence[str] = ()) -> str:
+    """对提交参数做稳定哈希，用于在未携带幂等键时识别完全相同的请求。"""
+
+    fields = {key: value for key, value in payload.items() if key not in exclude and value is not None}
+    encoded = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class IdempotencyCache(Generic[T]):
+    """记录“幂等键 → 任务 ID”，并合并同一键上正在进行的提交。
+
+    - 同一键的请求正在提交时，后来者等待同一个结果，上游只收到一次提交；
+    - 提交完成后 ``window`` 秒内再次出现该键时，经 ``resolve`` 取回已有任务，
+      ``resolve`` 返回 ``None`` 表示该任务已不可复用（例如已失败），此时按新请求处理；
+    - 最多保留 ``max_keys`` 个键，超出时淘汰最早的键；
+    - 登记键时同时记录请求的 ``fingerprint``，同一键在仍可复用时换了参数会抛出
+      :class:`IdempotencyConflictError`，而不是把不相干的请求合并到旧任务上。
+
+    一个请求可以同时带多个键（显式幂等键与参数指纹），命中任意一个即视为重复。
+    """
+
+    def __init__(
+        self,
+        *,
+        window: float = _DEFAULT_WINDOW,
+        max_keys: int = _DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_keys < 1:
+            raise ValueError("max_keys 必须大于 0")
+        self._window = window
+        self._max_keys = max_keys
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float, str | None]]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[asyncio.Future[T], str | None]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._window > 0
+
+    async def run(
+        self,
+        keys: Sequence[str],
+        submit: Callable[[], Awaitable[T]],
+        resolve: Callable[[str, str], T | None],
+        task_id_of: Callable[[T], str],
+        *,
+        fingerprint: str | None = None,
+    ) -> T:
+        """按 ``keys`` 去重后执行 ``submit``；``resolve(key, task_id)`` 需为同步调用以保证检查与登记是原子的。
+
+        ``fingerprint`` 为请求参数的摘要，键已绑定到其他摘要时抛出 :class:`IdempotencyConflictError`。
+        """
+
+        keys = [key for key in keys if key]
+        if not keys or not self.enabled:
+            return await submit()
+        self._expire()
+        for key in keys:
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self._check_fingerprint(key, pending[1], fingerprint, None)
+                self._hits += 1
+                return await asyncio.shield(pending[0])
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            existing = resolve(key, entry[0])
+            if existing is not None:
+                self._check_fingerprint(key, entry[2], fingerprint, entry[0])
+                self._hits += 1
+                return existing
+            del self._entries[key]
+        self._misses += 1
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._inflight[key] = (future, fingerprint)
+        try:
+            result = await submit()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # 没有等待者时避免 “exception was never retrieved” 警告。
+            future.exception()
+            raise
+        finally:
+            for key in keys:
+                if key in self._inflight and self._inflight[key][0] is future:
+                    del self._inflight[key]
+        future.set_result(result)
+        self._remember(keys, task_id_of(result), fingerprint)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire()
+        return {
+            "window": self._window,
+            "keys": len(self._entries),
+            "inFlight": len({id(future) for future, _ in self._inflight.values()}),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    @staticmethod
+    def _check_fingerprint(key: str, recorded: str | None, fingerprint: str | None, task_id: str | None) -> None:
+        if recorded is not None and fingerprint is not None and recorded != fingerprint:
+            raise IdempotencyConflictError(key, task_id)
+
+    def _remember(self, keys: List[str], task_id: str, fingerprint: str | None) -> None:
+        expires = self._clock() + self._window
+        for key in keys:
+            self._entries[key] = (task_id, expires, fingerprint)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self._max_keys:
+            self._entries.popitem(last=False)
+
+    def _expire(self) -> None:
+        # 所有键的窗口相同，按插入顺序即按过期顺序。
+        now = self._clock()
+        while self._entries:
+            key, (_, expires, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[key]
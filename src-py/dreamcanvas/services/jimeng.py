@@ -5,22 +5,44 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
+import shutil
+import sqlite3
 import time
 import uuid
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from pydantic import ValidationError
 
 from ..models.project import AssetPayload, GenerationRecord, ProjectPayload
-from ..models.tasks import GenerationTaskInfo, TaskStatus
+from ..models.tasks import TERMINAL_STATUSES, GenerationTaskInfo, TaskStatus
+from .account_pool import AccountPool, AccountSlot
+from .admission import THROTTLED_CODE, AdmissionController
+from .asset_downloader import AssetDownloader, DownloadResult
+from .blob_store import BlobStore
+from .idempotency import IdempotencyCache, request_fingerprint
 from .jimeng_client import JimengApiError, JimengClient, JimengSubmissionResult
-from .projects import ProjectStorage
+from .poll_scheduler import PollPolicy, PollScheduler
+from .project_io import AsyncProjectStorage
+from .project_writes import ProjectWriteQueue
+from .result_cache import ResultCache, result_cache_key
+from .task_events import TaskEventBus
+from .task_journal import TaskJournal
+from .task_registry import ArchivedTask, TaskArchive, TaskRecord, TaskRegistry
+
+if TYPE_CHECKING:  # pragma: no cover
+    from httpx._types import ProxiesTypes
 
 logger = logging.getLogger(__name__)
 
 _DEFAULT_POLL_INTERVAL = 3.0
 _DEFAULT_POLL_TIMEOUT = 240.0
-
+_DEFAULT_POLL_BATCH_SIZE = 20
+_MAX_THROTTLE_RETRIES = 5
+_LOCAL_QUEUE_KEYS = ("queuePosition", "queueMessage")
 
 @dataclass(slots=True)
 class TaskContext:
@@ -29,44 +51,209 @@ class TaskContext:
     history_id: str
     created_ms: int
     started_monotonic: float
+    account: str = "default"
+    running_since: float | None = None
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    @property
+    def latency_key(self) -> str:
+        return f"{self.metadata.get('model') or '3.0'}|{self.metadata.get('size') or '1024x1024'}"
+
+
+@dataclass(slots=True)
+class _PendingSubmission:
+    """等待准入的提交请求；本地排队时 ``task_id`` 为占位任务 ID。"""
+
+    prompt: str
+    model: str | None
+    size: str | None
+    batch: int
+    metadata: Dict[str, Any]
+    created_ms: int
+    task_id: str | None = None
+    throttled: int = 0
+    inline_poll: bool = True
+    seed: int | None = None
+
+    @classmethod
+    def from_record(cls, record: TaskRecord) -> "_PendingSubmission":
+        metadata = {key: value for key, value in record.metadata.items() if key not in _LOCAL_QUEUE_KEYS}
+        return cls(
+            prompt=record.prompt,
+            model=metadata.get("model"),
+            size=metadata.get("size"),
+            batch=int(metadata.get("batch") or 1),
+            metadata=metadata,
+            created_ms=record.created_at,
+            task_id=record.task_id,
+            seed=metadata.get("seed"),
+        )
+
 
 class JimengService:
-    """封装即梦任务提交、轮询与异常追踪。"""
+    """封装即梦任务提交、轮询与异常追踪。
+
+    提交按账号池评分路由到负载最低的健康账号；任务提交后固定归属该账号，
+    轮询与素材下载都使用所属账号的客户端。
+    """
 
     def __init__(
         self,
         *,
-        config: Dict[str, Any] | None,
-        proxy_config: Dict[str, str] | str | None = None,
+        config: object,
+        proxy_config: ProxiesTypes | None = None,
         client: JimengClient | None = None,
         poll_interval: float = _DEFAULT_POLL_INTERVAL,
         poll_timeout: float = _DEFAULT_POLL_TIMEOUT,
-        project_storage: ProjectStorage | None = None,
+        poll_batch_size: int = _DEFAULT_POLL_BATCH_SIZE,
+        poll_policy: PollPolicy | None = None,
+        project_storage: AsyncProjectStorage | None = None,
+        project_writes: ProjectWriteQueue | None = None,
+        journal: TaskJournal | None = None,
+        registry: TaskRegistry | None = None,
+        archive: TaskArchive | None = None,
+        admission: AdmissionController | None = None,
+        pool: AccountPool | None = None,
+        downloader: AssetDownloader | None = None,
+        blob_store: BlobStore | None = None,
+        idempotency: IdempotencyCache[GenerationTaskInfo] | None = None,
+        dedupe_identical: bool = False,
+        result_cache: ResultCache | None = None,
     ) -> None:
-        config = config or {}
-        sessionid = (config.get("sessionid") or "").strip()
-        if not sessionid:
-            raise ValueError("即梦凭据缺少 sessionid，请在 secrets 中填写后重试")
-        account_name = (config.get("account_name") or "").strip() or "default"
-        self._client = client or JimengClient(sessionid=sessionid, account_name=account_name, proxies=proxy_config)
+        if pool is None and client is not None:
+            pool = AccountPool([AccountSlot(name=client.account_label, client=client, admission=admission)])
+        self._pool = pool or AccountPool.from_config(config, proxies=proxy_config, admission=admission)
         self._poll_interval = poll_interval
         self._poll_timeout = poll_timeout
+        self._poll_policy = poll_policy or PollPolicy(base_interval=poll_interval)
         self._project_storage = project_storage
+        self._project_writes = project_writes or (
+            ProjectWriteQueue(project_storage) if project_storage is not None else None
+        )
+        self._journal = journal
+        self._archive = archive
+        self._downloader = downloader or AssetDownloader()
+        self._blob_store = blob_store
+        self._idempotency: IdempotencyCache[GenerationTaskInfo] = idempotency or IdempotencyCache()
+        self._dedupe_identical = dedupe_identical
+        self._result_cache = result_cache
 
-        self._tasks: Dict[str, GenerationTaskInfo] = {}
+        self._registry = registry if registry is not None else TaskRegistry()
         self._contexts: Dict[str, TaskContext] = {}
-        self._pollers: Dict[str, asyncio.Task[Any]] = {}
+        self._scheduler = PollScheduler(
+            self._poll_batch,
+            max_batch_size=poll_batch_size,
+            coalesce_window=poll_interval / 2,
+            error_backoff=poll_interval,
+            max_error_backoff=poll_interval * 10,
+        )
         self._asset_tasks: Dict[str, asyncio.Task[Any]] = {}
-        self._traces: Dict[str, List[Dict[str, Any]]] = {}
+        self._submit_dispatchers: Dict[str, asyncio.Task[Any]] = {}
+        self._submit_tasks: set[asyncio.Task[Any]] = set()
+        self._owners: Dict[str, str] = {}
+        self._archive_flushes: set[asyncio.Task[Any]] = set()
+        self._events = TaskEventBus()
+        self._task_signals: Dict[str, asyncio.Event] = {}
         self._lock = asyncio.Lock()
 
     @property
     def account_label(self) -> str:
-        return self._client.account_label
+        return self._pool.default.name
 
-    async def submit_task(self, payload: Dict[str, Any]) -> GenerationTaskInfo:
+    @property
+    def pool(self) -> AccountPool:
+        return self._pool
+
+    @property
+    def events(self) -> TaskEventBus:
+        return self._events
+
+    async def submit_task(self, payload: Dict[str, Any], *, idempotency_key: str | None = None) -> GenerationTaskInfo:
+        """提交单个任务；相同幂等键（或开启 ``dedupe_identical`` 时相同参数）的重复提交合并到已有任务。
+
+        幂等键已用于参数不同的请求时抛出 :class:`IdempotencyConflictError`。
+        """
+
+        request = self._build_submission(payload)
+        key = (idempotency_key or str(payload.get("idempotencyKey") or "")).strip()
+        fingerprint = request_fingerprint(payload, exclude=("idempotencyKey",))
+        keys = [f"key:{key}"] if key else []
+        if self._dedupe_identical:
+            keys.append(f"fp:{fingerprint}")
+        return await self._idempotency.run(
+            keys,
+            lambda: self._submit_new(request),
+            self._reusable_task,
+            lambda task: task.task_id,
+            fingerprint=fingerprint,
+        )
+
+    async def _submit_new(self, request: _PendingSubmission) -> GenerationTaskInfo:
+        cached = await self._serve_cached(request)
+        if cached is not None:
+            return cached
+        for slot in self._pool.ranked():
+            if slot.admission is None or (not slot.queue and slot.admission.try_acquire()):
+                return await self._submit_admitted(slot, request)
+        return await self._enqueue_submission(self._pool.select(), request)
+
+    async def submit_batch(self, payloads: List[Dict[str, Any]]) -> List[GenerationTaskInfo]:
+        """批量提交：全部校验通过后立即放入各账号的本地队列，按输入顺序返回占位任务。
+
+        任务 ID 即占位 ID，提交上游后保持不变；实际提交由各账号的分发协程在准入预算内并发进行，
+        且跳过提交后的首次内联查询，交给轮询调度器统一批量查询。
+        """
+
+        errors: List[str] = []
+        requests: List[_PendingSubmission] = []
+        for index, payload in enumerate(payloads, start=1):
+            try:
+                request = self._build_submission(payload)
+            except ValueError as exc:
+                errors.append(f"第 {index} 项：{exc}")
+                continue
+            request.inline_poll = False
+            requests.append(request)
+        if errors:
+            raise ValueError("；".join(errors))
+
+        tasks: Dict[int, GenerationTaskInfo] = {}
+        for request in requests:
+            cached = await self._serve_cached(request)
+            if cached is not None:
+                tasks[id(request)] = cached
+
+        assigned: Dict[str, List[_PendingSubmission]] = {}
+        extra: Dict[str, int] = {}
+        ranked = self._pool.ranked()
+        for request in requests:
+            if id(request) in tasks:
+                continue
+            # 按“当前评分 + 本批已分配数”挑选账号，使一批任务均摊到各健康账号。
+            slot = min(ranked, key=lambda item: (not self._pool.is_healthy(item), item.score() + extra.get(item.name, 0)))
+            extra[slot.name] = extra.get(slot.name, 0) + 1
+            assigned.setdefault(slot.name, []).append(request)
+        for name, items in assigned.items():
+            target = self._pool.get(name)
+            if target is None:  # pragma: no cover - 名称来自账号池本身
+                continue
+            for request, task in zip(items, await self._enqueue_many(target, items)):
+                tasks[id(request)] = task
+        return [tasks[id(request)] for request in requests]
+
+    def _reusable_task(self, key: str, task_id: str) -> GenerationTaskInfo | None:
+        """幂等命中时可复用的任务：显式幂等键复用未失败的任务，参数指纹只复用进行中的任务。"""
+
+        record = self._registry.get(task_id)
+        if record is None:
+            return None
+        if record.status in {TaskStatus.FAILED.value, TaskStatus.CANCELLED.value}:
+            return None
+        if key.startswith("fp:") and record.terminal:
+            return None
+        return record.to_model()
+
+    def _build_submission(self, payload: Dict[str, Any]) -> _PendingSubmission:
         prompt = (payload.get("prompt") or "").strip()
         if not prompt:
             raise ValueError("prompt 不能为空")
@@ -78,30 +265,306 @@ class JimengService:
             "model": model or "3.0",
             "size": size or "1024x1024",
             "batch": batch,
-            "account": self.account_label,
         }
         if payload.get("projectId"):
             metadata["projectId"] = payload["projectId"]
         if payload.get("referenceImage"):
             metadata["referenceImage"] = payload["referenceImage"]
+        seed = payload.get("seed")
+        if seed is not None:
+            try:
+                seed = int(seed)
+            except (TypeError, ValueError):
+                raise ValueError("seed 必须为整数") from None
+            if not 1 <= seed <= 999_999_999:
+                raise ValueError("seed 需在 1 到 999999999 之间")
+            metadata["seed"] = seed
 
+        return _PendingSubmission(
+            prompt=prompt,
+            model=model,
+            size=size,
+            batch=batch,
+            metadata=metadata,
+            created_ms=int(time.time() * 1000),
+            seed=seed,
+        )
+
+    def _result_cache_key(self, prompt: str, metadata: Dict[str, Any]) -> str | None:
+        if self._result_cache is None or metadata.get("seed") is None:
+            return None
+        return result_cache_key(
+            prompt=prompt,
+            model=str(metadata.get("model")),
+            size=str(metadata.get("size")),
+            batch=int(metadata.get("batch") or 1),
+            seed=int(metadata["seed"]),
+            reference_image=metadata.get("referenceImage"),
+        )
+
+    async def _serve_cached(self, request: _PendingSubmission) -> GenerationTaskInfo | None:
+        """固定种子的请求命中结果缓存时，直接以本地图片生成一个已成功的任务。
+
+        缓存文件位于后端私有目录，客户端无法通过接口访问，且会被过期或淘汰删除；
+        因此只为关联项目的请求提供缓存结果，图片随后复制进项目目录。
+        """
+
+        if self._project_storage is None or not request.metadata.get("projectId"):
+            return None
+        key = self._result_cache_key(request.prompt, request.metadata)
+        if key is None or self._result_cache is None:
+            return None
+        try:
+            paths = await asyncio.to_thread(self._result_cache.get, key)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("读取结果缓存失败：%s", exc)
+            return None
+        if not paths:
+            return None
+        task_id = request.task_id or f"cache-{uuid4_hex()}"
+        metadata = dict(request.metadata)
+        metadata["cacheHit"] = True
+        self._record_trace(task_id, "result_cache_hit", images=len(paths))
+        return await self._store_task(
+            task_id=task_id,
+            prompt=request.prompt,
+            created_ms=request.created_ms,
+            submission=JimengSubmissionResult(
+                history_id=task_id,
+                status=TaskStatus.SUCCEEDED,
+                result_urls=[path.as_uri() for path in paths],
+            ),
+            metadata=metadata,
+        )
+
+    async def get_task(self, task_id: str) -> GenerationTaskInfo:
+        async with self._lock:
+            record = self._registry.get(task_id)
+            task = record.to_model() if record is not None else None
+        if task is None:
+            task = await self._load_archived(task_id)
+        if task is None:
+            raise KeyError(f"任务 {task_id} 不存在")
+        return task
+
+    async def wait_for_task(
+        self,
+        task_id: str,
+        *,
+        since_updated_at: int | None = None,
+        timeout: float = 0.0,
+    ) -> GenerationTaskInfo:
+        """长轮询：在任务 ``updated_at`` 超过 ``since_updated_at`` 或等待超时后返回最新快照。
+
+        未指定 ``since_updated_at`` 时以当前快照为基准；任务已处于终态且没有待落盘的
+        素材时立即返回，不再等待。
+        """
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, timeout)
+        baseline = since_updated_at
+        while True:
+            async with self._lock:
+                record = self._registry.get(task_id)
+                if record is not None:
+                    if baseline is None:
+                        baseline = record.updated_at
+                    if record.updated_at > baseline:
+                        return record.to_model()
+                    if record.terminal and task_id not in self._asset_tasks:
+                        return record.to_model()
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return record.to_model()
+                    signal = self._task_signals.setdefault(task_id, asyncio.Event())
+            if record is None:
+                # 已归档的任务必然处于终态，不会再更新。
+                archived = await self._load_archived(task_id)
+                if archived is None:
+                    raise KeyError(f"任务 {task_id} 不存在")
+                return archived
+            try:
+                await asyncio.wait_for(signal.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def list_tasks(self) -> List[GenerationTaskInfo]:
+        async with self._lock:
+            return [record.to_model() for record in self._registry]
+
+    async def cancel_task(self, task_id: str) -> GenerationTaskInfo:
+        async with self._lock:
+            record = self._registry.get(task_id)
+            if record is not None:
+                if record.terminal:
+                    return record.to_model()
+                for slot in self._pool:
+                    if slot.queue.pop(task_id, None) is not None:
+                        self._refresh_queue_positions(slot)
+                        break
+                record.update(status=TaskStatus.CANCELLED)
+                record.set_metadata("cancelledAt", int(time.time() * 1000))
+                self._commit_task(record)
+                updated = record.to_model()
+        if record is None:
+            archived = await self._load_archived(task_id)
+            if archived is None:
+                raise KeyError(f"任务 {task_id} 不存在")
+            return archived
+        self._record_trace(task_id, "cancelled")
+        if self._contexts.pop(task_id, None) is not None:
+            self._scheduler.discard(task_id)
+            self._record_trace(task_id, "poll_cancelled")
+        return updated
+
+    async def restore(self) -> int:
+        """从任务日志重建任务表，并为未完成的任务恢复轮询，返回恢复轮询的任务数。"""
+
+        if self._journal is None:
+            return 0
+        entries = await asyncio.to_thread(self._journal.load)
+        resumed = 0
         now_ms = int(time.time() * 1000)
+        async with self._lock:
+            for entry in entries.values():
+                try:
+                    task = GenerationTaskInfo.model_validate(entry.task)
+                except ValidationError:
+                    logger.warning("任务日志中的记录 %s 无法解析，已跳过", entry.task_id)
+                    continue
+                record = TaskRecord.from_model(task)
+                self._archive_evicted(self._registry.put(record))
+                if entry.terminal:
+                    continue
+                if entry.context is None and "historyId" not in task.metadata:
+                    # 停机前仍在本地排队、尚未提交上游的任务，按原顺序重新排队。
+                    slot = self._pool.get(str(task.metadata.get("account"))) or self._pool.default
+                    slot.queue[task.task_id] = _PendingSubmission.from_record(record)
+                    continue
+                context = self._context_from_journal(task, entry.context, now_ms)
+                if context is None:
+                    continue
+                self._contexts[task.task_id] = context
+                owner = self._pool.get(context.account)
+                if owner is not None:
+                    self._claim(owner, task.task_id)
+                    if owner.admission is not None:
+                        owner.admission.occupy()
+                self._scheduler.schedule(task.task_id, context.account, 0.0)
+                self._record_trace(task.task_id, "restored", historyId=context.history_id)
+                resumed += 1
+            for slot in self._pool:
+                if slot.queue:
+                    self._refresh_queue_positions(slot)
+                    self._ensure_submit_dispatcher(slot)
+        logger.info("已从任务日志恢复 %d 个任务，其中 %d 个继续轮询", len(entries), resumed)
+        return resumed
+
+    async def warmup(self) -> int:
+        """为池中每个账号预先建立 API 连接，返回预热成功的账号数。"""
+
+        clients = [slot.client for slot in self._pool if hasattr(slot.client, "warmup")]
+        results = await asyncio.gather(*(client.warmup() for client in clients), return_exceptions=True)
+        return sum(1 for result in results if result is True)
+
+    async def aclose(self) -> None:
+        await self._scheduler.aclose()
+
+        pending = list(self._submit_tasks) + list(self._submit_dispatchers.values())
+        self._submit_dispatchers.clear()
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._submit_tasks.clear()
+
+        for task in list(self._asset_tasks.values()):
+            task.cancel()
+        for task in list(self._asset_tasks.values()):
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._asset_tasks.clear()
+        if self._project_writes is not None:
+            await self._project_writes.aclose()
+
+        self._contexts.clear()
+        await self._pool.aclose()
+        for flush in list(self._archive_flushes):
+            with contextlib.suppress(Exception):
+                await flush
+        if self._archive is not None:
+            await asyncio.to_thread(self._archive.close)
+        if self._journal is not None:
+            await asyncio.to_thread(self._journal.close)
+
+    async def get_trace(self, task_id: str) -> List[Dict[str, Any]]:
+        trace = self._registry.trace(task_id)
+        if trace is None and self._archive is not None:
+            archived = await asyncio.to_thread(self._archive.load, task_id)
+            trace = archived[1] if archived else None
+        return trace or []
+
+    async def diagnostics(self) -> Dict[str, Any]:
+        """汇总任务注册表、轮询调度与持久化状态，供 `/system/diagnostics` 展示。"""
+
+        async with self._lock:
+            self._archive_evicted(self._registry.evict_expired())
+            registry = self._registry.stats()
+        archive: Dict[str, Any] | None = None
+        if self._archive is not None:
+            archive = {
+                "path": str(self._archive.path),
+                "tasks": await asyncio.to_thread(self._archive.count),
+                "pending": self._archive.pending_count,
+            }
+        return {
+            "registry": registry,
+            "archive": archive,
+            "accounts": self._pool.stats(),
+            "downloads": self._downloader.stats(),
+            "idempotency": self._idempotency.stats(),
+            "resultCache": self._result_cache.stats() if self._result_cache is not None else None,
+            "projectWrites": self._project_writes.stats() if self._project_writes is not None else None,
+            "scheduler": self._scheduler.stats(),
+            "pollPolicy": self._poll_policy.stats(),
+            "events": {"cursor": self._events.cursor, "subscribers": self._events.subscriber_count},
+            "journal": self._journal.stats() if self._journal is not None else None,
+        }
+
+    async def _submit_admitted(self, slot: AccountSlot, request: _PendingSubmission) -> GenerationTaskInfo:
+        """通过 ``slot`` 向上游提交已获准入的请求；被 1015 限流时触发退避并重新排队。"""
+
+        admission = slot.admission
+        request.metadata["account"] = slot.name
         try:
-            submission = await self._client.submit_generation(
-                prompt=prompt,
-                model=model,
-                size=size,
-                batch=batch,
+            submission = await slot.client.submit_generation(
+                prompt=request.prompt,
+                model=request.model,
+                size=request.size,
+                batch=request.batch,
+                inline_poll=request.inline_poll,
+                seed=request.seed,
             )
         except JimengApiError as exc:
+            self._pool.record(slot, False)
+            if admission is not None:
+                admission.release()
+                if exc.code == THROTTLED_CODE and request.throttled < _MAX_THROTTLE_RETRIES:
+                    admission.on_throttled()
+                    request.throttled += 1
+                    logger.warning("账号 %s 提交被限流，任务重新排队（第 %d 次）", slot.name, request.throttled)
+                    # 重新选择账号：被限流账号的错误率上升，其他账号有余量时会优先承接。
+                    return await self._enqueue_submission(self._pool.select(), request, front=True)
             logger.error("即梦任务提交失败：%s", exc)
-            task_id = f"failed-{uuid4_hex()}"
+            task_id = request.task_id or f"failed-{uuid4_hex()}"
+            metadata = dict(request.metadata)
             metadata["historyId"] = task_id
-            self._record_trace(task_id, "submit_failed", message=str(exc), code=exc.code)
+            self._record_trace(task_id, "submit_failed", message=str(exc), code=exc.code, account=slot.name)
             return await self._store_task(
                 task_id=task_id,
-                prompt=prompt,
-                created_ms=now_ms,
+                prompt=request.prompt,
+                created_ms=request.created_ms,
                 submission=JimengSubmissionResult(
                     history_id=task_id,
                     status=TaskStatus.FAILED,
@@ -113,34 +576,50 @@ class JimengService:
                 metadata=metadata,
             )
 
-        task_id = submission.history_id
-        metadata["historyId"] = task_id
+        self._pool.record(slot, True)
+        slot.submitted += 1
+        if admission is not None:
+            admission.on_success()
+        history_id = submission.history_id
+        task_id = request.task_id or history_id
+        metadata = dict(request.metadata)
+        metadata["historyId"] = history_id
         if submission.queue_message:
             metadata["queueMessage"] = submission.queue_message
 
-        task = await self._store_task(
-            task_id=task_id,
-            prompt=prompt,
-            created_ms=now_ms,
-            submission=submission,
-            metadata=metadata,
-        )
-
-        if self._status_value(task.status) not in {
-            TaskStatus.SUCCEEDED.value,
-            TaskStatus.FAILED.value,
-            TaskStatus.CANCELLED.value,
-        }:
-            context = TaskContext(
-                history_id=task_id,
-                created_ms=now_ms,
-                started_monotonic=time.monotonic(),
-                metadata=dict(metadata),
+        context: TaskContext | None = None
+        async with self._lock:
+            current = self._registry.get(task_id) if request.task_id is not None else None
+            if current is not None and current.terminal:
+                # 排队期间已被取消：上游任务无法撤回，只归还准入名额。
+                if admission is not None:
+                    admission.release()
+                self._record_trace(task_id, "submit_discarded", historyId=history_id)
+                return current.to_model()
+            if self._status_value(submission.status) not in TERMINAL_STATUSES:
+                # 先登记上下文，使首条日志记录即可用于重启后恢复轮询。
+                context = TaskContext(
+                    history_id=history_id,
+                    created_ms=request.created_ms,
+                    started_monotonic=time.monotonic(),
+                    account=slot.name,
+                    metadata=dict(metadata),
+                )
+                self._contexts[task_id] = context
+                self._claim(slot, task_id)
+            elif admission is not None:
+                admission.release()
+            task = await self._store_task(
+                task_id=task_id,
+                prompt=request.prompt,
+                created_ms=request.created_ms,
+                submission=submission,
+                metadata=metadata,
+                lock_guarded=False,
             )
-            self._contexts[task_id] = context
-            poller = asyncio.create_task(self._poll_task(task_id), name=f"jimeng-poller-{task_id}")
-            poller.add_done_callback(self._on_poller_done)
-            self._pollers[task_id] = poller
+
+        if context is not None:
+            self._scheduler.schedule(task_id, context.account, self._next_poll_delay(context, submission))
 
         self._record_trace(task_id, "submit", state=self._status_value(task.status), metadata=dict(metadata))
         if self._status_value(task.status) == TaskStatus.SUCCEEDED.value:
@@ -149,67 +628,115 @@ class JimengService:
             self._record_trace(task_id, "failed", error=task.error_code)
         return task
 
-    async def get_task(self, task_id: str) -> GenerationTaskInfo:
-        async with self._lock:
-            if task_id not in self._tasks:
-                raise KeyError(f"任务 {task_id} 不存在")
-            return self._tasks[task_id]
+    async def _enqueue_submission(
+        self,
+        slot: AccountSlot,
+        request: _PendingSubmission,
+        *,
+        front: bool = False,
+    ) -> GenerationTaskInfo:
+        """把请求放入账号的本地 FIFO 队列，并以占位任务对外展示排队位置。"""
 
-    async def list_tasks(self) -> List[GenerationTaskInfo]:
-        async with self._lock:
-            return list(self._tasks.values())
+        (task,) = await self._enqueue_many(slot, [request], front=front)
+        return task
 
-    async def cancel_task(self, task_id: str) -> GenerationTaskInfo:
+    async def _enqueue_many(
+        self,
+        slot: AccountSlot,
+        requests: List[_PendingSubmission],
+        *,
+        front: bool = False,
+    ) -> List[GenerationTaskInfo]:
+        records: List[TaskRecord] = []
         async with self._lock:
-            task = self._tasks.get(task_id)
-            if task is None:
-                raise KeyError(f"任务 {task_id} 不存在")
-            if self._status_value(task.status) in {
-                TaskStatus.SUCCEEDED.value,
-                TaskStatus.FAILED.value,
-                TaskStatus.CANCELLED.value,
-            }:
-                return task
-            now = int(time.time() * 1000)
-            metadata = dict(task.metadata)
-            metadata["cancelledAt"] = now
-            updated = task.model_copy(
-                update={
-                    "status": TaskStatus.CANCELLED,
-                    "updated_at": now,
-                    "metadata": metadata,
-                }
+            for request in requests:
+                request.metadata["account"] = slot.name
+                task_id = request.task_id
+                if task_id is None:
+                    task_id = request.task_id = f"local-{uuid4_hex()}"
+                record = self._registry.get(task_id)
+                if record is None:
+                    record = TaskRecord(
+                        task_id=task_id,
+                        prompt=request.prompt,
+                        status=TaskStatus.QUEUED.value,
+                        metadata=dict(request.metadata),
+                        created_at=request.created_ms,
+                        updated_at=request.created_ms,
+                    )
+                    # 新记录在刷新排队位置时统一提交，避免每条记录提交两次。
+                    record.dirty.add("metadata")
+                    self._registry.put(record)
+                else:
+                    record.set_metadata("account", slot.name)
+                slot.queue[task_id] = request
+                records.append(record)
+            if front:
+                for record in reversed(records):
+                    slot.queue.move_to_end(record.task_id, last=False)
+            self._refresh_queue_positions(slot)
+            tasks = [record.to_model() for record in records]
+        for task in tasks:
+            self._record_trace(task.task_id, "queued_local", position=task.metadata.get("queuePosition"), account=slot.name)
+        self._ensure_submit_dispatcher(slot)
+        return tasks
+
+    def _refresh_queue_positions(self, slot: AccountSlot) -> None:
+        """更新账号本地排队任务的位置与提示文案，调用方需持有 ``_lock``。"""
+
+        for index, task_id in enumerate(slot.queue, start=1):
+            record = self._registry.get(task_id)
+            if record is None:
+                continue
+            record.set_metadata("queuePosition", index)
+            record.set_metadata(
+                "queueMessage",
+                f"本地排队中，前方还有 {index - 1} 个任务" if index > 1 else "本地排队中，即将提交",
             )
-            self._tasks[task_id] = updated
-        self._record_trace(task_id, "cancelled")
-        poller = self._pollers.pop(task_id, None)
-        if poller:
-            poller.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await poller
-        self._contexts.pop(task_id, None)
-        return updated
+            if record.dirty:
+                self._commit_task(record)
 
-    async def aclose(self) -> None:
-        for poller in list(self._pollers.values()):
-            poller.cancel()
-        for poller in list(self._pollers.values()):
-            with contextlib.suppress(asyncio.CancelledError):
-                await poller
-        self._pollers.clear()
+    def _ensure_submit_dispatcher(self, slot: AccountSlot) -> None:
+        dispatcher = self._submit_dispatchers.get(slot.name)
+        if dispatcher is None or dispatcher.done():
+            self._submit_dispatchers[slot.name] = asyncio.create_task(
+                self._drain_submissions(slot),
+                name=f"jimeng-submit-dispatcher-{slot.name}",
+            )
 
-        for task in list(self._asset_tasks.values()):
-            task.cancel()
-        for task in list(self._asset_tasks.values()):
-            with contextlib.suppress(asyncio.CancelledError):
-                await task
-        self._asset_tasks.clear()
+    async def _drain_submissions(self, slot: AccountSlot) -> None:
+        admission = slot.admission
+        while slot.queue:
+            if admission is not None:
+                await admission.acquire()
+            async with self._lock:
+                if not slot.queue:
+                    if admission is not None:
+                        admission.refund()
+                    return
+                task_id, request = slot.queue.popitem(last=False)
+                self._refresh_queue_positions(slot)
+            self._record_trace(task_id, "admitted", account=slot.name)
+            submit = asyncio.create_task(self._submit_queued(slot, request), name=f"jimeng-submit-{task_id}")
+            self._submit_tasks.add(submit)
+            submit.add_done_callback(self._submit_tasks.discard)
 
-        self._contexts.clear()
-        await self._client.aclose()
+    async def _submit_queued(self, slot: AccountSlot, request: _PendingSubmission) -> None:
+        try:
+            await self._submit_admitted(slot, request)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - 仅记录日志
+            logger.exception("提交本地排队任务 %s 时出现未捕获异常：%s", request.task_id, exc)
+            if slot.admission is not None:
+                slot.admission.release()
 
-    def get_trace(self, task_id: str) -> List[Dict[str, Any]]:
-        return list(self._traces.get(task_id, ()))
+    def _claim(self, slot: AccountSlot, task_id: str) -> None:
+        """登记任务占用账号的生成名额，任务进入终态时由 ``_commit_task`` 归还。"""
+
+        if task_id not in self._owners:
+            self._owners[task_id] = slot.name
+            slot.in_flight += 1
 
     async def _store_task(
         self,
@@ -222,26 +749,38 @@ class JimengService:
         lock_guarded: bool = True,
     ) -> GenerationTaskInfo:
         async def _store() -> GenerationTaskInfo:
-            now = int(time.time() * 1000)
             metadata_copy = dict(metadata)
             if submission.queue_message:
                 metadata_copy["queueMessage"] = submission.queue_message
             if submission.queue_info:
                 metadata_copy["queueInfo"] = submission.queue_info
-            update: Dict[str, Any] = {
-                "task_id": task_id,
-                "prompt": prompt,
-                "status": submission.status,
-                "metadata": metadata_copy,
-                "result_uris": submission.result_urls,
-                "error_code": submission.error_code,
-                "error_message": submission.error_message,
-                "created_at": created_ms,
-                "updated_at": now,
-            }
-            task = GenerationTaskInfo(**update)
-            self._tasks[task_id] = task
-            return task
+            if submission.preview_urls:
+                metadata_copy["previewUris"] = submission.preview_urls
+            record = self._registry.get(task_id)
+            if record is not None:
+                # 本地排队的占位任务：原地替换为上游提交结果，保留任务 ID 与创建时间。
+                record.apply_result(
+                    submission.status,
+                    submission.result_urls,
+                    submission.error_code,
+                    submission.error_message,
+                )
+                record.update(metadata=metadata_copy)
+                self._commit_task(record)
+                return record.to_model()
+            record = TaskRecord(
+                task_id=task_id,
+                prompt=prompt,
+                status=self._status_value(submission.status),
+                metadata=metadata_copy,
+                result_uris=list(submission.result_urls),
+                error_code=submission.error_code,
+                error_message=submission.error_message,
+                created_at=created_ms,
+                updated_at=created_ms,
+            )
+            self._commit_task(record)
+            return record.to_model()
 
         if lock_guarded:
             async with self._lock:
@@ -251,97 +790,163 @@ class JimengService:
         self._schedule_asset_persist(task)
         return task
 
-    async def _apply_submission(self, task_id: str, submission: JimengSubmissionResult) -> GenerationTaskInfo | None:
+    async def _apply_submission(self, task_id: str, submission: JimengSubmissionResult) -> None:
         async with self._lock:
-            task = self._tasks.get(task_id)
-            if task is None:
-                return None
-            metadata = dict(task.metadata)
+            record = self._registry.get(task_id)
+            if record is None:
+                return
+            record.apply_result(
+                submission.status,
+                submission.result_urls or record.result_uris,
+                submission.error_code,
+                submission.error_message,
+            )
             if submission.queue_message:
-                metadata["queueMessage"] = submission.queue_message
+                record.set_metadata("queueMessage", submission.queue_message)
             if submission.queue_info:
-                metadata["queueInfo"] = submission.queue_info
-            update: Dict[str, Any] = {
-                "metadata": metadata,
-                "status": submission.status,
-                "updated_at": int(time.time() * 1000),
-                "result_uris": submission.result_urls or task.result_uris,
-                "error_code": submission.error_code,
-                "error_message": submission.error_message,
-            }
-            updated = task.model_copy(update=update)
-            self._tasks[task_id] = updated
-            self._schedule_asset_persist(updated)
-            return updated
+                record.set_metadata("queueInfo", submission.queue_info)
+            if submission.preview_urls:
+                record.set_metadata("previewUris", submission.preview_urls)
+            if not record.dirty:
+                # 轮询结果没有变化时不提交，避免无效推送、日志写入与长轮询提前返回。
+                return
+            self._commit_task(record)
+            if record.status == TaskStatus.SUCCEEDED.value:
+                self._schedule_asset_persist(record.to_model())
+
+    async def _poll_batch(self, account: str, task_ids: List[str]) -> None:
+        """处理调度器交付的一批到期任务：一次上游查询，再把结果分发回各任务。"""
 
-    async def _poll_task(self, task_id: str) -> None:
+        pending: Dict[str, str] = {}
+        for task_id in task_ids:
+            context = self._contexts.get(task_id)
+            if context is not None:
+                pending[context.history_id] = task_id
+        if not pending:
+            return
+
+        # history ID 只能由提交它的账号查询，账号已从配置中移除时无法继续轮询。
+        slot = self._pool.get(account)
         try:
-            while True:
-                await asyncio.sleep(self._poll_interval)
-                context = self._contexts.get(task_id)
-                if context is None:
-                    return
-                elapsed = time.monotonic() - context.started_monotonic
-                if elapsed > self._poll_timeout:
-                    self._record_trace(task_id, "timeout", elapsed=elapsed)
-                    await self._apply_submission(
-                        task_id,
-                        JimengSubmissionResult(
-                            history_id=context.history_id,
-                            status=TaskStatus.FAILED,
-                            result_urls=[],
-                            error_code="timeout",
-                            error_message="轮询超时，已终止任务",
-                        ),
-                    )
-                    return
-                try:
-                    submission = await self._client.fetch_history(context.history_id)
-                except JimengApiError as exc:
-                    logger.warning("轮询任务 %s 失败：%s", task_id, exc)
-                    submission = JimengSubmissionResult(
-                        history_id=context.history_id,
+            if slot is None:
+                raise JimengApiError(f"账号 {account} 不在账号池中，无法查询任务", code="account_unavailable")
+            try:
+                results = await slot.client.fetch_histories(list(pending))
+            except (JimengApiError, asyncio.CancelledError):
+                raise
+            except Exception as exc:
+                # 解析异常等意外错误按暂时性错误处理，任务仍受轮询超时约束，不会无限重试。
+                raise JimengApiError(f"批量查询出现意外错误：{exc}", code="poll_error", retryable=True) from exc
+        except JimengApiError as exc:
+            logger.warning("账号 %s 批量轮询 %d 个任务失败：%s", account, len(pending), exc)
+            if slot is not None:
+                self._pool.record(slot, False)
+            if exc.retryable:
+                await self._defer_polls(account, pending, exc)
+                return
+            results = {
+                history_id: JimengSubmissionResult(
+                    history_id=history_id,
+                    status=TaskStatus.FAILED,
+                    result_urls=[],
+                    error_code=exc.code or "poll_error",
+                    error_message=str(exc),
+                    raw=exc.payload,
+                )
+                for history_id in pending
+            }
+        else:
+            self._pool.record(slot, True)
+
+        for history_id, task_id in pending.items():
+            # 查询期间任务可能已被取消，此时丢弃结果，避免覆盖终态。
+            if task_id not in self._contexts:
+                continue
+            context = self._contexts[task_id]
+            submission = results.get(history_id) or JimengSubmissionResult(
+                history_id=history_id,
+                status=TaskStatus.RUNNING,
+                result_urls=[],
+            )
+            elapsed = time.monotonic() - context.started_monotonic
+            if submission.status not in {TaskStatus.SUCCEEDED, TaskStatus.FAILED} and elapsed > self._poll_timeout:
+                # 超时前仍完成最后一次查询，避免把已在上游完成的任务误判为超时。
+                self._record_trace(task_id, "timeout", elapsed=elapsed)
+                submission = JimengSubmissionResult(
+                    history_id=history_id,
+                    status=TaskStatus.FAILED,
+                    result_urls=[],
+                    error_code="timeout",
+                    error_message="轮询超时，已终止任务",
+                )
+            await self._apply_submission(task_id, submission)
+            self._record_trace(task_id, "poll", state=self._status_value(submission.status), batch=len(pending))
+            if submission.status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED}:
+                event = "completed" if submission.status == TaskStatus.SUCCEEDED else "failed"
+                self._record_trace(task_id, event, error=submission.error_code)
+                if submission.status == TaskStatus.SUCCEEDED and context.running_since is not None:
+                    self._poll_policy.observe(context.latency_key, time.monotonic() - context.running_since)
+                self._contexts.pop(task_id, None)
+                continue
+            delay = self._next_poll_delay(context, submission)
+            self._scheduler.schedule(task_id, account, delay)
+
+    async def _defer_polls(self, account: str, pending: Dict[str, str], exc: JimengApiError) -> None:
+        """暂时性错误（网络、5xx、熔断、限流）不判定任务失败，只推迟下一次查询；已超时的任务仍按超时处理。"""
+
+        for history_id, task_id in pending.items():
+            context = self._contexts.get(task_id)
+            if context is None:
+                continue
+            now = time.monotonic()
+            elapsed = now - context.started_monotonic
+            if elapsed > self._poll_timeout:
+                self._record_trace(task_id, "timeout", elapsed=elapsed, error=exc.code)
+                await self._apply_submission(
+                    task_id,
+                    JimengSubmissionResult(
+                        history_id=history_id,
                         status=TaskStatus.FAILED,
                         result_urls=[],
-                        error_code=exc.code or "poll_error",
-                        error_message=str(exc),
-                        raw=exc.payload,
-                    )
-                updated = await self._apply_submission(task_id, submission)
-                self._record_trace(task_id, "poll", state=self._status_value(submission.status))
-                if submission.status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED}:
-                    event = "completed" if submission.status == TaskStatus.SUCCEEDED else "failed"
-                    self._record_trace(task_id, event, error=submission.error_code)
-                    return
-        except asyncio.CancelledError:
-            self._record_trace(task_id, "poll_cancelled")
-            raise
-        finally:
-            self._contexts.pop(task_id, None)
-            self._pollers.pop(task_id, None)
+                        error_code="timeout",
+                        error_message=f"轮询超时，最后一次查询失败：{exc}",
+                    ),
+                )
+                self._contexts.pop(task_id, None)
+                continue
+            self._record_trace(task_id, "poll_deferred", error=exc.code)
+            delay = self._poll_policy.next_delay(
+                latency_key=context.latency_key,
+                running_for=None if context.running_since is None else now - context.running_since,
+                budget=self._poll_timeout - elapsed,
+            )
+            self._scheduler.schedule(task_id, account, delay)
 
-    def _on_poller_done(self, task: asyncio.Task[Any]) -> None:
-        try:
-            task.result()
-        except asyncio.CancelledError:
-            pass
-        except Exception as exc:  # pragma: no cover - 仅记录日志
-            logger.exception("轮询任务抛出未捕获异常：%s", exc)
+    def _next_poll_delay(self, context: TaskContext, submission: JimengSubmissionResult) -> float:
+        now = time.monotonic()
+        queued = submission.status == TaskStatus.QUEUED and bool(submission.queue_info)
+        if not queued and context.running_since is None:
+            context.running_since = now
+        return self._poll_policy.next_delay(
+            queue_info=submission.queue_info if queued else None,
+            latency_key=context.latency_key,
+            running_for=None if context.running_since is None else now - context.running_since,
+            budget=self._poll_timeout - (now - context.started_monotonic),
+        )
 
     def _schedule_asset_persist(self, task: GenerationTaskInfo) -> None:
-        if self._project_storage is None:
-            return
         if self._status_value(task.status) != TaskStatus.SUCCEEDED.value:
             return
-        project_id = str(task.metadata.get("projectId") or "").strip()
-        if not project_id:
+        project_id = str(task.metadata.get("projectId") or "").strip() if self._project_storage is not None else ""
+        cache_key = None if task.metadata.get("cacheHit") else self._result_cache_key(task.prompt, task.metadata)
+        if not project_id and cache_key is None:
             return
         if not task.result_uris:
             return
         if task.task_id in self._asset_tasks:
             return
         asset_task = asyncio.create_task(
-            self._download_and_store_assets(task, project_id),
+            self._persist_results(task, project_id, cache_key),
             name=f"jimeng-assets-{task.task_id}",
         )
         self._asset_tasks[task.task_id] = asset_task
@@ -353,73 +958,198 @@ class JimengService:
 
         asset_task.add_done_callback(_cleanup)
 
-    async def _download_and_store_assets(self, task: GenerationTaskInfo, project_id: str) -> None:
+    async def _persist_results(self, task: GenerationTaskInfo, project_id: str, cache_key: str | None) -> None:
+        """成功任务的结果落地：写入所属项目，并在携带种子时存入结果缓存。"""
+
+        local: List[Path] | None = None
+        if project_id:
+            local = await self._download_and_store_assets(task, project_id)
+        if cache_key is not None:
+            await self._fill_result_cache(task, cache_key, local)
+
+    async def _fill_result_cache(self, task: GenerationTaskInfo, key: str, local: List[Path] | None) -> None:
+        cache = self._result_cache
+        if cache is None:
+            return
+        staging: Path | None = None
+        if local is None:
+            # 不属于任何项目的任务：把结果直接下载到缓存目录下的临时目录。
+            owner = self._pool.get(str(task.metadata.get("account"))) or self._pool.default
+            staging = cache.root / ".incoming" / task.task_id
+            targets = [(url, staging / f"{index + 1}.png") for index, url in enumerate(task.result_uris)]
+            outcomes = await self._downloader.download_all(owner.client, targets)
+            for outcome in outcomes:
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+            if all(isinstance(outcome, DownloadResult) for outcome in outcomes):
+                local = [outcome.path for outcome in outcomes if isinstance(outcome, DownloadResult)]
+        try:
+            if local:
+                await asyncio.to_thread(cache.put, key, local)
+                self._record_trace(task.task_id, "result_cached", images=len(local))
+            else:
+                logger.warning("任务 %s 的结果未能完整下载，跳过结果缓存", task.task_id)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("写入结果缓存失败：%s", exc)
+        finally:
+            if staging is not None:
+                await asyncio.to_thread(shutil.rmtree, staging, True)
+
+    async def _download_and_store_assets(self, task: GenerationTaskInfo, project_id: str) -> List[Path] | None:
+        """下载结果并写入项目，全部原图都已落地时按顺序返回本地路径。
+
+        上游提供 1080 预览图时分两阶段进行：先下载预览图写入项目（资源标记 ``preview``），
+        画布可以立即显示；再以低优先级下载原图，完成后原地替换对应资源。
+        """
+
         storage = self._project_storage
         if storage is None:
-            return
+            return None
         try:
-            payload = storage.load_project(project_id)
+            images_dir = await storage.asset_dir(project_id, "images")
         except FileNotFoundError:
             logger.warning("项目 %s 不存在，无法保存生成结果", project_id)
-            return
+            return None
+        started = time.perf_counter()
+        full_targets = [images_dir / f"{task.task_id}-{index + 1}.png" for index in range(len(task.result_uris))]
+        previews = [str(url) for url in task.metadata.get("previewUris") or []]
+        staged = len(previews) == len(task.result_uris) and previews != list(task.result_uris)
+
+        preview_downloads: Dict[int, DownloadResult] = {}
+        if staged:
+            preview_targets = [images_dir / f"{task.task_id}-{index + 1}.preview.png" for index in range(len(previews))]
+            preview_downloads = await self._fetch_assets(task, project_id, previews, preview_targets, variant="preview")
+            if not await self._store_assets(task, project_id, preview_downloads, {}, stage="preview", started=started):
+                return None
+
+        downloads = await self._fetch_assets(
+            task,
+            project_id,
+            list(task.result_uris),
+            full_targets,
+            variant="full",
+            background=staged,
+        )
+        if not await self._store_assets(task, project_id, downloads, preview_downloads, stage="full", started=started):
+            return None
+        if len(downloads) != len(task.result_uris):
+            return None
+        return [downloads[index].path for index in range(len(task.result_uris))]
+
+    async def _fetch_assets(
+        self,
+        task: GenerationTaskInfo,
+        project_id: str,
+        urls: List[str],
+        targets: List[Path],
+        *,
+        variant: str,
+        background: bool = False,
+    ) -> Dict[int, DownloadResult]:
+        """下载（或从结果缓存复制）一组图片并纳入去重存储，返回成功的下标与结果。"""
+
+        owner = self._pool.get(str(task.metadata.get("account"))) or self._pool.default
+        remote = [(index, url, targets[index]) for index, url in enumerate(urls) if url.startswith("http")]
+        outcomes: List[DownloadResult | BaseException] = await self._downloader.download_all(
+            owner.client,
+            [(url, target) for _, url, target in remote],
+            background=background,
+        )
+        cached = [(index, url, targets[index]) for index, url in enumerate(urls) if url.startswith("file:")]
+        for _, url, target in cached:
+            # 结果缓存命中的任务：从缓存复制到项目目录，之后与下载结果一样纳入去重存储。
+            try:
+                outcomes.append(
+                    await self._downloader.copy_local(url, Path(url2pathname(urlparse(url).path)), target)
+                )
+            except OSError as exc:
+                outcomes.append(exc)
+        remote.extend(cached)
+
+        downloads: Dict[int, DownloadResult] = {}
+        suffix = "-preview" if variant == "preview" else ""
+        for (index, _, target), outcome in zip(remote, outcomes):
+            if isinstance(outcome, DownloadResult):
+                downloads[index] = outcome
+                deduped = False
+                if self._blob_store is not None:
+                    try:
+                        deduped = await asyncio.to_thread(
+                            self._blob_store.adopt,
+                            outcome.path,
+                            outcome.sha256,
+                            project_id=project_id,
+                            asset_id=f"{task.task_id}-{index + 1}{suffix}",
+                            relative_path=(Path("assets") / "images" / target.name).as_posix(),
+                        )
+                    except (OSError, sqlite3.Error) as exc:
+                        logger.warning("资源 %s 纳入去重存储失败，保留独立副本：%s", target.name, exc)
+                self._record_trace(
+                    task.task_id,
+                    "asset_downloaded",
+                    index=index,
+                    variant=variant,
+                    bytes=outcome.size,
+                    durationMs=round(outcome.duration * 1000, 1),
+                    bytesPerSecond=round(outcome.bytes_per_second, 1),
+                    deduped=deduped,
+                )
+            elif isinstance(outcome, JimengApiError):
+                logger.warning("下载任务 %s 结果失败：%s", task.task_id, outcome)
+            elif isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            else:
+                logger.error("下载任务 %s 结果时写入失败：%s", task.task_id, outcome)
+        return downloads
+
+    async def _store_assets(
+        self,
+        task: GenerationTaskInfo,
+        project_id: str,
+        downloads: Dict[int, DownloadResult],
+        previews: Dict[int, DownloadResult],
+        *,
+        stage: str,
+        started: float,
+    ) -> bool:
+        """把已落地的图片写入项目资源与生成记录；``stage="preview"`` 时资源标记为预览图。
 
-        images_dir = storage.root / project_id / "assets" / "images"
-        images_dir.mkdir(parents=True, exist_ok=True)
+        原图阶段中下载失败的资源保留已有的预览图，不退回远程地址。
+        """
 
-        assets_map: Dict[str, AssetPayload] = {asset.id: asset for asset in payload.assets}
-        history_map: Dict[str, GenerationRecord] = {record.id: record for record in payload.history}
+        writes = self._project_writes
+        if writes is None:
+            return False
+
+        entries: List[Tuple[str, str, Dict[str, Any]]] = []
         history_result_uris: List[str] = []
         local_uris: List[str] = []
-        now_ms = int(time.time() * 1000)
-
         for index, url in enumerate(task.result_uris):
-            asset_id = f"{task.task_id}-{index + 1}"
-            file_name = f"{asset_id}.png"
-            relative_path = Path("assets") / "images" / file_name
-            target_path = images_dir / file_name
-            downloaded = False
+            download = downloads.get(index)
+            preview = previews.get(index)
+            is_preview = stage == "preview" and download is not None
+            if download is None and preview is not None:
+                download, preview, is_preview = preview, None, True
             relative_uri = url
-
-            if url.startswith("http"):
-                try:
-                    content = await self._client.fetch_resource(url)
-                except JimengApiError as exc:
-                    logger.warning("下载任务 %s 结果失败：%s", task.task_id, exc)
-                else:
-                    target_path.write_bytes(content)
-                    relative_uri = str(relative_path)
-                    downloaded = True
-                    local_uris.append(relative_uri)
+            if download is not None:
+                relative_uri = str(Path("assets") / "images" / download.path.name)
+                local_uris.append(relative_uri)
             history_result_uris.append(relative_uri)
 
-            metadata = {
+            metadata: Dict[str, Any] = {
                 "taskId": task.task_id,
                 "index": index,
                 "source": "jimeng",
                 "sourceUri": url,
-                "downloaded": downloaded,
+                "downloaded": download is not None,
+                "preview": is_preview,
             }
-
-            if asset_id in assets_map:
-                existing = assets_map[asset_id]
-                asset = existing.model_copy(
-                    update={
-                        "uri": relative_uri,
-                        "metadata": metadata,
-                        "updated_at": now_ms,
-                    }
-                )
-            else:
-                asset = AssetPayload(
-                    id=asset_id,
-                    project_id=project_id,
-                    kind="image",
-                    uri=relative_uri,
-                    metadata=metadata,
-                    created_at=now_ms,
-                    updated_at=now_ms,
-                )
-            assets_map[asset_id] = asset
+            if download is not None:
+                metadata["bytes"] = download.size
+                metadata["sha256"] = download.sha256
+            if preview is not None:
+                metadata["previewUri"] = str(Path("assets") / "images" / preview.path.name)
+            entries.append((f"{task.task_id}-{index + 1}", relative_uri, metadata))
 
         history_record = GenerationRecord(
             id=task.task_id,
@@ -431,41 +1161,158 @@ class JimengService:
             created_at=task.created_at,
             completed_at=task.updated_at,
         )
-        history_map[task.task_id] = history_record
 
-        updated_payload = ProjectPayload(
-            manifest=payload.manifest,
-            canvas=payload.canvas,
-            assets=list(assets_map.values()),
-            history=list(history_map.values()),
-        )
-        storage.save_project(updated_payload)
+        def merge(payload: ProjectPayload) -> ProjectPayload:
+            # 在写队列中针对最新的项目内容执行，同一批次的其他任务结果已合并在 payload 中。
+            now_ms = int(time.time() * 1000)
+            assets_map: Dict[str, AssetPayload] = {asset.id: asset for asset in payload.assets}
+            for asset_id, relative_uri, metadata in entries:
+                existing = assets_map.get(asset_id)
+                if existing is not None:
+                    assets_map[asset_id] = existing.model_copy(
+                        update={"uri": relative_uri, "metadata": metadata, "updated_at": now_ms}
+                    )
+                else:
+                    assets_map[asset_id] = AssetPayload(
+                        id=asset_id,
+                        project_id=project_id,
+                        kind="image",
+                        uri=relative_uri,
+                        metadata=metadata,
+                        created_at=now_ms,
+                        updated_at=now_ms,
+                    )
+            history_map: Dict[str, GenerationRecord] = {record.id: record for record in payload.history}
+            history_map[task.task_id] = history_record
+            return ProjectPayload(
+                manifest=payload.manifest,
+                canvas=payload.canvas,
+                assets=list(assets_map.values()),
+                history=list(history_map.values()),
+            )
+
+        try:
+            saved = await writes.submit(project_id, merge)
+        except FileNotFoundError:
+            logger.warning("项目 %s 不存在，无法保存生成结果", project_id)
+            return False
 
         if local_uris:
             async with self._lock:
-                current = self._tasks.get(task.task_id)
-                if current is not None:
-                    metadata = dict(current.metadata)
-                    metadata["localUris"] = local_uris
-                    updated_task = current.model_copy(
-                        update={
-                            "metadata": metadata,
-                            "result_uris": history_result_uris,
-                            "updated_at": int(time.time() * 1000),
-                        }
-                    )
-                    self._tasks[task.task_id] = updated_task
-                    task = updated_task
-        self._record_trace(task.task_id, "assets_persisted", local=len(local_uris))
+                record = self._registry.get(task.task_id)
+                if record is not None:
+                    record.set_metadata("localUris", local_uris)
+                    record.set_metadata("assetStage", stage)
+                    record.update(result_uris=history_result_uris)
+                    self._commit_task(record)
+        self._record_trace(
+            task.task_id,
+            "assets_persisted",
+            stage=stage,
+            local=len(local_uris),
+            written=saved.written,
+            elapsedMs=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return True
+
+    def _commit_task(self, record: TaskRecord) -> None:
+        """提交记录的原地修改：刷新 ``updated_at``、广播变更并写入日志，调用方需持有 ``_lock``。
+
+        事件与日志共用同一份 ``to_payload`` 字典，提交路径上不构建 pydantic 模型。
+        """
+
+        record.touch(max(int(time.time() * 1000), record.updated_at))
+        record.dirty.clear()
+        owner = self._owners.pop(record.task_id, None) if record.terminal else None
+        if owner is not None:
+            slot = self._pool.get(owner)
+            if slot is not None:
+                slot.in_flight = max(0, slot.in_flight - 1)
+                if slot.admission is not None:
+                    slot.admission.release()
+        payload = record.to_payload()
+        evicted = self._registry.put(record)
+        evicted.extend(self._registry.evict_expired())
+        self._events.publish(payload)
+        signal = self._task_signals.pop(record.task_id, None)
+        if signal is not None:
+            signal.set()
+        if self._journal is not None:
+            self._journal.append(payload, self._journal_context(record.task_id))
+        self._archive_evicted(evicted)
+
+    def _archive_evicted(self, evicted: List[ArchivedTask]) -> None:
+        """把被淘汰的任务移入归档，并从任务日志中删除，避免重启后重新加载。"""
+
+        if evicted and self._journal is not None:
+            for task, _ in evicted:
+                self._journal.drop(task.task_id)
+        if self._archive is None:
+            return
+        if evicted:
+            self._archive.stage(evicted)
+        if self._archive.pending_count and not self._archive_flushes:
+            flush = asyncio.create_task(asyncio.to_thread(self._archive.flush), name="jimeng-archive-flush")
+            self._archive_flushes.add(flush)
+            flush.add_done_callback(self._on_archive_flushed)
+
+    def _on_archive_flushed(self, flush: asyncio.Task[Any]) -> None:
+        self._archive_flushes.discard(flush)
+        if flush.cancelled():
+            return
+        if flush.exception() is not None:
+            logger.error("写入任务归档失败：%s", flush.exception())
+            return
+        # 刷盘期间可能又有新的淘汰任务进入待写区。
+        self._archive_evicted([])
+
+    async def _load_archived(self, task_id: str) -> GenerationTaskInfo | None:
+        if self._archive is None:
+            return None
+        archived = await asyncio.to_thread(self._archive.load, task_id)
+        return archived[0] if archived else None
+
+    def _journal_context(self, task_id: str) -> Dict[str, Any] | None:
+        context = self._contexts.get(task_id)
+        if context is None:
+            return None
+        return {
+            "historyId": context.history_id,
+            "createdMs": context.created_ms,
+            "account": context.account,
+            "metadata": context.metadata,
+        }
+
+    def _context_from_journal(
+        self,
+        task: GenerationTaskInfo,
+        saved: Dict[str, Any] | None,
+        now_ms: int,
+    ) -> TaskContext | None:
+        saved = saved or {}
+        metadata = dict(saved.get("metadata") or task.metadata)
+        history_id = str(saved.get("historyId") or metadata.get("historyId") or "")
+        if not history_id:
+            return None
+        created_ms = int(saved.get("createdMs") or task.created_at)
+        # 停机期间的时长计入轮询超时，但至少保留一次查询机会（见 _poll_batch）。
+        elapsed = max(0.0, (now_ms - created_ms) / 1000)
+        return TaskContext(
+            history_id=history_id,
+            created_ms=created_ms,
+            started_monotonic=time.monotonic() - elapsed,
+            account=str(saved.get("account") or metadata.get("account") or self.account_label),
+            metadata=metadata,
+        )
 
     def _record_trace(self, task_id: str, event: str, **payload: Any) -> None:
-        trace = self._traces.setdefault(task_id, [])
-        trace.append(
+        self._registry.record_trace(
+            task_id,
             {
                 "event": event,
                 "timestamp": int(time.time() * 1000),
                 **payload,
-            }
+            },
         )
 
     @staticmethod
@@ -9,20 +9,45 @@ import secrets
 import time
 import uuid
 import hashlib
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 import httpx
+from tenacity import RetryCallState
 
 from ..models.tasks import TaskStatus
+from . import json_codec
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from .transport import TransportConfig, build_api_client, build_cdn_client, parse_proxies
+
+if TYPE_CHECKING:  # pragma: no cover
+    from httpx._types import ProxiesTypes
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 BASE_URL = "https://jimeng.jianying.com"
 AID = "513695"
 APP_VERSION = "5.8.0"
 APP_SDK_VERSION = "48.0.0"
-DEFAULT_TIMEOUT = httpx.Timeout(connect=10.0, read=30.0, write=30.0, pool=10.0)
 
 MODEL_REQ_KEYS: Dict[str, str] = {
     "4.0": "high_aes_general_v40",
@@ -46,13 +71,68 @@ MODEL_ALIASES: Dict[str, str] = {
 }
 
 
+_MS_TOKEN_LENGTH = 107
+_A_BOGUS_LENGTH = 32
+_TOKEN_ALPHABET = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+_TOKEN_LIMIT = 256 - 256 % len(_TOKEN_ALPHABET)
+_TOKEN_TABLE = bytes(_TOKEN_ALPHABET[value % len(_TOKEN_ALPHABET)] for value in range(256))
+_TOKEN_REJECT = bytes(range(_TOKEN_LIMIT, 256))
+
+# 签名 API 请求的固定请求头；cookie、device-time、sign 为占位，按请求填入，保持原有的头部顺序。
+_API_HEADER_TEMPLATE: Dict[str, str] = {
+    "accept": "application/json, text/plain, */*",
+    "accept-language": "zh-CN,zh;q=0.9",
+    "app-sdk-version": APP_SDK_VERSION,
+    "appid": AID,
+    "appvr": APP_VERSION,
+    "content-type": "application/json",
+    "cookie": "",
+    "device-time": "",
+    "lan": "zh-Hans",
+    "loc": "cn",
+    "origin": "https://jimeng.jianying.com",
+    "pf": "7",
+    "priority": "u=1, i",
+    "referer": "https://jimeng.jianying.com/ai-tool/generate",
+    "sec-ch-ua": '"Google Chrome";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-origin",
+    "sign": "",
+    "sign-ver": "1",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+}
+
+_DEFAULT_MEMO_SIZE = 2048
+_STATUS_DONE = 50
+_STATUS_FAILED = frozenset({60, 70})
+_ERROR_CODE_KEYS = ("err_code", "task_err_code", "error_code")
+_ERROR_MESSAGE_KEYS = ("err_msg", "task_err_msg", "status_msg", "error_msg")
+
+_RESOURCE_HEADERS = {
+    "referer": "https://jimeng.jianying.com/ai-tool/generate",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+}
+
+
 class JimengApiError(RuntimeError):
     """封装即梦 API 调用中返回的错误。"""
 
-    def __init__(self, message: str, *, code: str | None = None, payload: Dict[str, Any] | None = None) -> None:
+    def __init__(
+        self,
+        message: str,
+        *,
+        code: str | None = None,
+        payload: Dict[str, Any] | None = None,
+        retryable: bool = False,
+    ) -> None:
         super().__init__(message)
         self.code = code
         self.payload = payload or {}
+        # 网络异常、5xx/429 与熔断拒绝属于暂时性错误，调用方可稍后重试而不是直接判定失败。
+        self.retryable = retryable
 
 
 @dataclass(slots=True)
@@ -67,10 +147,16 @@ class JimengSubmissionResult:
     error_code: Optional[str] = None
     error_message: Optional[str] = None
     raw: Optional[Dict[str, Any]] = None
+    # 与 ``result_urls`` 一一对应的 1080 预览图地址，上游未提供时为空。
+    preview_urls: List[str] = field(default_factory=list)
 
 
 class JimengTokenManager:
-    """负责生成即梦 API 调用所需的动态签名与 Cookie。"""
+    """负责生成即梦 API 调用所需的动态签名与 Cookie。
+
+    签名与 Cookie 只依赖秒级时间戳（以及接口路径），同一秒内的请求直接复用缓存结果；
+    msToken 与 a_bogus 由一次 ``secrets.token_bytes`` 批量生成。
+    """
 
     def __init__(self, *, sessionid: str, account_name: str | None = None) -> None:
         token = (sessionid or "").strip()
@@ -78,9 +164,11 @@ class JimengTokenManager:
             raise ValueError("即梦 sessionid 不能为空")
         self._sessionid = token
         self._account_name = account_name or "default"
-        self._random = secrets.SystemRandom()
         self._web_id = self._generate_web_id()
         self._user_id = self._generate_web_id()
+        self._cookie_cache: tuple[str, str] = ("", "")
+        self._sign_timestamp = ""
+        self._sign_cache: Dict[str, str] = {}
 
     @property
     def account_label(self) -> str:
@@ -91,18 +179,31 @@ class JimengTokenManager:
 
     def get_token(self, api_path: str) -> Dict[str, str]:
         timestamp = str(int(time.time()))
-        ms_token = self._generate_random_string(107)
-        sign = self._generate_sign(api_path, timestamp)
-        a_bogus = self._generate_random_string(32)
-        cookie = self._generate_cookie(timestamp)
+        random_part = _random_token(_MS_TOKEN_LENGTH + _A_BOGUS_LENGTH)
         return {
-            "cookie": cookie,
-            "msToken": ms_token,
-            "sign": sign,
-            "a_bogus": a_bogus,
+            "cookie": self._cookie(timestamp),
+            "msToken": random_part[:_MS_TOKEN_LENGTH],
+            "sign": self._sign(api_path, timestamp),
+            "a_bogus": random_part[_MS_TOKEN_LENGTH:],
             "device_time": timestamp,
         }
 
+    def _sign(self, api_path: str, timestamp: str) -> str:
+        if timestamp != self._sign_timestamp:
+            self._sign_timestamp = timestamp
+            self._sign_cache = {}
+        sign = self._sign_cache.get(api_path)
+        if sign is None:
+            sign = self._sign_cache[api_path] = self._generate_sign(api_path, timestamp)
+        return sign
+
+    def _cookie(self, timestamp: str) -> str:
+        cached_timestamp, cookie = self._cookie_cache
+        if cached_timestamp != timestamp:
+            cookie = self._generate_cookie(timestamp)
+            self._cookie_cache = (timestamp, cookie)
+        return cookie
+
     def _generate_sign(self, api_path: str, timestamp: str) -> str:
         suffix = api_path[-7:] if api_path else "/mweb/v1/aigc_draft/generate"[-7:]
         sign_str = f"9e2c|{suffix}|7|{APP_VERSION}|{timestamp}||11ac"
@@ -132,11 +233,190 @@ class JimengTokenManager:
         return "; ".join(parts)
 
     def _generate_web_id(self) -> str:
-        return "".join(self._random.choice("0123456789") for _ in range(19))
+        return f"{secrets.randbelow(10**19):019d}"
+
+
+def _random_token(length: int) -> str:
+    """生成由大小写字母与数字组成的随机串。
+
+    一次取出足量随机字节，丢弃 >= 248 的字节后按 62 取模映射到字母表，避免取模偏差；
+    被丢弃的字节不足时再补取。
+    """
+
+    result = b""
+    while len(result) < length:
+        need = length - len(result)
+        result += secrets.token_bytes(need + need // 16 + 8).translate(_TOKEN_TABLE, _TOKEN_REJECT)
+    return result[:length].decode("ascii")
+
+
+@dataclass(slots=True)
+class _HistoryMemo:
+    """同一历史记录在多次排队轮询之间很少变化的解析结果。"""
+
+    queue_key: Tuple[Any, ...] | None = None
+    queue_message: str | None = None
+
+
+class JimengHistoryParser:
+    """把单条历史记录转换为 ``JimengSubmissionResult``。
+
+    - 只有上游状态为 50（生成完成）时才解析 ``draft_content`` 并遍历 ``resources``/``item_list`` 提取结果图片，
+      排队与生成中的轮询不做这部分工作；
+    - 排队信息未变化时复用上一次格式化的排队提示（按 history_id 缓存）；
+    - 结果不保留原始响应，任务进入终态后释放对应缓存。
+    """
+
+    def __init__(self, *, memo_size: int = _DEFAULT_MEMO_SIZE) -> None:
+        self._memo: "OrderedDict[str, _HistoryMemo]" = OrderedDict()
+        self._memo_size = max(1, memo_size)
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def parse(self, history_id: str, history: Dict[str, Any]) -> JimengSubmissionResult:
+        memo = self._memo_for(history_id)
+        status_code = history.get("status")
+        queue_info = history.get("queue_info")
+        queue_message = self._queue_message(memo, queue_info) if queue_info else None
+        error_code = _first_value(history, _ERROR_CODE_KEYS)
+        result_urls, preview_urls = self._extract_images(history) if status_code == _STATUS_DONE else ([], [])
+
+        if status_code == _STATUS_DONE and result_urls:
+            status = TaskStatus.SUCCEEDED
+        elif error_code or status_code in _STATUS_FAILED:
+            status = TaskStatus.FAILED
+        elif queue_info:
+            status = TaskStatus.QUEUED
+        else:
+            status = TaskStatus.RUNNING
+
+        if status in (TaskStatus.SUCCEEDED, TaskStatus.FAILED):
+            self._memo.pop(history_id, None)
+        return JimengSubmissionResult(
+            history_id=history_id,
+            status=status,
+            result_urls=result_urls,
+            queue_message=queue_message,
+            queue_info=queue_info,
+            error_code=error_code,
+            error_message=_first_message(history),
+            preview_urls=preview_urls,
+        )
 
-    def _generate_random_string(self, length: int) -> str:
-        alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-        return "".join(self._random.choice(alphabet) for _ in range(length))
+    def forget(self, history_id: str) -> None:
+        self._memo.pop(history_id, None)
+
+    def _memo_for(self, history_id: str) -> _HistoryMemo:
+        memo = self._memo.get(history_id)
+        if memo is None:
+            memo = self._memo[history_id] = _HistoryMemo()
+            if len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        else:
+            self._memo.move_to_end(history_id)
+        return memo
+
+    def _queue_message(self, memo: _HistoryMemo, queue_info: Dict[str, Any]) -> str:
+        threshold = queue_info.get("priority_queue_display_threshold") or {}
+        key = (
+            queue_info.get("queue_status", 0),
+            queue_info.get("queue_idx", 0),
+            queue_info.get("queue_length", 0),
+            threshold.get("waiting_time_threshold", 0) if isinstance(threshold, dict) else 0,
+        )
+        if memo.queue_key != key or memo.queue_message is None:
+            memo.queue_key = key
+            memo.queue_message = _format_queue_message(queue_info)
+        return memo.queue_message
+
+    def _extract_images(self, history: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """返回原图地址与对应的 1080 预览图地址（``cover_url``）；缺少预览图时两者相同。"""
+
+        result: Dict[str, str] = {}
+        uploaded = _extract_uploaded_uris(history)
+        for resource in history.get("resources") or []:
+            if resource.get("type") != "image":
+                continue
+            info = resource.get("image_info") or {}
+            url = info.get("image_url")
+            if url and (not uploaded or resource.get("key") not in uploaded):
+                result.setdefault(url, info.get("cover_url") or url)
+        if result:
+            return list(result), list(result.values())
+        for item in history.get("item_list") or []:
+            image = item.get("image") or {}
+            cover = (item.get("common_attr") or {}).get("cover_url")
+            large_images = image.get("large_images") or []
+            for large_image in large_images:
+                url = large_image.get("image_url")
+                if url:
+                    result.setdefault(url, cover or url)
+            if not large_images:
+                url = image.get("image_url")
+                if url:
+                    result.setdefault(url, cover or url)
+        # 去重保持顺序
+        return list(result), list(result.values())
+
+
+def _format_queue_message(queue_info: Dict[str, Any]) -> str:
+    try:
+        queue_idx = queue_info.get("queue_idx", 0)
+        queue_length = queue_info.get("queue_length", 0)
+        status = queue_info.get("queue_status", 0)
+        threshold = queue_info.get("priority_queue_display_threshold", {})
+        waiting = int(threshold.get("waiting_time_threshold", 0))
+        minutes, seconds = divmod(waiting, 60)
+        if minutes > 0:
+            time_desc = f"{minutes}分{seconds}秒" if seconds else f"{minutes}分钟"
+        else:
+            time_desc = f"{seconds}秒"
+        if status == 1:
+            if queue_idx and queue_length:
+                return (
+                    "📊 总队列长度：{length}人\n"
+                    "🔄 当前排队位置：第{idx}位\n"
+                    "⏰ 预计等待时间：{time}"
+                ).format(length=queue_length, idx=queue_idx, time=time_desc)
+            return f"🔄 任务已进入队列，预计等待时间：{time_desc}"
+        return "🚀 当前无需排队，正在加速生成..."
+    except Exception:  # pragma: no cover - 容错
+        return "🔄 任务正在排队处理中，请稍候..."
+
+
+def _first_value(history: Dict[str, Any], keys: Tuple[str, ...]) -> str | None:
+    for key in keys:
+        value = history.get(key)
+        if value:
+            return str(value)
+    return None
+
+
+def _first_message(history: Dict[str, Any]) -> str | None:
+    for key in _ERROR_MESSAGE_KEYS:
+        value = history.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _extract_uploaded_uris(history: Dict[str, Any]) -> FrozenSet[str]:
+    draft_content = history.get("draft_content")
+    if not draft_content:
+        return frozenset()
+    try:
+        data = json_codec.loads(draft_content)
+    except json_codec.DECODE_ERRORS:
+        return frozenset()
+    uploaded: set[str] = set()
+    for component in data.get("component_list", []):
+        abilities = component.get("abilities", {})
+        blend_data = abilities.get("blend", {})
+        for ability in blend_data.get("ability_list", []):
+            if ability.get("image_uri_list"):
+                uploaded.update(ability["image_uri_list"])
+    return frozenset(uploaded)
 
 
 class JimengClient:
@@ -147,49 +427,48 @@ class JimengClient:
         *,
         sessionid: str,
         account_name: str | None = None,
-        proxies: Dict[str, str] | str | None = None,
-        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        proxies: ProxiesTypes | None = None,
+        transport: TransportConfig | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
     ) -> None:
         self._token_manager = JimengTokenManager(sessionid=sessionid, account_name=account_name)
-        self._client = httpx.AsyncClient(base_url=BASE_URL, timeout=timeout, proxies=self._normalized_proxies(proxies))
+        self._transport = transport or TransportConfig()
+        proxies = parse_proxies(proxies)
+        self._client = build_api_client(self._transport, base_url=self._transport.base_url or BASE_URL, proxies=proxies)
+        self._cdn_client = build_cdn_client(self._transport, proxies=proxies)
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._breaker = breaker or CircuitBreaker()
+        self._counters = {"requests": 0, "retries": 0, "failures": 0}
+        self._parser = JimengHistoryParser()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "http2": self._transport.http2_enabled, "breaker": self._breaker.stats()}
+
+    async def warmup(self) -> bool:
+        """预先建立到 API 主机的连接（DNS、TCP、TLS），避免启动后第一次提交承担建连耗时。
+
+        只发送一次不带凭据的 ``HEAD /``，失败时仅记录日志，不计入熔断统计。
+        """
+
+        started = time.perf_counter()
+        try:
+            await self._client.head("/")
+        except httpx.HTTPError as exc:
+            logger.info("即梦连接预热失败（%s）：%s", self.account_label, exc)
+            return False
+        logger.info("即梦连接预热完成（%s），耗时 %.0f ms", self.account_label, (time.perf_counter() - started) * 1000)
+        return True
 
     async def aclose(self) -> None:
         await self._client.aclose()
-
-    def _normalized_proxies(self, proxies: Dict[str, str] | str | None) -> Dict[str, str] | str | None:
-        if isinstance(proxies, dict):
-            result = {k: v for k, v in proxies.items() if isinstance(v, str) and v.strip()}
-            return result or None
-        if isinstance(proxies, str) and proxies.strip():
-            return proxies.strip()
-        return None
+        await self._cdn_client.aclose()
 
     def _build_headers(self, api_path: str, token: Dict[str, str], *, include_tokens: bool) -> Dict[str, str]:
-        headers = {
-            "accept": "application/json, text/plain, */*",
-            "accept-language": "zh-CN,zh;q=0.9",
-            "app-sdk-version": APP_SDK_VERSION,
-            "appid": AID,
-            "appvr": APP_VERSION,
-            "content-type": "application/json",
-            "cookie": token["cookie"],
-            "device-time": token["device_time"],
-            "lan": "zh-Hans",
-            "loc": "cn",
-            "origin": "https://jimeng.jianying.com",
-            "pf": "7",
-            "priority": "u=1, i",
-            "referer": "https://jimeng.jianying.com/ai-tool/generate",
-            "sec-ch-ua": '"Google Chrome";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "same-origin",
-            "sign": token["sign"],
-            "sign-ver": "1",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
-        }
+        headers = _API_HEADER_TEMPLATE.copy()
+        headers["cookie"] = token["cookie"]
+        headers["device-time"] = token["device_time"]
+        headers["sign"] = token["sign"]
         if include_tokens:
             headers["msToken"] = token["msToken"]
             headers["a-bogus"] = token["a_bogus"]
@@ -203,50 +482,146 @@ class JimengClient:
         params: Dict[str, Any] | None = None,
         json_payload: Dict[str, Any] | None = None,
         include_query_tokens: bool = False,
+        idempotent: bool = False,
     ) -> Dict[str, Any]:
-        token = self._token_manager.get_token(api_path)
-        headers = self._build_headers(api_path, token, include_tokens=not include_query_tokens)
-        query = dict(params or {})
-        if include_query_tokens:
-            if token.get("msToken"):
-                query["msToken"] = token["msToken"]
-            if token.get("a_bogus"):
-                query["a_bogus"] = token["a_bogus"]
-        url = api_path if api_path.startswith("/") else f"/{api_path}"
-        try:
-            response = await self._client.request(method, url, params=query or None, json=json_payload, headers=headers)
-            response.raise_for_status()
-        except httpx.HTTPStatusError as exc:  # pragma: no cover - 网络异常
-            logger.exception("即梦 API 网络请求失败：%s", exc)
-            raise JimengApiError("即梦 API 请求失败", code=str(exc.response.status_code)) from exc
-        except httpx.HTTPError as exc:  # pragma: no cover - 网络异常
-            logger.exception("即梦 API 网络错误：%s", exc)
-            raise JimengApiError("即梦 API 网络异常") from exc
+        """发送 API 请求；``idempotent`` 为真时对暂时性错误按重试策略重试。
+
+        每次尝试都会重新生成签名与 msToken，避免重试时复用过期的时间戳。
+        """
+
+        async def _attempt() -> Dict[str, Any]:
+            token = self._token_manager.get_token(api_path)
+            headers = self._build_headers(api_path, token, include_tokens=not include_query_tokens)
+            query = dict(params or {})
+            if include_query_tokens:
+                if token.get("msToken"):
+                    query["msToken"] = token["msToken"]
+                if token.get("a_bogus"):
+                    query["a_bogus"] = token["a_bogus"]
+            url = api_path if api_path.startswith("/") else f"/{api_path}"
+            response = await self._send(
+                lambda: self._client.request(method, url, params=query or None, json=json_payload, headers=headers),
+                "即梦 API 请求失败",
+                "即梦 API 网络异常",
+            )
+            try:
+                return json_codec.loads(response.content)
+            except json_codec.DECODE_ERRORS as exc:
+                logger.exception("即梦 API 返回非 JSON：%s", response.text)
+                raise JimengApiError("即梦 API 返回格式错误") from exc
 
-        try:
-            payload = response.json()
-        except json.JSONDecodeError as exc:
-            logger.exception("即梦 API 返回非 JSON：%s", response.text)
-            raise JimengApiError("即梦 API 返回格式错误") from exc
-        return payload
+        if not idempotent:
+            return await _attempt()
+        return await self._retry(_attempt)
 
     async def fetch_resource(self, url: str) -> bytes:
-        """下载生成结果资源，带上必要的鉴权头。"""
+        """下载生成结果资源，带上必要的鉴权头；下载是幂等的，暂时性错误会重试。
 
-        headers = {
-            "referer": "https://jimeng.jianying.com/ai-tool/generate",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
-        }
+        下载走独立的 CDN 连接池，不与签名 API 请求争用连接。
+        """
+
+        async def _attempt() -> bytes:
+            response = await self._send(
+                lambda: self._cdn_client.get(url, headers=_RESOURCE_HEADERS),
+                "即梦资源下载失败",
+                "即梦资源下载网络异常",
+            )
+            return response.content
+
+        return await self._retry(_attempt)
+
+    async def stream_resource(
+        self,
+        url: str,
+        consume: Callable[[AsyncIterator[bytes]], Awaitable[T]],
+        *,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> T:
+        """以流式方式下载资源，把分块迭代器交给 ``consume`` 处理并返回其结果。
+
+        响应体不会整体载入内存；传输中断时整个下载（包括 ``consume``）作为一次尝试重试，
+        因此 ``consume`` 每次调用都应从头写入。
+        """
+
+        async def _attempt() -> T:
+            response = await self._send(
+                lambda: self._cdn_client.send(
+                    self._cdn_client.build_request("GET", url, headers=_RESOURCE_HEADERS),
+                    stream=True,
+                ),
+                "即梦资源下载失败",
+                "即梦资源下载网络异常",
+            )
+            try:
+                return await consume(self._iter_body(response, chunk_size))
+            finally:
+                await response.aclose()
+
+        return await self._retry(_attempt)
+
+    async def _iter_body(self, response: httpx.Response, chunk_size: int) -> AsyncIterator[bytes]:
         try:
-            response = await self._client.get(url, headers=headers)
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        except httpx.HTTPError as exc:
+            self._breaker.record_failure()
+            self._counters["failures"] += 1
+            logger.warning("即梦资源下载中断：%s", exc)
+            raise JimengApiError("即梦资源下载中断", code="network_error", retryable=True) from exc
+
+    async def _send(
+        self,
+        call: Callable[[], Awaitable[httpx.Response]],
+        status_message: str,
+        network_message: str,
+    ) -> httpx.Response:
+        """经过熔断器发出一次 HTTP 请求，并把 httpx 异常转换为 ``JimengApiError``。
+
+        只有网络异常与 5xx 计入熔断失败；4xx 说明上游仍然可用。
+        """
+
+        try:
+            self._breaker.before_call()
+        except CircuitOpenError as exc:
+            raise JimengApiError(str(exc), code="circuit_open", retryable=True) from exc
+        self._counters["requests"] += 1
+        try:
+            response = await call()
             response.raise_for_status()
-        except httpx.HTTPStatusError as exc:  # pragma: no cover - 网络异常
-            logger.warning("下载即梦资源失败：%s", exc)
-            raise JimengApiError("即梦资源下载失败", code=str(exc.response.status_code)) from exc
-        except httpx.HTTPError as exc:  # pragma: no cover - 网络异常
-            logger.warning("下载即梦资源出现网络错误：%s", exc)
-            raise JimengApiError("即梦资源下载网络异常") from exc
-        return response.content
+        except httpx.HTTPStatusError as exc:
+            await exc.response.aclose()
+            status = exc.response.status_code
+            if status >= 500:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+            self._counters["failures"] += 1
+            logger.warning("%s：%s", status_message, exc)
+            raise JimengApiError(status_message, code=str(status), retryable=status >= 500 or status == 429) from exc
+        except httpx.HTTPError as exc:
+            self._breaker.record_failure()
+            self._counters["failures"] += 1
+            logger.warning("%s：%s", network_message, exc)
+            raise JimengApiError(network_message, code="network_error", retryable=True) from exc
+        except BaseException:
+            # 取消、超时或其他意外异常既不算成功也不算失败，但必须归还半开状态下的探测名额。
+            self._breaker.release_probe()
+            raise
+        self._breaker.record_success()
+        return response
+
+    async def _retry(self, func: Callable[[], Awaitable[T]]) -> T:
+        def _on_retry(state: RetryCallState) -> None:
+            self._counters["retries"] += 1
+            exc = state.outcome.exception() if state.outcome else None
+            logger.info("即梦请求第 %d 次失败，%.2f 秒后重试：%s", state.attempt_number, state.upcoming_sleep, exc)
+
+        return await self._retry_policy.call(
+            func,
+            should_retry=lambda exc: isinstance(exc, JimengApiError) and exc.retryable and exc.code != "circuit_open",
+            on_retry=_on_retry,
+        )
+
     def _resolve_model(self, alias: str | None) -> str:
         name = (alias or "3.0").strip()
         key = MODEL_ALIASES.get(name.lower(), name)
@@ -295,6 +670,7 @@ class JimengClient:
         ratio: str,
         resolution: str,
         batch: int,
+        seed: int | None = None,
     ) -> tuple[Dict[str, Any], Dict[str, Any]]:
         now_ms = int(time.time() * 1000)
         submit_id = str(uuid.uuid4())
@@ -309,7 +685,7 @@ class JimengClient:
             "lastRequestId": "",
             "originRequestId": "",
             "originSubmitId": "",
-            "isDefaultSeed": 1,
+            "isDefaultSeed": 1 if seed is None else 0,
             "originTemplateId": "",
             "imageNameMapping": {},
             "isUseAiGenPrompt": False,
@@ -329,7 +705,7 @@ class JimengClient:
             "model": MODEL_REQ_KEYS[model_key],
             "prompt": prompt,
             "negative_prompt": "",
-            "seed": secrets.randbelow(999_999_999) + 1,
+            "seed": seed if seed is not None else secrets.randbelow(999_999_999) + 1,
             "sample_strength": 0.5,
             "image_ratio": self._ratio_value(ratio),
             "generate_count": batch,
@@ -395,7 +771,14 @@ class JimengClient:
         model: str | None,
         size: str | None,
         batch: int,
+        inline_poll: bool = True,
+        seed: int | None = None,
     ) -> JimengSubmissionResult:
+        """提交生成任务；``inline_poll`` 为真时紧接着查询一次历史记录以带回排队信息。
+
+        ``seed`` 为空时使用随机种子，指定种子可使相同参数的生成结果可复现。
+        """
+
         model_key = self._resolve_model(model)
         width, height, ratio, resolution = self._resolve_dimensions(size)
         payload, babi_param = self._build_generation_payload(
@@ -406,6 +789,7 @@ class JimengClient:
             ratio=ratio,
             resolution=resolution,
             batch=max(1, min(batch, 4)),
+            seed=seed,
         )
         params = {
             "babi_param": json.dumps(babi_param, ensure_ascii=False, separators=(",", ":")),
@@ -439,6 +823,8 @@ class JimengClient:
         )
         if not history_id:
             raise JimengApiError("即梦返回缺少历史记录 ID", payload=response)
+        if not inline_poll:
+            return JimengSubmissionResult(history_id=history_id, status=TaskStatus.RUNNING, result_urls=[])
 
         try:
             history = await self.fetch_history(history_id)
@@ -452,6 +838,15 @@ class JimengClient:
             )
         return history
     async def fetch_history(self, history_id: str) -> JimengSubmissionResult:
+        results = await self.fetch_histories([history_id])
+        return results[history_id]
+
+    async def fetch_histories(self, history_ids: Sequence[str]) -> Dict[str, JimengSubmissionResult]:
+        """一次请求查询多个历史记录，返回以 history_id 为键的结果。"""
+
+        ids = list(dict.fromkeys(history_ids))
+        if not ids:
+            return {}
         params = {
             "aid": AID,
             "device_platform": "web",
@@ -459,7 +854,7 @@ class JimengClient:
             "web_id": self._token_manager.get_web_id(),
         }
         payload = {
-            "history_ids": [history_id],
+            "history_ids": ids,
             "image_info": {
                 "width": 2048,
                 "height": 2048,
@@ -477,139 +872,28 @@ class JimengClient:
             params=params,
             json_payload=payload,
             include_query_tokens=False,
+            idempotent=True,
         )
         ret = str(response.get("ret"))
         if ret != "0":
             code = response.get("ret") if isinstance(response.get("ret"), str) else ret
             message = response.get("message") or response.get("msg") or "查询任务状态失败"
-            raise JimengApiError(message, code=str(code), payload=response)
-
-        history_data = response.get("data", {}).get(history_id, {})
-        if not history_data:
-            return JimengSubmissionResult(
-                history_id=history_id,
-                status=TaskStatus.RUNNING,
-                result_urls=[],
-                raw=response,
-            )
-
-        queue_info = history_data.get("queue_info")
-        queue_message = self._format_queue_message(queue_info) if queue_info else None
-        error_code = self._extract_error_code(history_data)
-        error_message = self._extract_error_message(history_data)
-        result_urls = self._extract_images(history_data)
-        status_code = history_data.get("status")
-
-        if status_code == 50 and result_urls:
-            status = TaskStatus.SUCCEEDED
-        elif error_code:
-            status = TaskStatus.FAILED
-        elif status_code in {60, 70}:
-            status = TaskStatus.FAILED
-        elif queue_info:
-            status = TaskStatus.QUEUED
-        else:
-            status = TaskStatus.RUNNING
-
-        return JimengSubmissionResult(
-            history_id=history_id,
-            status=status,
-            result_urls=result_urls,
-            queue_message=queue_message,
-            queue_info=queue_info,
-            error_code=error_code,
-            error_message=error_message,
-            raw=history_data,
-        )
-    def _extract_error_code(self, history: Dict[str, Any]) -> str | None:
-        for key in ("err_code", "task_err_code", "error_code"):
-            value = history.get(key)
-            if value:
-                return str(value)
-        return None
-
-    def _extract_error_message(self, history: Dict[str, Any]) -> str | None:
-        for key in ("err_msg", "task_err_msg", "status_msg", "error_msg"):
-            value = history.get(key)
-            if isinstance(value, str) and value.strip():
-                return value.strip()
-        return None
-
-    def _extract_images(self, history: Dict[str, Any]) -> List[str]:
-        result: List[str] = []
-        uploaded = self._extract_uploaded_uris(history)
-        resources = history.get("resources") or []
-        for resource in resources:
-            if resource.get("type") != "image":
+            # 查询被限流不代表任务失败，交给调用方稍后再查。
+            raise JimengApiError(message, code=str(code), payload=response, retryable=str(code) == "1015")
+
+        data = response.get("data") or {}
+        results: Dict[str, JimengSubmissionResult] = {}
+        for history_id in ids:
+            history_data = data.get(history_id) or {}
+            if not history_data:
+                results[history_id] = JimengSubmissionResult(
+                    history_id=history_id,
+                    status=TaskStatus.RUNNING,
+                    result_urls=[],
+                )
                 continue
-            info = resource.get("image_info") or {}
-            uri = resource.get("key")
-            url = info.get("image_url")
-            if url and (not uploaded or uri not in uploaded):
-                result.append(url)
-        if result:
-            return result
-        item_list = history.get("item_list") or []
-        for item in item_list:
-            image = item.get("image") or {}
-            large_images = image.get("large_images") or []
-            for large_image in large_images:
-                url = large_image.get("image_url")
-                if url:
-                    result.append(url)
-            if not large_images:
-                url = image.get("image_url")
-                if url:
-                    result.append(url)
-        # 去重保持顺序
-        seen = set()
-        unique: List[str] = []
-        for url in result:
-            if url not in seen:
-                seen.add(url)
-                unique.append(url)
-        return unique
-
-    def _extract_uploaded_uris(self, history: Dict[str, Any]) -> set[str]:
-        draft_content = history.get("draft_content")
-        if not draft_content:
-            return set()
-        try:
-            data = json.loads(draft_content)
-        except (TypeError, json.JSONDecodeError):
-            return set()
-        uploaded: set[str] = set()
-        for component in data.get("component_list", []):
-            abilities = component.get("abilities", {})
-            blend_data = abilities.get("blend", {})
-            for ability in blend_data.get("ability_list", []):
-                if ability.get("image_uri_list"):
-                    uploaded.update(ability["image_uri_list"])
-        return uploaded
-
-    def _format_queue_message(self, queue_info: Dict[str, Any]) -> str:
-        try:
-            queue_idx = queue_info.get("queue_idx", 0)
-            queue_length = queue_info.get("queue_length", 0)
-            status = queue_info.get("queue_status", 0)
-            threshold = queue_info.get("priority_queue_display_threshold", {})
-            waiting = int(threshold.get("waiting_time_threshold", 0))
-            minutes, seconds = divmod(waiting, 60)
-            if minutes > 0:
-                time_desc = f"{minutes}分{seconds}秒" if seconds else f"{minutes}分钟"
-            else:
-                time_desc = f"{seconds}秒"
-            if status == 1:
-                if queue_idx and queue_length:
-                    return (
-                        "📊 总队列长度：{length}人\n"
-                        "🔄 当前排队位置：第{idx}位\n"
-                        "⏰ 预计等待时间：{time}"
-                    ).format(length=queue_length, idx=queue_idx, time=time_desc)
-                return f"🔄 任务已进入队列，预计等待时间：{time_desc}"
-            return "🚀 当前无需排队，正在加速生成..."
-        except Exception:  # pragma: no cover - 容错
-            return "🔄 任务正在排队处理中，请稍候..."
+            results[history_id] = self._parser.parse(history_id, history_data)
+        return results
 
     @property
     def account_label(self) -> str:
@@ -0,0 +1,33 @@
+"""JSON 解码：安装了 orjson 或 msgspec 时使用更快的实现，否则回退到标准库。"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Tuple, Type
+
+_loads: Callable[[bytes | str], Any]
+DECODE_ERRORS: Tuple[Type[Exception], ...]
+
+try:  # pragma: no cover - 取决于运行环境
+    import orjson
+
+    _loads = orjson.loads
+    DECODE_ERRORS = (orjson.JSONDecodeError, TypeError)
+    BACKEND = "orjson"
+except ImportError:  # pragma: no cover - 取决于运行环境
+    try:
+        import msgspec
+
+        _loads = msgspec.json.decode
+        DECODE_ERRORS = (msgspec.DecodeError, TypeError)
+        BACKEND = "msgspec"
+    except ImportError:
+        _loads = json.loads
+        DECODE_ERRORS = (json.JSONDecodeError, TypeError)
+        BACKEND = "json"
+
+
+def loads(data: bytes | str) -> Any:
+    """解码 JSON 文本或字节串；格式错误时抛出 ``DECODE_ERRORS`` 中的异常。"""
+
+    return _loads(data)
@@ -0,0 +1,299 @@
+"""即梦任务的集中轮询调度器。"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_BATCH_SIZE = 20
+_DEFAULT_JITTER = 0.1
+_DEFAULT_LATENCY_SMOOTHING = 0.3
+_DEFAULT_ERROR_BACKOFF = 2.0
+_DEFAULT_MAX_ERROR_BACKOFF = 60.0
+
+BatchDispatcher = Callable[[str, List[str]], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class _PollEntry:
+    deadline: float
+    seq: int
+    account: str
+
+
+class PollPolicy:
+    """根据排队信息与历史耗时计算下一次轮询间隔。
+
+    - 排队中的任务参考 ``waiting_time_threshold`` 在预计等待时间过半时再查询，
+      没有预计时间时按队列位置对数放大基础间隔；
+    - 运行中的任务参考同一模型/分辨率的平滑耗时，越接近预计完成时间轮询越密；
+    - 所有结果都会叠加 ``jitter`` 抖动并限制在 ``[floor, ceiling]`` 区间内。
+    """
+
+    def __init__(
+        self,
+        *,
+        base_interval: float,
+        floor: float | None = None,
+        ceiling: float | None = None,
+        jitter: float = _DEFAULT_JITTER,
+        smoothing: float = _DEFAULT_LATENCY_SMOOTHING,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        if base_interval <= 0:
+            raise ValueError("base_interval 必须大于 0")
+        self._base = base_interval
+        self._floor = floor if floor is not None else min(1.0, base_interval)
+        self._ceiling = ceiling if ceiling is not None else base_interval * 10
+        if self._floor <= 0 or self._ceiling < self._floor:
+            raise ValueError("轮询间隔下限必须大于 0 且不大于上限")
+        self._jitter = max(0.0, min(jitter, 0.5))
+        self._smoothing = max(0.0, min(smoothing, 1.0))
+        self._rng = rng
+        self._latency: Dict[str, float] = {}
+
+    @property
+    def base_interval(self) -> float:
+        return self._base
+
+    def expected_runtime(self, latency_key: str) -> float | None:
+        return self._latency.get(latency_key)
+
+    def observe(self, latency_key: str, duration: float) -> None:
+        """记录一次实际生成耗时，按指数滑动平均更新预计耗时。"""
+
+        if duration <= 0:
+            return
+        previous = self._latency.get(latency_key)
+        if previous is None:
+            self._latency[latency_key] = duration
+        else:
+            self._latency[latency_key] = previous + self._smoothing * (duration - previous)
+
+    def next_delay(
+        self,
+        *,
+        queue_info: Dict[str, Any] | None = None,
+        latency_key: str | None = None,
+        running_for: float | None = None,
+        budget: float | None = None,
+    ) -> float:
+        delay = self._queued_delay(queue_info) if queue_info else None
+        if delay is None:
+            delay = self._running_delay(latency_key, running_for)
+        delay = self._clamp(delay)
+        if self._jitter:
+            delay *= 1 + self._jitter * (2 * self._rng() - 1)
+            delay = self._clamp(delay)
+        if budget is not None:
+            # 不越过轮询超时点，保证超时能被及时发现。
+            delay = min(delay, max(budget, 0.0))
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "floor": self._floor,
+            "ceiling": self._ceiling,
+            "expectedRuntime": {key: round(value, 3) for key, value in self._latency.items()},
+        }
+
+    def _queued_delay(self, queue_info: Dict[str, Any]) -> float | None:
+        if queue_info.get("queue_status") not in (None, 1):
+            return None
+        try:
+            queue_idx = int(queue_info.get("queue_idx") or 0)
+            threshold = queue_info.get("priority_queue_display_threshold") or {}
+            waiting = float(threshold.get("waiting_time_threshold") or queue_info.get("waiting_time_threshold") or 0)
+        except (TypeError, ValueError, AttributeError):
+            return None
+        if waiting > 0:
+            return waiting / 2
+        if queue_idx > 0:
+            return self._base * (1 + math.log2(queue_idx))
+        return None
+
+    def _running_delay(self, latency_key: str | None, running_for: float | None) -> float:
+        expected = self._latency.get(latency_key) if latency_key else None
+        if expected is None or running_for is None:
+            return self._base
+        remaining = expected - running_for
+        if remaining <= 0:
+            return self._floor
+        return remaining / 2
+
+    def _clamp(self, delay: float) -> float:
+        return max(self._floor, min(self._ceiling, delay))
+
+
+class PollScheduler:
+    """基于截止时间小顶堆的轮询调度器。
+
+    每个任务在堆中只有一个有效条目；到期的任务按账号分组，并按 ``max_batch_size``
+    切片后交给 ``dispatch`` 回调，以一次 ``get_history_by_ids`` 请求完成整批查询。
+    ``coalesce_window`` 内即将到期的同账号任务会被提前并入当前批次，
+    使上游请求量基本不随并发任务数增长。
+
+    ``dispatch`` 抛出未预期的异常时，批次中尚未被回调重新安排的任务会按
+    ``error_backoff`` 起步、按账号连续失败次数翻倍（不超过 ``max_error_backoff``）重新入堆，
+    避免任务因出堆后无人安排而永远停留在运行中。
+    """
+
+    def __init__(
+        self,
+        dispatch: BatchDispatcher,
+        *,
+        max_batch_size: int = _DEFAULT_MAX_BATCH_SIZE,
+        coalesce_window: float = 0.0,
+        error_backoff: float = _DEFAULT_ERROR_BACKOFF,
+        max_error_backoff: float = _DEFAULT_MAX_ERROR_BACKOFF,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size 必须大于 0")
+        self._dispatch = dispatch
+        self._max_batch_size = max_batch_size
+        self._coalesce_window = max(0.0, coalesce_window)
+        self._error_backoff = max(0.0, error_backoff)
+        self._max_error_backoff = max(self._error_backoff, max_error_backoff)
+        self._clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, _PollEntry] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._runner: asyncio.Task[Any] | None = None
+        self._inflight: set[asyncio.Task[Any]] = set()
+        self._batches = 0
+        self._polled = 0
+        self._failed_batches = 0
+        self._account_failures: Dict[str, int] = {}
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, key: str, account: str, delay: float) -> None:
+        """安排任务在 ``delay`` 秒后参与下一次批量轮询，重复调用以最新时间为准。"""
+
+        deadline = self._clock() + max(0.0, delay)
+        seq = next(self._seq)
+        self._entries[key] = _PollEntry(deadline=deadline, seq=seq, account=account)
+        heapq.heappush(self._heap, (deadline, seq, key))
+        self._ensure_running()
+        self._wakeup.set()
+
+    def discard(self, key: str) -> None:
+        """移除尚未到期的轮询条目；堆中的旧记录会在出堆时被惰性跳过。"""
+
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "scheduled": len(self._entries),
+            "inflightBatches": len(self._inflight),
+            "batches": self._batches,
+            "polledTasks": self._polled,
+            "failedBatches": self._failed_batches,
+        }
+
+    async def aclose(self) -> None:
+        runner, self._runner = self._runner, None
+        pending = list(self._inflight)
+        if runner is not None:
+            pending.append(runner)
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._inflight.clear()
+        self._entries.clear()
+        self._heap.clear()
+
+    def _ensure_running(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="jimeng-poll-scheduler")
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            for account, keys in self._pop_due(now).items():
+                for start in range(0, len(keys), self._max_batch_size):
+                    self._spawn(account, keys[start : start + self._max_batch_size])
+            timeout = self._next_timeout(now)
+            if timeout is None:
+                # 空闲时退出，下一次 schedule 会重新拉起，避免常驻后台任务。
+                return
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    def _pop_due(self, now: float) -> Dict[str, List[str]]:
+        self._drop_stale()
+        if not self._heap or self._heap[0][0] > now:
+            return {}
+        horizon = now + self._coalesce_window
+        due: Dict[str, List[str]] = {}
+        while self._heap and self._heap[0][0] <= horizon:
+            _, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.seq != seq:
+                continue
+            del self._entries[key]
+            due.setdefault(entry.account, []).append(key)
+        return due
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            _, seq, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry.seq == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _next_timeout(self, now: float) -> float | None:
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now)
+
+    def _spawn(self, account: str, keys: List[str]) -> None:
+        self._batches += 1
+        self._polled += len(keys)
+        task = asyncio.create_task(self._dispatch_batch(account, keys), name=f"jimeng-poll-batch-{account}")
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch_batch(self, account: str, keys: List[str]) -> None:
+        try:
+            await self._dispatch(account, keys)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self._failed_batches += 1
+            failures = self._account_failures.get(account, 0) + 1
+            self._account_failures[account] = failures
+            delay = min(self._error_backoff * 2 ** (failures - 1), self._max_error_backoff)
+            orphaned = [key for key in keys if key not in self._entries]
+            logger.exception(
+                "批量轮询账号 %s 时出现未捕获异常，%d 个任务将在 %.1f 秒后重试：%s",
+                account,
+                len(orphaned),
+                delay,
+                exc,
+            )
+            for key in orphaned:
+                self.schedule(key, account, delay)
+        else:
+            self._account_failures.pop(account, None)
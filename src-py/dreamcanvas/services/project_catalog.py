@@ -0,0 +1,156 @@
+"""项目目录索引：在 SQLite 中保存清单字段与资源、历史条数，列表与诊断无需逐个解析项目文件。"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from ..models.project import ProjectManifest
+
+CATALOG_NAME = ".catalog.sqlite3"
+
+
+@dataclass(slots=True)
+class ProjectSummary:
+    manifest: ProjectManifest
+    assets_count: int
+    history_count: int
+
+
+class ProjectCatalog:
+    """项目索引表，每个项目一行。
+
+    ``signature`` 记录写入索引时 ``manifest.json``、``assets.json``、``history.json`` 的
+    mtime 与大小；目录中的文件被外部修改（恢复备份、手工编辑、写入中途崩溃）后签名不再一致，
+    ``ProjectStorage.reconcile`` 据此只重新解析发生变化的项目。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def upsert(self, summary: ProjectSummary, signature: str) -> None:
+        manifest = summary.manifest
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO projects (id, name, created_at, updated_at, version, canvas_checksum, "
+                    "assets_count, history_count, signature) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        manifest.id,
+                        manifest.name,
+                        manifest.created_at,
+                        manifest.updated_at,
+                        manifest.version,
+                        manifest.canvas_checksum,
+                        summary.assets_count,
+                        summary.history_count,
+                        signature,
+                    ),
+                )
+
+    def update_manifest(self, manifest: ProjectManifest, signature: str) -> None:
+        """只更新清单字段，资源与历史条数保持不变。"""
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE projects SET name = ?, updated_at = ?, version = ?, canvas_checksum = ?, signature = ? "
+                    "WHERE id = ?",
+                    (manifest.name, manifest.updated_at, manifest.version, manifest.canvas_checksum, signature, manifest.id),
+                )
+
+    def touch(self, project_id: str, updated_at: int) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE projects SET updated_at = MAX(updated_at, ?) WHERE id = ?",
+                    (updated_at, project_id),
+                )
+
+    def add_history(self, project_id: str, count: int, *, expected: str, signature: str) -> bool:
+        """历史记录追加 ``count`` 条。
+
+        仅当索引中的签名等于写入前的签名 ``expected`` 时才在原计数上累加；
+        索引缺少该项目或已过期时返回 ``False``，由调用方重新解析该项目。
+        """
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE projects SET history_count = history_count + ?, signature = ? WHERE id = ? AND signature = ?",
+                    (count, signature, project_id, expected),
+                )
+            return cursor.rowcount > 0
+
+    def remove(self, project_ids: Iterable[str]) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("DELETE FROM projects WHERE id = ?", [(project_id,) for project_id in project_ids])
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM projects")
+
+    def signatures(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._connect().execute("SELECT id, signature FROM projects").fetchall())
+
+    def summaries(self) -> List[ProjectSummary]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, name, created_at, updated_at, version, canvas_checksum, assets_count, history_count "
+                "FROM projects ORDER BY id"
+            ).fetchall()
+        return [
+            ProjectSummary(
+                manifest=ProjectManifest(
+                    id=row[0],
+                    name=row[1],
+                    created_at=row[2],
+                    updated_at=row[3],
+                    version=row[4],
+                    canvas_checksum=row[5],
+                ),
+                assets_count=row[6],
+                history_count=row[7],
+            )
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM projects").fetchone()
+        return {"projects": int(count), "path": str(self.path)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, created_at INTEGER NOT NULL, updated_at INTEGER NOT NULL, "
+                "version TEXT NOT NULL, canvas_checksum TEXT NOT NULL, assets_count INTEGER NOT NULL, "
+                "history_count INTEGER NOT NULL, signature TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
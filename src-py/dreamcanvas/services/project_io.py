@@ -0,0 +1,167 @@
+"""``ProjectStorage`` 的异步门面：磁盘读写在有界线程池中执行，不阻塞事件循环。"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Sequence, TypeVar
+
+from ..models.project import GenerationRecord, ProjectPayload
+from .project_catalog import ProjectSummary
+from .projects import CanvasPatchResult, ProjectSaveResult, ProjectStorage
+
+_DEFAULT_WORKERS = 4
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class _OperationStats:
+    count: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    queued_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        executed = max(self.count, 1)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "avgMs": round(self.total_ms / executed, 2),
+            "maxMs": round(self.max_ms, 2),
+            "avgQueuedMs": round(self.queued_ms / executed, 2),
+        }
+
+
+class AsyncProjectStorage:
+    """把 ``ProjectStorage`` 的同步方法放到最多 ``max_workers`` 个线程中执行。
+
+    取消语义：
+    - 读操作在等待者被取消时，若尚未开始执行则不再执行；
+    - 写操作一旦提交就一定执行完，等待者被取消只是不再等待结果，项目文件不会停在写了一半的状态。
+
+    每类操作分别统计次数、失败数、执行耗时与排队耗时，见 ``stats``。
+    """
+
+    def __init__(self, storage: ProjectStorage, *, max_workers: int = _DEFAULT_WORKERS) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers 必须大于 0")
+        self.storage = storage
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dc-project-io")
+        self._stats: Dict[str, _OperationStats] = {}
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def root(self) -> Path:
+        return self.storage.root
+
+    async def list_projects(self) -> List[ProjectSummary]:
+        return await self._run("list_projects", self.storage.list_projects)
+
+    async def asset_dir(self, project_id: str, *parts: str) -> Path:
+        return await self._run("asset_dir", self.storage.asset_dir, project_id, *parts, write=True)
+
+    async def load_project(self, project_id: str) -> ProjectPayload:
+        return await self._run("load_project", self.storage.load_project, project_id)
+
+    async def create_project(self, name: str) -> ProjectPayload:
+        return await self._run("create_project", self.storage.create_project, name, write=True)
+
+    async def save_project(self, payload: ProjectPayload) -> ProjectPayload:
+        return await self._run("save_project", self.storage.save_project, payload, write=True)
+
+    async def persist_project(self, payload: ProjectPayload) -> ProjectSaveResult:
+        return await self._run("persist_project", self.storage.persist_project, payload, write=True)
+
+    async def patch_canvas(
+        self,
+        project_id: str,
+        operations: Sequence[Mapping[str, Any]],
+        *,
+        base_version: int,
+    ) -> CanvasPatchResult:
+        return await self._run(
+            "patch_canvas",
+            self.storage.patch_canvas,
+            project_id,
+            operations,
+            base_version=base_version,
+            write=True,
+        )
+
+    async def append_history(self, project_id: str, record: GenerationRecord) -> None:
+        await self._run("append_history", self.storage.append_history, project_id, record, write=True)
+
+    async def reconcile(self, *, rebuild: bool = False) -> Dict[str, int]:
+        return await self._run("reconcile", self.storage.reconcile, rebuild=rebuild, write=True)
+
+    async def diagnostics(self) -> Dict[str, Any]:
+        return await self._run("diagnostics", self.storage.diagnostics)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            operations = {name: item.to_dict() for name, item in sorted(self._stats.items())}
+            pending = self._pending
+        return {"workers": self._max_workers, "pending": pending, "operations": operations}
+
+    async def aclose(self) -> None:
+        """等待已提交的操作完成后关闭线程池与底层存储。"""
+
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+        await asyncio.to_thread(self.storage.close)
+
+    async def _run(self, name: str, func: Callable[..., T], *args: Any, write: bool = False, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._timed, name, time.perf_counter(), func, *args, **kwargs)
+        with self._stats_lock:
+            self._pending += 1
+        future = loop.run_in_executor(self._executor, call)
+        future.add_done_callback(self._finished)
+        try:
+            # 写操作用 shield 隔离取消：线程中的写入照常完成，结果被丢弃。
+            return await (asyncio.shield(future) if write else future)
+        except asyncio.CancelledError:
+            with self._stats_lock:
+                self._operation(name).cancelled += 1
+            raise
+
+    def _finished(self, future: "asyncio.Future[Any]") -> None:
+        with self._stats_lock:
+            self._pending -= 1
+        if not future.cancelled():
+            # 等待者已被取消的写操作无人取结果，标记异常已读取以免事件循环告警。
+            future.exception()
+
+    def _timed(self, name: str, submitted: float, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        started = time.perf_counter()
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                stats = self._operation(name)
+                stats.count += 1
+                stats.errors += int(failed)
+                stats.total_ms += elapsed
+                stats.max_ms = max(stats.max_ms, elapsed)
+                stats.queued_ms += (started - submitted) * 1000
+
+    def _operation(self, name: str) -> _OperationStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _OperationStats()
+        return stats
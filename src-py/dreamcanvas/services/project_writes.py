@@ -0,0 +1,137 @@
+"""按项目串行化的写队列：短时间内到达的多个修改合并为一次读取、合并、保存。"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from ..models.project import ProjectPayload
+from .project_io import AsyncProjectStorage
+from .projects import ProjectSaveResult
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_WINDOW = 0.05
+_DEFAULT_MAX_BATCH = 64
+
+ProjectMutation = Callable[[ProjectPayload], ProjectPayload]
+
+
+@dataclass(slots=True)
+class _PendingMutation:
+    mutate: ProjectMutation
+    future: "asyncio.Future[ProjectSaveResult]" = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class ProjectWriteQueue:
+    """每个项目同一时刻只有一个写入者。
+
+    ``submit`` 把修改函数放入项目的待写队列；队列空闲时等待 ``window`` 秒收集后续修改，
+    然后读取一次项目、按提交顺序依次应用至多 ``max_batch`` 个修改、保存一次，
+    同一批次的提交者拿到同一个保存结果。某个修改函数抛出异常时只有它的提交者失败，
+    同批其余修改照常保存；读取或保存失败时整批失败。
+    """
+
+    def __init__(
+        self,
+        storage: AsyncProjectStorage,
+        *,
+        window: float = _DEFAULT_WINDOW,
+        max_batch: int = _DEFAULT_MAX_BATCH,
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch 必须大于 0")
+        self._storage = storage
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: Dict[str, List[_PendingMutation]] = {}
+        self._workers: Dict[str, asyncio.Task[None]] = {}
+        self._batches = 0
+        self._mutations = 0
+        self._failed = 0
+
+    async def submit(self, project_id: str, mutate: ProjectMutation) -> ProjectSaveResult:
+        """提交修改并等待它所在的批次保存完成；等待方被取消时修改仍会写入。"""
+
+        item = _PendingMutation(mutate)
+        self._pending.setdefault(project_id, []).append(item)
+        if project_id not in self._workers:
+            self._workers[project_id] = asyncio.create_task(
+                self._drain(project_id),
+                name=f"project-writes-{project_id}",
+            )
+        return await asyncio.shield(item.future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window": self._window,
+            "batches": self._batches,
+            "mutations": self._mutations,
+            "coalesced": self._mutations - self._batches,
+            "failed": self._failed,
+            "pending": sum(len(items) for items in self._pending.values()),
+            "activeProjects": len(self._workers),
+        }
+
+    async def aclose(self) -> None:
+        """等待所有已提交的修改落盘。"""
+
+        workers = list(self._workers.values())
+        for worker in workers:
+            with contextlib.suppress(Exception):
+                await worker
+
+    async def _drain(self, project_id: str) -> None:
+        try:
+            while self._pending.get(project_id):
+                if self._window > 0:
+                    await asyncio.sleep(self._window)
+                queue = self._pending[project_id]
+                batch, self._pending[project_id] = queue[: self._max_batch], queue[self._max_batch :]
+                await self._write(project_id, batch)
+        finally:
+            for item in self._pending.pop(project_id, []):
+                item.future.cancel()
+            self._workers.pop(project_id, None)
+
+    async def _write(self, project_id: str, batch: List[_PendingMutation]) -> None:
+        applied: List[_PendingMutation] = []
+        try:
+            payload = await self._storage.load_project(project_id)
+            for item in batch:
+                try:
+                    payload = item.mutate(payload)
+                except Exception as exc:
+                    logger.exception("项目 %s 的待写修改执行失败", project_id)
+                    self._resolve(item, exc)
+                else:
+                    applied.append(item)
+            result = await self._storage.persist_project(payload) if applied else None
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as exc:
+            for item in applied or batch:
+                self._resolve(item, exc)
+            return
+        self._batches += 1
+        self._mutations += len(applied)
+        if len(applied) > 1:
+            logger.debug("项目 %s 合并 %d 个修改为一次保存", project_id, len(applied))
+        for item in applied:
+            self._resolve(item, result)
+
+    def _resolve(self, item: _PendingMutation, outcome: ProjectSaveResult | BaseException | None) -> None:
+        if item.future.done():
+            return
+        if isinstance(outcome, BaseException):
+            self._failed += 1
+            item.future.set_exception(outcome)
+            # 等待方可能已被取消，避免 “exception was never retrieved” 警告。
+            item.future.exception()
+        elif outcome is not None:
+            item.future.set_result(outcome)
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import copy
 import json
+import logging
 import os
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from hashlib import sha256
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
 from ..models.project import (
     AssetPayload,
@@ -19,39 +24,135 @@ from ..models.project import (
     ProjectManifest,
     ProjectPayload,
 )
+from .canvas_patch import CanvasConflictError, CanvasPatchError, apply_patch
+from .project_catalog import CATALOG_NAME, ProjectCatalog, ProjectSummary
+
+logger = logging.getLogger(__name__)
 
 _JSON_INDENT = 2
+_INDEXED_FILES = ("manifest.json", "assets.json", "history.json")
+_CANVAS_LOG = "canvas.ops.jsonl"
+_COMPACT_SUFFIX = ".compact"
+_DEFAULT_COMPACT_OPS = 200
+_DEFAULT_COMPACT_BYTES = 1024 * 1024
+_MAX_CACHED_CANVASES = 8
+# 与 ``json.dumps(model_dump(...), ensure_ascii=False, indent=2)`` 输出相同，但序列化在 pydantic-core 中完成。
+_ASSETS_ADAPTER = TypeAdapter(List[AssetPayload])
+_HISTORY_ADAPTER = TypeAdapter(List[GenerationRecord])
+
 
+def _encode(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=_JSON_INDENT).encode("utf-8")
 
-def _atomic_write(path: Path, data: Any) -> None:
-    """将 JSON 数据原子写入磁盘。"""
 
+def _write_bytes(path: Path, payload: bytes) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = path.with_suffix(".tmp")
-    payload = json.dumps(data, ensure_ascii=False, indent=_JSON_INDENT)
-    tmp_path.write_text(payload, encoding="utf-8")
+    tmp_path.write_bytes(payload)
     os.replace(tmp_path, path)
 
 
+def _atomic_write(path: Path, data: Any) -> bytes:
+    """将 JSON 数据原子写入磁盘，返回写入的字节。"""
+
+    payload = _encode(data)
+    _write_bytes(path, payload)
+    return payload
+
+
 def _read_json(path: Path, default: Any) -> Any:
     if not path.exists():
         return default
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def _signature(project_dir: Path) -> str:
+    """索引文件的 mtime 与大小，只做 ``stat`` 不读内容。"""
+
+    parts: List[str] = []
+    for name in _INDEXED_FILES:
+        try:
+            stat = (project_dir / name).stat()
+        except FileNotFoundError:
+            parts.append("-")
+        else:
+            parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts)
+
+
+def _file_stat(path: Path) -> Tuple[int, int]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (0, -1)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _log_line(entry: Dict[str, Any]) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+@dataclass(slots=True)
+class CanvasPatchResult:
+    version: int
+    updated_at: int
+    pending_ops: int
+    compacting: bool
+
+
 @dataclass(slots=True)
-class ProjectSummary:
-    manifest: ProjectManifest
-    assets_count: int
-    history_count: int
+class ProjectSaveResult:
+    payload: ProjectPayload
+    # 实际写入的文件（manifest/canvas/assets/history）及字节数，未变化的部分不出现。
+    written: Dict[str, int]
+
+
+@dataclass(slots=True)
+class _CanvasState:
+    """内存中的最新画布。``document`` 只整体替换、从不原地修改，可作为快照交给压缩线程。"""
+
+    document: Any
+    version: int
+    # canvas.json 对应的版本与文件内容哈希，写在操作日志首行，用于判断日志是否属于当前 canvas.json。
+    base_version: int
+    base_checksum: str
+    log_bytes: int
+    updated_at: int
+    canvas_stat: Tuple[int, int]
+    compacting: bool = False
 
 
 class ProjectStorage:
-    """按要求维护 `%APPDATA%/DreamCanvas/projects` 目录结构。"""
+    """按要求维护 `%APPDATA%/DreamCanvas/projects` 目录结构。
+
+    项目列表来自 ``catalog`` 索引：写入方法在落盘后同步更新索引，
+    ``reconcile`` 按文件签名与目录树对账，只重新解析发生变化的项目。桌面端会绕过服务直接读写项目目录，
+    因此每次列出项目前都做一次只 ``stat`` 不读内容的对账。
 
-    def __init__(self, root: Path) -> None:
+    画布除整体保存外还支持增量保存：``patch_canvas`` 把 JSON Patch 追加到 ``canvas.ops.jsonl``，
+    累计 ``compact_ops`` 个补丁或 ``compact_bytes`` 字节后在后台线程合并回 ``canvas.json``。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        catalog: ProjectCatalog | None = None,
+        compact_ops: int = _DEFAULT_COMPACT_OPS,
+        compact_bytes: int = _DEFAULT_COMPACT_BYTES,
+    ) -> None:
         self.root = root
         self.root.mkdir(parents=True, exist_ok=True)
+        self.catalog = catalog or ProjectCatalog(root / CATALOG_NAME)
+        # 串行化同一进程内的写入与对账，避免对账用旧内容覆盖刚写入的索引行。
+        self._lock = threading.RLock()
+        self._compact_ops = compact_ops
+        self._compact_bytes = compact_bytes
+        self._canvases: "OrderedDict[str, _CanvasState]" = OrderedDict()
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dc-canvas-compact")
+        # 项目 → 部分 → (内容指纹, 文件 mtime 与大小)，记录最近一次读写时各文件的内容。
+        self._fingerprints: Dict[str, Dict[str, Tuple[str, Tuple[int, int]]]] = {}
+        self._save_stats = {"saves": 0, "filesWritten": 0, "filesSkipped": 0, "bytesWritten": 0}
 
     def _project_dir(self, project_id: str) -> Path:
         return self.root / project_id
@@ -62,30 +163,64 @@ class ProjectStorage:
     def _canvas_path(self, project_id: str) -> Path:
         return self._project_dir(project_id) / "canvas.json"
 
-    def _assets_path(self, project_id: str) -> Path:
-        return self._project_dir(project_id) / "assets.json"
-
-    def _history_path(self, project_id: str) -> Path:
-        return self._project_dir(project_id) / "history.json"
+    def _canvas_log_path(self, project_id: str) -> Path:
+        return self._project_dir(project_id) / _CANVAS_LOG
 
     def list_projects(self) -> List[ProjectSummary]:
-        summaries: List[ProjectSummary] = []
-        for entry in sorted(self.root.glob("*/manifest.json")):
-            try:
-                manifest = ProjectManifest.model_validate_json(entry.read_text(encoding="utf-8"))
-            except (ValidationError, json.JSONDecodeError):
-                continue
-            project_id = manifest.id
-            assets = _read_json(self._assets_path(project_id), default=[])
-            history = _read_json(self._history_path(project_id), default=[])
-            summaries.append(
-                ProjectSummary(
-                    manifest=manifest,
-                    assets_count=len(assets),
-                    history_count=len(history),
-                )
-            )
-        return summaries
+        self.reconcile()
+        return self.catalog.summaries()
+
+    def reconcile(self, *, rebuild: bool = False) -> Dict[str, int]:
+        """与目录树对账：签名变化或索引缺失的项目重新解析，目录已不存在的项目移出索引。
+
+        ``rebuild=True`` 时清空索引后全部重新解析。
+        """
+
+        with self._lock:
+            if rebuild:
+                self.catalog.clear()
+            known = self.catalog.signatures()
+        seen: set[str] = set()
+        scanned = updated = 0
+        for manifest_path in sorted(self.root.glob("*/manifest.json")):
+            project_dir = manifest_path.parent
+            scanned += 1
+            with self._lock:
+                signature = _signature(project_dir)
+                if known.get(project_dir.name) == signature:
+                    seen.add(project_dir.name)
+                    continue
+                summary = self._read_summary(project_dir)
+                if summary is None:
+                    continue
+                self.catalog.upsert(summary, signature)
+                seen.add(summary.manifest.id)
+                updated += 1
+        stale = set(known) - seen
+        with self._lock:
+            self.catalog.remove(stale)
+        if updated or stale:
+            logger.info("项目索引对账：扫描 %d 个，更新 %d 个，移除 %d 个", scanned, updated, len(stale))
+        return {"scanned": scanned, "updated": updated, "removed": len(stale)}
+
+    def close(self) -> None:
+        self._compactor.shutdown(wait=True)
+        self.catalog.close()
+
+    def _read_summary(self, project_dir: Path) -> ProjectSummary | None:
+        try:
+            manifest = ProjectManifest.model_validate_json((project_dir / "manifest.json").read_text(encoding="utf-8"))
+            assets = _read_json(project_dir / "assets.json", default=[])
+            history = _read_json(project_dir / "history.json", default=[])
+        except (ValidationError, json.JSONDecodeError, FileNotFoundError):
+            return None
+        return ProjectSummary(manifest=manifest, assets_count=len(assets), history_count=len(history))
+
+    def _reindex(self, project_id: str) -> None:
+        project_dir = self._project_dir(project_id)
+        summary = self._read_summary(project_dir)
+        if summary is not None:
+            self.catalog.upsert(summary, _signature(project_dir))
 
     def create_project(self, name: str) -> ProjectPayload:
         project_id = uuid.uuid4().hex
@@ -99,58 +234,383 @@ class ProjectStorage:
             canvas_checksum="",
         )
         project_dir = self._project_dir(project_id)
-        project_dir.mkdir(parents=True, exist_ok=True)
-        _atomic_write(self._manifest_path(project_id), manifest.model_dump(by_alias=True))
-        _atomic_write(self._canvas_path(project_id), {})
-        _atomic_write(self._assets_path(project_id), [])
-        _atomic_write(self._history_path(project_id), [])
+        with self._lock:
+            project_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self._manifest_path(project_id), manifest.model_dump(by_alias=True))
+            for name, empty in (("canvas", {}), ("assets", []), ("history", [])):
+                data = _atomic_write(self._section_path(project_id, name), empty)
+                self._remember_section(project_id, name, sha256(data).hexdigest())
+            self.catalog.upsert(ProjectSummary(manifest=manifest, assets_count=0, history_count=0), _signature(project_dir))
         return self.load_project(project_id)
 
+    def asset_dir(self, project_id: str, *parts: str) -> Path:
+        """返回（必要时创建）项目内的资源目录；项目不存在时抛出 ``FileNotFoundError``。"""
+
+        project_dir = self._project_dir(project_id)
+        if not project_dir.exists():
+            raise FileNotFoundError(f"项目 {project_id} 不存在")
+        directory = project_dir.joinpath("assets", *parts)
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
     def load_project(self, project_id: str) -> ProjectPayload:
         manifest_json = _read_json(self._manifest_path(project_id), default=None)
         if manifest_json is None:
             raise FileNotFoundError(f"项目 {project_id} 不存在")
         manifest = ProjectManifest.model_validate(manifest_json)
-        canvas = _read_json(self._canvas_path(project_id), default={})
-        assets_raw = _read_json(self._assets_path(project_id), default=[])
-        history_raw = _read_json(self._history_path(project_id), default=[])
+        with self._lock:
+            state = self._canvases.get(project_id)
+            if state is not None and state.canvas_stat == _file_stat(self._canvas_path(project_id)):
+                # 缓存中的文档被其他补丁共享，交给调用方前复制一份。
+                canvas = copy.deepcopy(state.document)
+            else:
+                state = self._load_canvas_state(project_id, manifest)
+                canvas = state.document
+                if state.version != state.base_version:
+                    # 有未合并的补丁时缓存重放结果，之后整体保存可以据此判断画布是否变化。
+                    self._cache_canvas(project_id, state)
+                    canvas = copy.deepcopy(canvas)
+            assets_raw = self._read_section(project_id, "assets")
+            history_raw = self._read_section(project_id, "history")
+        manifest = manifest.model_copy(
+            update={"canvas_version": state.version, "updated_at": max(manifest.updated_at, state.updated_at)}
+        )
         assets = [AssetPayload.model_validate(item) for item in assets_raw]
         history = [GenerationRecord.model_validate(item) for item in history_raw]
         return ProjectPayload(manifest=manifest, canvas=canvas, assets=assets, history=history)
 
     def save_project(self, payload: ProjectPayload) -> ProjectPayload:
+        return self.persist_project(payload).payload
+
+    def persist_project(self, payload: ProjectPayload) -> ProjectSaveResult:
+        """整体保存项目，只重写内容指纹发生变化的文件。
+
+        资源与历史以序列化结果的 SHA-256 为指纹，画布以文件内容哈希（有未合并补丁时与内存中的最新画布比较）；
+        指纹与文件的 mtime、大小都与上次读写一致时跳过该文件。任一部分变化或清单字段变化时重写清单，
+        只有画布变化时才递增画布版本并丢弃操作日志。
+        """
+
         project_id = payload.manifest.id
-        now = int(time.time() * 1000)
-        manifest = payload.manifest.model_copy(update={"updated_at": now})
-        canvas_checksum = sha256(json.dumps(payload.canvas, sort_keys=True).encode("utf-8")).hexdigest()
-        manifest = manifest.model_copy(update={"canvas_checksum": canvas_checksum})
-
-        _atomic_write(self._manifest_path(project_id), manifest.model_dump(by_alias=True))
-        _atomic_write(self._canvas_path(project_id), payload.canvas)
-        _atomic_write(
-            self._assets_path(project_id),
-            [asset.model_dump(by_alias=True) for asset in payload.assets],
-        )
-        _atomic_write(
-            self._history_path(project_id),
-            [record.model_dump(by_alias=True) for record in payload.history],
+        project_dir = self._project_dir(project_id)
+        written: Dict[str, int] = {}
+        with self._lock:
+            canvas_bytes = self._dirty_canvas(project_id, payload.canvas)
+            sections = {
+                "assets": _ASSETS_ADAPTER.dump_json(payload.assets, by_alias=True, indent=_JSON_INDENT),
+                "history": _HISTORY_ADAPTER.dump_json(payload.history, by_alias=True, indent=_JSON_INDENT),
+            }
+            dirty = {
+                name: data
+                for name, data in sections.items()
+                if not self._section_clean(project_id, name, sha256(data).hexdigest())
+            }
+
+            manifest = payload.manifest
+            on_disk = _read_json(self._manifest_path(project_id), default=None)
+            disk_manifest = ProjectManifest.model_validate(on_disk) if on_disk is not None else None
+            if canvas_bytes is not None:
+                # 整体保存取代操作日志；版本号继续递增，基于旧版本的补丁会被拒绝。
+                state = self._canvases.pop(project_id, None)
+                current = state.version if state is not None else self._logged_version(project_id)
+                manifest = manifest.model_copy(
+                    update={
+                        "canvas_checksum": sha256(json.dumps(payload.canvas, sort_keys=True).encode("utf-8")).hexdigest(),
+                        "canvas_version": max(current, payload.manifest.canvas_version) + 1,
+                    }
+                )
+            elif disk_manifest is not None:
+                # 清单中的画布版本与校验值描述 canvas.json 本身，画布未变化时沿用磁盘上的值。
+                manifest = manifest.model_copy(
+                    update={
+                        "canvas_checksum": disk_manifest.canvas_checksum,
+                        "canvas_version": disk_manifest.canvas_version,
+                    }
+                )
+            identity_changed = disk_manifest is None or (manifest.name, manifest.version, manifest.created_at) != (
+                disk_manifest.name,
+                disk_manifest.version,
+                disk_manifest.created_at,
+            )
+
+            if canvas_bytes is not None or dirty or identity_changed:
+                manifest = manifest.model_copy(update={"updated_at": int(time.time() * 1000)})
+                written["manifest"] = len(_atomic_write(self._manifest_path(project_id), manifest.model_dump(by_alias=True)))
+            if canvas_bytes is not None:
+                _write_bytes(self._canvas_path(project_id), canvas_bytes)
+                for path in (self._canvas_log_path(project_id), self._canvas_log_path(project_id).with_suffix(_COMPACT_SUFFIX)):
+                    path.unlink(missing_ok=True)
+                self._remember_section(project_id, "canvas", sha256(canvas_bytes).hexdigest())
+                written["canvas"] = len(canvas_bytes)
+            for name, data in dirty.items():
+                _write_bytes(self._section_path(project_id, name), data)
+                self._remember_section(project_id, name, sha256(data).hexdigest())
+                written[name] = len(data)
+
+            if "manifest" in written:
+                self.catalog.upsert(
+                    ProjectSummary(manifest=manifest, assets_count=len(payload.assets), history_count=len(payload.history)),
+                    _signature(project_dir),
+                )
+            self._save_stats["saves"] += 1
+            self._save_stats["filesWritten"] += len(written)
+            self._save_stats["filesSkipped"] += 4 - len(written)
+            self._save_stats["bytesWritten"] += sum(written.values())
+            state = self._canvases.get(project_id)
+            if state is not None:
+                manifest = manifest.model_copy(update={"canvas_version": state.version})
+        logger.debug("保存项目 %s：写入 %s", project_id, written or "无变化")
+        return ProjectSaveResult(
+            payload=ProjectPayload(manifest=manifest, canvas=payload.canvas, assets=payload.assets, history=payload.history),
+            written=written,
         )
-        return ProjectPayload(
-            manifest=manifest,
-            canvas=payload.canvas,
-            assets=payload.assets,
-            history=payload.history,
+
+    def _dirty_canvas(self, project_id: str, canvas: Dict[str, Any]) -> bytes | None:
+        """画布未变化时返回 ``None``，否则返回待写入的 canvas.json 内容；调用方需持有 ``_lock``。"""
+
+        canvas_path = self._canvas_path(project_id)
+        state = self._canvases.get(project_id)
+        if state is None and self._canvas_log_path(project_id).exists():
+            manifest_json = _read_json(self._manifest_path(project_id), default=None)
+            if manifest_json is not None:
+                state = self._load_canvas_state(project_id, ProjectManifest.model_validate(manifest_json))
+                self._cache_canvas(project_id, state)
+        if state is not None and state.version != state.base_version and state.canvas_stat == _file_stat(canvas_path):
+            # 有未合并的补丁：与内存中的最新画布比较，相同则保留操作日志与版本号。
+            return None if canvas == state.document else _encode(canvas)
+        encoded = _encode(canvas)
+        return None if self._section_clean(project_id, "canvas", sha256(encoded).hexdigest()) else encoded
+
+    def _section_path(self, project_id: str, name: str) -> Path:
+        return self._project_dir(project_id) / f"{name}.json"
+
+    def _read_section(self, project_id: str, name: str) -> Any:
+        """读取资源或历史文件，并以文件内容哈希作为该部分的指纹；调用方需持有 ``_lock``。"""
+
+        path = self._section_path(project_id, name)
+        if not path.exists():
+            return []
+        raw = path.read_bytes()
+        self._remember_section(project_id, name, sha256(raw).hexdigest())
+        return json.loads(raw)
+
+    def _section_clean(self, project_id: str, name: str, digest: str) -> bool:
+        cached = self._fingerprints.get(project_id, {}).get(name)
+        return cached is not None and cached == (digest, _file_stat(self._section_path(project_id, name)))
+
+    def _remember_section(self, project_id: str, name: str, digest: str) -> None:
+        self._fingerprints.setdefault(project_id, {})[name] = (digest, _file_stat(self._section_path(project_id, name)))
+
+    def _cache_canvas(self, project_id: str, state: _CanvasState) -> None:
+        self._canvases[project_id] = state
+        self._canvases.move_to_end(project_id)
+        while len(self._canvases) > _MAX_CACHED_CANVASES:
+            self._canvases.popitem(last=False)
+
+    def patch_canvas(
+        self,
+        project_id: str,
+        operations: Sequence[Mapping[str, Any]],
+        *,
+        base_version: int,
+    ) -> CanvasPatchResult:
+        """把 JSON Patch 应用到画布并追加到操作日志，只写入补丁本身。
+
+        ``base_version`` 必须等于当前画布版本（``load_project`` 返回的 ``manifest.canvasVersion``），
+        否则抛出 ``CanvasConflictError``；补丁无法应用时抛出 ``CanvasPatchError``，画布保持不变。
+        """
+
+        if not operations:
+            raise CanvasPatchError("补丁不能为空")
+        with self._lock:
+            state = self._canvases.get(project_id)
+            if state is None or state.canvas_stat != _file_stat(self._canvas_path(project_id)):
+                manifest_json = _read_json(self._manifest_path(project_id), default=None)
+                if manifest_json is None:
+                    raise FileNotFoundError(f"项目 {project_id} 不存在")
+                state = self._load_canvas_state(project_id, ProjectManifest.model_validate(manifest_json))
+            self._cache_canvas(project_id, state)
+            if base_version != state.version:
+                raise CanvasConflictError(project_id, base_version, state.version)
+            document = apply_patch(state.document, operations)
+
+            now = int(time.time() * 1000)
+            data = _log_line({"v": state.version + 1, "at": now, "ops": list(operations)})
+            if state.log_bytes == 0:
+                data = _log_line({"base": state.base_version, "checksum": state.base_checksum}) + data
+            with self._canvas_log_path(project_id).open("ab") as handle:
+                handle.write(data)
+            state.document = document
+            state.version += 1
+            state.log_bytes += len(data)
+            state.updated_at = now
+            self.catalog.touch(project_id, now)
+
+            pending = state.version - state.base_version
+            if not state.compacting and (pending >= self._compact_ops or state.log_bytes >= self._compact_bytes):
+                state.compacting = True
+                self._compactor.submit(self._compact_canvas, project_id, state)
+            return CanvasPatchResult(
+                version=state.version,
+                updated_at=now,
+                pending_ops=pending,
+                compacting=state.compacting,
+            )
+
+    def compact_canvas(self, project_id: str) -> bool:
+        """立即把操作日志合并回 ``canvas.json``；没有待合并的补丁时返回 ``False``。"""
+
+        with self._lock:
+            state = self._canvases.get(project_id)
+            if state is None or state.compacting or state.version == state.base_version:
+                return False
+            state.compacting = True
+        return self._compact_canvas(project_id, state)
+
+    def _compact_canvas(self, project_id: str, state: _CanvasState) -> bool:
+        canvas_path = self._canvas_path(project_id)
+        canvas_tmp = canvas_path.with_name(canvas_path.name + _COMPACT_SUFFIX)
+        try:
+            with self._lock:
+                document, version, offset = state.document, state.version, state.log_bytes
+            # 序列化整张画布是最慢的一步，在锁外进行；期间到达的补丁继续追加到旧日志末尾。
+            encoded = json.dumps(document, ensure_ascii=False, indent=_JSON_INDENT).encode("utf-8")
+            canvas_checksum = sha256(json.dumps(document, sort_keys=True).encode("utf-8")).hexdigest()
+            file_checksum = sha256(encoded).hexdigest()
+            canvas_tmp.write_bytes(encoded)
+            with self._lock:
+                if self._canvases.get(project_id) is not state:
+                    # 期间发生了整体保存或缓存淘汰，以磁盘上的新内容为准。
+                    canvas_tmp.unlink(missing_ok=True)
+                    return False
+                log_path = self._canvas_log_path(project_id)
+                with log_path.open("rb") as handle:
+                    handle.seek(offset)
+                    tail = handle.read()
+                log_data = _log_line({"base": version, "checksum": file_checksum}) + tail
+                log_tmp = log_path.with_suffix(_COMPACT_SUFFIX)
+                log_tmp.write_bytes(log_data)
+                # 先替换 canvas.json 再替换日志；两步之间崩溃时，加载会用 .compact 日志完成替换。
+                os.replace(canvas_tmp, canvas_path)
+                os.replace(log_tmp, log_path)
+                self._remember_section(project_id, "canvas", file_checksum)
+                state.base_version = version
+                state.base_checksum = file_checksum
+                state.log_bytes = len(log_data)
+                state.canvas_stat = _file_stat(canvas_path)
+
+                manifest = ProjectManifest.model_validate(_read_json(self._manifest_path(project_id), default=None))
+                manifest = manifest.model_copy(
+                    update={
+                        "updated_at": max(manifest.updated_at, state.updated_at),
+                        "canvas_checksum": canvas_checksum,
+                        "canvas_version": version,
+                    }
+                )
+                _atomic_write(self._manifest_path(project_id), manifest.model_dump(by_alias=True))
+                self.catalog.update_manifest(manifest, _signature(self._project_dir(project_id)))
+            logger.info("项目 %s 的画布已合并到版本 %d（%d 字节）", project_id, version, len(encoded))
+            return True
+        except Exception:
+            canvas_tmp.unlink(missing_ok=True)
+            logger.exception("合并项目 %s 的画布操作日志失败", project_id)
+            return False
+        finally:
+            with self._lock:
+                state.compacting = False
+
+    def _load_canvas_state(self, project_id: str, manifest: ProjectManifest) -> _CanvasState:
+        """读取 canvas.json 并重放属于它的操作日志；调用方需持有 ``_lock``。"""
+
+        canvas_path = self._canvas_path(project_id)
+        canvas_stat = _file_stat(canvas_path)
+        raw = canvas_path.read_bytes() if canvas_stat[1] >= 0 else b""
+        checksum = sha256(raw).hexdigest()
+        self._fingerprints.setdefault(project_id, {})["canvas"] = (checksum, canvas_stat)
+        document: Any = json.loads(raw) if raw else {}
+        state = _CanvasState(
+            document=document,
+            version=manifest.canvas_version,
+            base_version=manifest.canvas_version,
+            base_checksum=checksum,
+            log_bytes=0,
+            updated_at=manifest.updated_at,
+            canvas_stat=canvas_stat,
         )
 
+        log_path = self._canvas_log_path(project_id)
+        pending_path = log_path.with_suffix(_COMPACT_SUFFIX)
+        lines: List[bytes] = []
+        for candidate in (log_path, pending_path):
+            if not candidate.exists():
+                continue
+            content = candidate.read_bytes().splitlines(keepends=True)
+            try:
+                header = json.loads(content[0]) if content else {}
+            except json.JSONDecodeError:
+                header = {}
+            if header.get("checksum") == checksum:
+                if candidate is pending_path:
+                    os.replace(pending_path, log_path)
+                state.base_version = state.version = int(header["base"])
+                state.log_bytes = len(content[0])
+                lines = content[1:]
+                break
+        else:
+            if log_path.exists():
+                logger.warning("项目 %s 的画布操作日志与 canvas.json 不匹配（画布已被整体保存），已丢弃", project_id)
+            log_path.unlink(missing_ok=True)
+        pending_path.unlink(missing_ok=True)
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                if entry.get("v") != state.version + 1:
+                    raise CanvasPatchError(f"版本不连续：{entry.get('v')}")
+                document = apply_patch(document, entry["ops"])
+            except (json.JSONDecodeError, KeyError, CanvasPatchError) as exc:
+                # 通常是写入中途崩溃留下的半行，截掉其后的内容以便继续追加。
+                logger.warning("项目 %s 的画布操作日志在版本 %d 之后损坏，已截断：%s", project_id, state.version, exc)
+                with log_path.open("r+b") as handle:
+                    handle.truncate(state.log_bytes)
+                break
+            state.version += 1
+            state.log_bytes += len(line)
+            state.updated_at = max(state.updated_at, int(entry.get("at") or 0))
+        state.document = document
+        return state
+
+    def _logged_version(self, project_id: str) -> int:
+        """不解析画布，从清单与操作日志末行得到当前画布版本。"""
+
+        manifest_json = _read_json(self._manifest_path(project_id), default=None) or {}
+        version = int(manifest_json.get("canvasVersion") or 0)
+        log_path = self._canvas_log_path(project_id)
+        if log_path.exists():
+            for line in reversed(log_path.read_bytes().splitlines()):
+                try:
+                    version = max(version, int(json.loads(line)["v"]))
+                    break
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+        return version
+
     def append_history(self, project_id: str, record: GenerationRecord) -> None:
-        history_raw = _read_json(self._history_path(project_id), default=[])
-        history_raw.append(record.model_dump(by_alias=True))
-        _atomic_write(self._history_path(project_id), history_raw)
+        project_dir = self._project_dir(project_id)
+        with self._lock:
+            before = _signature(project_dir)
+            history_raw = _read_json(self._section_path(project_id, "history"), default=[])
+            history_raw.append(record.model_dump(by_alias=True))
+            data = _atomic_write(self._section_path(project_id, "history"), history_raw)
+            self._remember_section(project_id, "history", sha256(data).hexdigest())
+            if not self.catalog.add_history(project_id, 1, expected=before, signature=_signature(project_dir)):
+                self._reindex(project_id)
 
     def diagnostics(self) -> Dict[str, Any]:
         summaries = self.list_projects()
         return {
             "projectCount": len(summaries),
+            "catalog": self.catalog.stats(),
+            "saves": dict(self._save_stats),
             "projects": [
                 {
                     "id": item.manifest.id,
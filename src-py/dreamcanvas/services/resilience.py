@@ -0,0 +1,147 @@
+"""即梦上游调用的重试策略与熔断器。"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_CLOSED = "closed"
+_OPEN = "open"
+_HALF_OPEN = "half_open"
+
+
+@dataclass(slots=True, frozen=True)
+class RetryPolicy:
+    """幂等调用的重试策略：带随机抖动的指数退避，并受总时限约束。
+
+    ``deadline`` 从第一次尝试开始计时，超过后不再发起新的尝试；
+    ``attempts`` 为包含首次调用在内的最大尝试次数。
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 5.0
+    deadline: float = 20.0
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        *,
+        should_retry: Callable[[BaseException], bool],
+        on_retry: Callable[[RetryCallState], None] | None = None,
+    ) -> T:
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(max(1, self.attempts)) | stop_after_delay(self.deadline),
+            wait=wait_random_exponential(multiplier=self.base_delay, max=self.max_delay),
+            retry=retry_if_exception(should_retry),
+            before_sleep=on_retry,
+            reraise=True,
+        )
+        return await retrying(func)
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态，调用被直接拒绝。"""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"上游连续失败，熔断中，约 {retry_after:.1f} 秒后重试")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器。
+
+    连续 ``failure_threshold`` 次失败后打开，``reset_timeout`` 秒内的调用直接抛出
+    ``CircuitOpenError``，不再占用连接等待超时；冷却结束后进入半开状态，只放行一次探测调用，
+    成功则关闭，失败则重新打开。探测既未成功也未失败就结束（被取消或出现非网络异常）时，
+    调用方须调用 ``release_probe`` 归还探测名额，否则半开状态会一直拒绝后续调用。
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold 必须大于 0")
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = _CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._opened = 0
+        self._rejected = 0
+
+    def clone(self) -> "CircuitBreaker":
+        """以相同配置创建一个状态独立的新熔断器，供其他账号使用。"""
+
+        return CircuitBreaker(
+            failure_threshold=self._failure_threshold,
+            reset_timeout=self._reset_timeout,
+            clock=self._clock,
+        )
+
+    @property
+    def state(self) -> str:
+        if self._state == _OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+            return _HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == _CLOSED:
+            return
+        if state == _HALF_OPEN and not self._probing:
+            self._state = _HALF_OPEN
+            self._probing = True
+            return
+        self._rejected += 1
+        retry_after = max(0.0, self._reset_timeout - (self._clock() - self._opened_at))
+        raise CircuitOpenError(retry_after)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        self._state = _CLOSED
+
+    def release_probe(self) -> None:
+        """放弃本次探测而不记录结果，保持半开状态。"""
+
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == _HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != _OPEN:
+                self._opened += 1
+                logger.warning("即梦上游连续失败 %d 次，熔断 %.0f 秒", self._failures, self._reset_timeout)
+            self._state = _OPEN
+            self._opened_at = self._clock()
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self._failures,
+            "opened": self._opened,
+            "rejected": self._rejected,
+        }
@@ -0,0 +1,188 @@
+"""固定种子生成结果的本地缓存：相同请求直接复用上次下载的图片。"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+_DB_NAME = "index.sqlite3"
+_DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+
+def result_cache_key(
+    *,
+    prompt: str,
+    model: str,
+    size: str,
+    batch: int,
+    seed: int,
+    reference_image: str | None = None,
+) -> str:
+    """规范化后的生成参数哈希；只有携带种子的请求才有确定的结果，才可以缓存。"""
+
+    fields = {
+        "prompt": " ".join(prompt.split()),
+        "model": model,
+        "size": size.lower(),
+        "batch": batch,
+        "seed": seed,
+        "referenceImage": reference_image or "",
+    }
+    encoded = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """按请求键保存生成结果图片的磁盘 LRU 缓存，目录结构为 ``<root>/<ab>/<key>/<n>.png``。
+
+    条目记录在 SQLite 索引中：超过 ``max_age`` 秒的条目视为过期，总大小超过 ``max_bytes``
+    时按最近使用时间淘汰最旧的条目。写入先在临时目录完成再整体改名，读者不会看到不完整的条目。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        max_age: float = _DEFAULT_MAX_AGE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.root = root
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+
+    def get(self, key: str) -> List[Path] | None:
+        """返回缓存的图片路径并刷新使用时间；不存在、过期或文件缺失时返回 ``None``。"""
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT files, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            now = self._clock()
+            paths = [self._entry_dir(key) / name for name in json.loads(row[0])] if row is not None else []
+            if row is None or now - row[1] > self._max_age or not all(path.is_file() for path in paths):
+                if row is not None:
+                    self._drop(conn, key)
+                    self._evicted += 1
+                self._misses += 1
+                return None
+            with conn:
+                conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+            self._hits += 1
+            return paths
+
+    def put(self, key: str, sources: Sequence[Path]) -> List[Path]:
+        """把一次生成的全部结果图片存入缓存（优先硬链接），返回缓存中的路径。"""
+
+        target = self._entry_dir(key)
+        staging = target.with_name(f".{key}.{uuid.uuid4().hex[:8]}")
+        staging.mkdir(parents=True, exist_ok=True)
+        names: List[str] = []
+        size = 0
+        try:
+            for index, source in enumerate(sources, start=1):
+                name = f"{index}{source.suffix or '.png'}"
+                try:
+                    os.link(source, staging / name)
+                except OSError:
+                    shutil.copy2(source, staging / name)
+                names.append(name)
+                size += (staging / name).stat().st_size
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        with self._lock:
+            conn = self._connect()
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+            now = self._clock()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, files, size, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(names), size, now, now),
+                )
+            self._evict(conn, now)
+        return [target / name for name in names]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._conn is None and not (self.root / _DB_NAME).exists():
+                entries, size = 0, 0
+            else:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+        return {
+            "entries": int(entries),
+            "bytes": int(size),
+            "maxBytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evicted": self._evicted,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """调用方需持有 ``_lock``：先删除过期条目，再按 LRU 把总大小压到上限以内。"""
+
+        removed = 0
+        for (key,) in conn.execute("SELECT key FROM entries WHERE created_at < ?", (now - self._max_age,)).fetchall():
+            self._drop(conn, key)
+            removed += 1
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total > self._max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY used_at").fetchall():
+                if total <= self._max_bytes:
+                    break
+                self._drop(conn, key)
+                total -= size
+                removed += 1
+        if removed:
+            self._evicted += removed
+            logger.info("结果缓存淘汰 %d 个条目", removed)
+        return removed
+
+    def _drop(self, conn: sqlite3.Connection, key: str) -> None:
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / _DB_NAME, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, files TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used_at)")
+            self._conn = conn
+        return self._conn
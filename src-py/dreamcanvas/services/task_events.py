@@ -0,0 +1,130 @@
+"""任务状态变更的进程内事件总线，供 SSE 推送与断点续传使用。"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Collection, Deque, Dict, List, Tuple
+
+from ..models.tasks import GenerationTaskInfo
+
+_DEFAULT_HISTORY_SIZE = 2048
+_DEFAULT_HEARTBEAT = 15.0
+
+
+@dataclass(slots=True, frozen=True)
+class TaskEvent:
+    """一次任务变更；``payload`` 为变更后按 API 别名导出的任务快照，发布后不再修改。"""
+
+    cursor: int
+    payload: Dict[str, Any]
+
+    @property
+    def task(self) -> GenerationTaskInfo:
+        return GenerationTaskInfo.model_validate(self.payload)
+
+    @property
+    def task_id(self) -> str:
+        return str(self.payload["taskId"])
+
+    @property
+    def project_id(self) -> str | None:
+        value = (self.payload.get("metadata") or {}).get("projectId")
+        return str(value) if value else None
+
+    def matches(self, task_ids: Collection[str] | None, project_ids: Collection[str] | None) -> bool:
+        if task_ids and self.task_id not in task_ids:
+            return False
+        if project_ids and self.project_id not in project_ids:
+            return False
+        return True
+
+    def to_sse(self) -> str:
+        data = json.dumps(
+            {"cursor": self.cursor, "task": self.payload},
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return f"id: {self.cursor}\nevent: task\ndata: {data}\n\n"
+
+
+class TaskEventBus:
+    """保存最近 ``history_size`` 条任务变更，并唤醒等待中的订阅者。
+
+    游标单调递增；订阅者携带游标重连时会先补发缓冲区内更新的事件，
+    若游标已被缓冲区淘汰则返回 ``reset`` 标记，提示客户端重新全量拉取。
+    """
+
+    def __init__(self, *, history_size: int = _DEFAULT_HISTORY_SIZE) -> None:
+        if history_size < 1:
+            raise ValueError("history_size 必须大于 0")
+        self._events: Deque[TaskEvent] = deque(maxlen=history_size)
+        self._cursor = 0
+        self._signal = asyncio.Event()
+        self._subscribers = 0
+
+    @property
+    def cursor(self) -> int:
+        return self._cursor
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscribers
+
+    def publish(self, task: GenerationTaskInfo | Dict[str, Any]) -> TaskEvent:
+        self._cursor += 1
+        payload = task if isinstance(task, dict) else task.model_dump(by_alias=True, mode="json")
+        event = TaskEvent(cursor=self._cursor, payload=payload)
+        self._events.append(event)
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+        return event
+
+    def events_since(
+        self,
+        cursor: int,
+        *,
+        task_ids: Collection[str] | None = None,
+        project_ids: Collection[str] | None = None,
+    ) -> Tuple[List[TaskEvent], bool]:
+        """返回游标之后的匹配事件，以及游标是否已失效（需要客户端重置）。"""
+
+        if cursor > self._cursor:
+            return [], True
+        oldest = self._events[0].cursor if self._events else self._cursor + 1
+        reset = cursor + 1 < oldest and cursor < self._cursor
+        events = [
+            event
+            for event in self._events
+            if event.cursor > cursor and event.matches(task_ids, project_ids)
+        ]
+        return events, reset
+
+    async def subscribe(
+        self,
+        *,
+        cursor: int | None = None,
+        task_ids: Collection[str] | None = None,
+        project_ids: Collection[str] | None = None,
+        heartbeat: float = _DEFAULT_HEARTBEAT,
+    ) -> AsyncIterator[TaskEvent | None]:
+        """持续产出匹配的事件；超过 ``heartbeat`` 秒无事件时产出 ``None`` 作为心跳。"""
+
+        position = self._cursor if cursor is None else min(cursor, self._cursor)
+        self._subscribers += 1
+        try:
+            while True:
+                signal = self._signal
+                events, _ = self.events_since(position, task_ids=task_ids, project_ids=project_ids)
+                position = self._cursor
+                for event in events:
+                    yield event
+                try:
+                    await asyncio.wait_for(signal.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers -= 1
@@ -0,0 +1,288 @@
+"""即梦任务的追加式持久化日志，用于进程重启后恢复任务表与轮询。"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..models.tasks import TERMINAL_STATUSES, GenerationTaskInfo
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_NAME = "snapshot.jsonl"
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".jsonl"
+_DEFAULT_SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+_DEFAULT_COMPACT_AFTER_SEGMENTS = 4
+_DEFAULT_MAX_TERMINAL_RECORDS = 50_000
+_DEFAULT_COMMIT_BATCH = 512
+_STOP = object()
+_COMPACT = object()
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    """日志回放后单个任务的最新状态。"""
+
+    task: Dict[str, Any]
+    context: Optional[Dict[str, Any]] = None
+
+    @property
+    def task_id(self) -> str:
+        return str(self.task.get("taskId"))
+
+    @property
+    def terminal(self) -> bool:
+        return str(self.task.get("status")) in TERMINAL_STATUSES
+
+
+class TaskJournal:
+    """分段 JSONL 任务日志。
+
+    - ``append``/``drop`` 只把快照放入内存队列，序列化与写盘由后台线程完成，
+      不阻塞事件循环；后台线程一次取出队列中的全部记录，合并为一次写入与 fsync（组提交）。
+    - 活动分段超过 ``segment_max_bytes`` 后滚动到新分段；已封存分段达到
+      ``compact_after_segments`` 个时折叠进 ``snapshot.jsonl``，每个任务只保留最后一条记录，
+      终态任务只保留最近 ``max_terminal_records`` 条，使启动回放时间保持有界。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        segment_max_bytes: int = _DEFAULT_SEGMENT_MAX_BYTES,
+        compact_after_segments: int = _DEFAULT_COMPACT_AFTER_SEGMENTS,
+        max_terminal_records: int = _DEFAULT_MAX_TERMINAL_RECORDS,
+        commit_batch: int = _DEFAULT_COMMIT_BATCH,
+    ) -> None:
+        self.root = root
+        self._segment_max_bytes = segment_max_bytes
+        self._compact_after_segments = max(1, compact_after_segments)
+        self._max_terminal_records = max_terminal_records
+        self._commit_batch = max(1, commit_batch)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self._active_seq: int | None = None
+        self._active_file: Any = None
+        self._active_bytes = 0
+        self._records_written = 0
+        self._commits = 0
+        self._compactions = 0
+
+    def load(self) -> Dict[str, JournalEntry]:
+        """回放快照与全部分段，返回每个任务的最新记录。需在写入前调用。"""
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        entries: Dict[str, JournalEntry] = {}
+        self._fold(self._iter_lines(self.root / _SNAPSHOT_NAME), entries)
+        for _, path in self._segments():
+            self._fold(self._iter_lines(path), entries)
+        return entries
+
+    def append(self, task: GenerationTaskInfo | Dict[str, Any], context: Dict[str, Any] | None = None) -> None:
+        """追加任务快照；``task`` 也可以是按别名导出的 JSON 字典（调用后不得再修改）。"""
+
+        self._ensure_writer()
+        self._queue.put(("put", task, dict(context) if context else None))
+
+    def drop(self, task_id: str) -> None:
+        self._ensure_writer()
+        self._queue.put(("drop", task_id, None))
+
+    def compact(self) -> None:
+        self._ensure_writer()
+        self._queue.put(_COMPACT)
+
+    def flush(self) -> None:
+        """阻塞直到队列中已提交的记录全部落盘。"""
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.root),
+            "segments": len(self._segments()),
+            "pending": self._queue.qsize(),
+            "records": self._records_written,
+            "commits": self._commits,
+            "compactions": self._compactions,
+        }
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jimeng-task-journal", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._commit_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            compact = any(item is _COMPACT for item in batch)
+            try:
+                lines: List[str] = []
+                for item in batch:
+                    if not isinstance(item, tuple):
+                        continue
+                    try:
+                        lines.append(self._encode(item))
+                    except Exception as exc:
+                        # 单条记录无法序列化时只丢弃这一条，同批其余记录照常写入。
+                        logger.exception("任务日志记录序列化失败，已跳过：%s", exc)
+                if lines:
+                    self._write(lines)
+                if compact or self._should_compact():
+                    self._compact()
+                if stop:
+                    self._close_active()
+            except Exception as exc:
+                # 写线程必须存活：退出后 flush 会永久阻塞，之后的日志也会全部丢失。
+                logger.exception("写入任务日志失败：%s", exc)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _encode(self, item: Tuple[str, Any, Any]) -> str:
+        op, value, context = item
+        if op == "drop":
+            record: Dict[str, Any] = {"op": "drop", "taskId": value}
+        else:
+            payload = value if isinstance(value, dict) else value.model_dump(by_alias=True, mode="json")
+            record = {"op": "put", "task": payload}
+            if context:
+                record["context"] = context
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def _write(self, lines: List[str]) -> None:
+        if self._active_file is None:
+            self._open_segment()
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        self._active_file.write(data)
+        self._active_file.flush()
+        os.fsync(self._active_file.fileno())
+        self._active_bytes += len(data)
+        self._records_written += len(lines)
+        self._commits += 1
+        if self._active_bytes >= self._segment_max_bytes:
+            self._close_active()
+
+    def _open_segment(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        seq = (segments[-1][0] + 1) if segments else 1
+        self._active_seq = seq
+        self._active_file = open(self.root / f"{_SEGMENT_PREFIX}{seq:08d}{_SEGMENT_SUFFIX}", "ab")
+        self._active_bytes = 0
+
+    def _close_active(self) -> None:
+        if self._active_file is not None:
+            self._active_file.close()
+        self._active_file = None
+        self._active_seq = None
+        self._active_bytes = 0
+
+    def _sealed_segments(self) -> List[Tuple[int, Path]]:
+        return [(seq, path) for seq, path in self._segments() if seq != self._active_seq]
+
+    def _should_compact(self) -> bool:
+        return len(self._sealed_segments()) >= self._compact_after_segments
+
+    def _compact(self) -> None:
+        sealed = self._sealed_segments()
+        snapshot_path = self.root / _SNAPSHOT_NAME
+        entries: Dict[str, JournalEntry] = {}
+        self._fold(self._iter_lines(snapshot_path), entries)
+        for _, path in sealed:
+            self._fold(self._iter_lines(path), entries)
+        retained = self._apply_retention(entries.values())
+
+        tmp_path = snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as handle:
+            for entry in retained:
+                record: Dict[str, Any] = {"op": "put", "task": entry.task}
+                if entry.context and not entry.terminal:
+                    record["context"] = entry.context
+                handle.write((json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, snapshot_path)
+        for _, path in sealed:
+            path.unlink(missing_ok=True)
+        self._compactions += 1
+
+    def _apply_retention(self, entries: Iterable[JournalEntry]) -> List[JournalEntry]:
+        active: List[JournalEntry] = []
+        terminal: List[JournalEntry] = []
+        for entry in entries:
+            (terminal if entry.terminal else active).append(entry)
+        if len(terminal) > self._max_terminal_records:
+            terminal.sort(key=lambda item: int(item.task.get("updatedAt") or 0), reverse=True)
+            terminal = terminal[: self._max_terminal_records]
+        return active + terminal
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        if not self.root.exists():
+            return []
+        result: List[Tuple[int, Path]] = []
+        for path in self.root.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"):
+            try:
+                seq = int(path.stem[len(_SEGMENT_PREFIX) :])
+            except ValueError:
+                continue
+            result.append((seq, path))
+        result.sort()
+        return result
+
+    @staticmethod
+    def _iter_lines(path: Path) -> Iterable[str]:
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as handle:
+            yield from handle
+
+    @staticmethod
+    def _fold(lines: Iterable[str], entries: Dict[str, JournalEntry]) -> None:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 进程崩溃可能留下半行记录，直接跳过。
+                logger.warning("跳过损坏的任务日志记录")
+                continue
+            if record.get("op") == "drop":
+                entries.pop(str(record.get("taskId")), None)
+                continue
+            task = record.get("task")
+            if not isinstance(task, dict) or not task.get("taskId"):
+                continue
+            entry = JournalEntry(task=task, context=record.get("context"))
+            entries.pop(entry.task_id, None)
+            entries[entry.task_id] = entry
@@ -0,0 +1,378 @@
+"""有界的任务注册表与磁盘归档。"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.tasks import TERMINAL_STATUSES, GenerationTaskInfo, TaskStatus
+
+_DEFAULT_MAX_TERMINAL = 5000
+_DEFAULT_TERMINAL_TTL = 24 * 60 * 60.0
+_DEFAULT_TRACE_LIMIT = 64
+_SIZE_SAMPLE = 32
+
+ArchivedTask = Tuple[GenerationTaskInfo, List[Dict[str, Any]]]
+
+
+def _status_value(status: TaskStatus | str) -> str:
+    return status.value if isinstance(status, TaskStatus) else str(status)
+
+
+def _deep_sizeof(value: Any, seen: set[int] | None = None) -> int:
+    """粗略估算对象占用的内存，仅用于诊断展示。"""
+
+    seen = seen if seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(_deep_sizeof(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += _deep_sizeof(vars(value), seen)
+    return size
+
+
+@dataclass(slots=True, eq=False)
+class TaskRecord:
+    """任务的内部可变记录。
+
+    轮询结果直接原地修改字段并记录脏字段集合。提交时只生成轻量的 ``to_payload``
+    字典供事件与日志使用；对外暴露的 ``GenerationTaskInfo`` 只在 API 需要时由
+    ``to_model`` 构建，并缓存到下一次修改为止。两者都会复制容器字段，
+    之后的原地修改不会影响已发布的内容。
+    """
+
+    task_id: str
+    prompt: str
+    status: str
+    created_at: int
+    updated_at: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    result_uris: List[str] = field(default_factory=list)
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+    dirty: set[str] = field(default_factory=set)
+    _snapshot: Optional[GenerationTaskInfo] = None
+    _fresh: bool = False
+
+    @classmethod
+    def from_model(cls, task: GenerationTaskInfo) -> "TaskRecord":
+        return cls(
+            task_id=task.task_id,
+            prompt=task.prompt,
+            status=_status_value(task.status),
+            created_at=task.created_at,
+            updated_at=task.updated_at,
+            metadata=dict(task.metadata),
+            result_uris=list(task.result_uris),
+            error_code=task.error_code,
+            error_message=task.error_message,
+            _snapshot=task,
+            _fresh=True,
+        )
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def update(self, **fields: Any) -> bool:
+        """更新字段，返回是否有字段真正发生变化。"""
+
+        changed = False
+        for name, value in fields.items():
+            if isinstance(value, TaskStatus):
+                value = value.value
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self.dirty.add(name)
+                changed = True
+        if changed:
+            self._fresh = False
+        return changed
+
+    def apply_result(
+        self,
+        status: TaskStatus | str,
+        result_uris: List[str],
+        error_code: Optional[str],
+        error_message: Optional[str],
+    ) -> bool:
+        """合并一次轮询结果；``update`` 的展开版本，位于每次轮询的热路径上。"""
+
+        dirty = self.dirty
+        status = _status_value(status)
+        if self.status != status:
+            self.status = status
+            dirty.add("status")
+        if self.result_uris != result_uris:
+            self.result_uris = list(result_uris)
+            dirty.add("result_uris")
+        if self.error_code != error_code:
+            self.error_code = error_code
+            dirty.add("error_code")
+        if self.error_message != error_message:
+            self.error_message = error_message
+            dirty.add("error_message")
+        if dirty:
+            self._fresh = False
+        return bool(dirty)
+
+    def set_metadata(self, key: str, value: Any) -> bool:
+        metadata = self.metadata
+        if key in metadata and metadata[key] == value:
+            return False
+        metadata[key] = value
+        self.dirty.add("metadata")
+        self._fresh = False
+        return True
+
+    def touch(self, now_ms: int) -> None:
+        self.updated_at = now_ms
+        self.dirty.add("updated_at")
+        self._fresh = False
+
+    def to_payload(self) -> Dict[str, Any]:
+        """按 API 字段别名导出的 JSON 字典，与 ``model_dump(by_alias=True, mode="json")`` 一致。"""
+
+        return {
+            "taskId": self.task_id,
+            "prompt": self.prompt,
+            "status": self.status,
+            "metadata": dict(self.metadata),
+            "resultUris": list(self.result_uris),
+            "errorCode": self.error_code,
+            "errorMessage": self.error_message,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+        }
+
+    def to_model(self) -> GenerationTaskInfo:
+        snapshot = self._snapshot
+        if self._fresh and snapshot is not None:
+            return snapshot
+        fields = {
+            "status": self.status,
+            "metadata": dict(self.metadata),
+            "result_uris": list(self.result_uris),
+            "error_code": self.error_code,
+            "error_message": self.error_message,
+            "updated_at": self.updated_at,
+        }
+        if snapshot is None:
+            snapshot = GenerationTaskInfo(
+                task_id=self.task_id,
+                prompt=self.prompt,
+                created_at=self.created_at,
+                **fields,
+            )
+        else:
+            # 字段值均来自已校验的快照或服务内部，基于上一份快照复制并覆盖可变字段，跳过重新校验。
+            snapshot = snapshot.model_copy(update=fields)
+        self._snapshot = snapshot
+        self._fresh = True
+        return snapshot
+
+
+class TaskArchive:
+    """SQLite 任务归档，保存被注册表淘汰的终态任务及其 trace。
+
+    写入采用 write-behind：``stage`` 仅放入内存待写区（查询时优先命中），
+    ``flush`` 在工作线程中批量落盘。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: Dict[str, ArchivedTask] = {}
+        self._conn: sqlite3.Connection | None = None
+
+    def stage(self, items: Iterable[ArchivedTask]) -> None:
+        with self._lock:
+            for task, trace in items:
+                self._pending[task.task_id] = (task, trace)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        with self._lock:
+            if not self._pending:
+                return 0
+            items = list(self._pending.values())
+            rows = [
+                (
+                    task.task_id,
+                    task.updated_at,
+                    task.model_dump_json(by_alias=True),
+                    json.dumps(trace, ensure_ascii=False, default=str),
+                )
+                for task, trace in items
+            ]
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tasks (task_id, updated_at, payload, trace) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            for task, _ in items:
+                if self._pending.get(task.task_id, (None,))[0] is task:
+                    del self._pending[task.task_id]
+            return len(rows)
+
+    def load(self, task_id: str) -> Optional[ArchivedTask]:
+        with self._lock:
+            pending = self._pending.get(task_id)
+            if pending is not None:
+                return pending
+            if self._conn is None and not self.path.exists():
+                return None
+            row = self._connect().execute(
+                "SELECT payload, trace FROM tasks WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        task = GenerationTaskInfo.model_validate_json(row[0])
+        trace = json.loads(row[1]) if row[1] else []
+        return task, trace
+
+    def count(self) -> int:
+        with self._lock:
+            if self._conn is None and not self.path.exists():
+                return len(self._pending)
+            (total,) = self._connect().execute("SELECT COUNT(*) FROM tasks").fetchone()
+            return int(total) + len(self._pending)
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "task_id TEXT PRIMARY KEY, updated_at INTEGER NOT NULL, payload TEXT NOT NULL, trace TEXT)"
+            )
+            self._conn = conn
+        return self._conn
+
+
+class TaskRegistry:
+    """内存任务表：非终态任务常驻，终态任务受数量上限与 TTL 约束，trace 使用环形缓冲。
+
+    保存的是可变的 ``TaskRecord``；记录变化后调用 ``put`` 更新终态淘汰顺序。
+    ``put``/``evict_expired`` 返回被淘汰任务的快照与 trace，由调用方决定写入归档。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_terminal: int = _DEFAULT_MAX_TERMINAL,
+        terminal_ttl: float = _DEFAULT_TERMINAL_TTL,
+        trace_limit: int = _DEFAULT_TRACE_LIMIT,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._max_terminal = max(0, max_terminal)
+        self._terminal_ttl = terminal_ttl
+        self._trace_limit = max(1, trace_limit)
+        self._clock = clock
+        self._tasks: Dict[str, TaskRecord] = {}
+        self._terminal: "OrderedDict[str, float]" = OrderedDict()
+        self._traces: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._evicted = 0
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[TaskRecord]:
+        return iter(self._tasks.values())
+
+    def get(self, task_id: str) -> TaskRecord | None:
+        return self._tasks.get(task_id)
+
+    def put(self, record: TaskRecord) -> List[ArchivedTask]:
+        task_id = record.task_id
+        self._tasks[task_id] = record
+        if record.terminal and task_id not in self._terminal:
+            self._terminal[task_id] = self._clock()
+        evicted: List[ArchivedTask] = []
+        while len(self._terminal) > self._max_terminal:
+            oldest, _ = self._terminal.popitem(last=False)
+            evicted.append(self._evict(oldest))
+        return evicted
+
+    def evict_expired(self) -> List[ArchivedTask]:
+        if self._terminal_ttl <= 0:
+            return []
+        cutoff = self._clock() - self._terminal_ttl
+        evicted: List[ArchivedTask] = []
+        while self._terminal:
+            task_id, finished_at = next(iter(self._terminal.items()))
+            if finished_at > cutoff:
+                break
+            self._terminal.popitem(last=False)
+            evicted.append(self._evict(task_id))
+        return evicted
+
+    def record_trace(self, task_id: str, entry: Dict[str, Any]) -> None:
+        trace = self._traces.get(task_id)
+        if trace is None:
+            trace = self._traces[task_id] = deque(maxlen=self._trace_limit)
+        trace.append(entry)
+
+    def trace(self, task_id: str) -> List[Dict[str, Any]] | None:
+        trace = self._traces.get(task_id)
+        return None if trace is None else list(trace)
+
+    def stats(self) -> Dict[str, Any]:
+        terminal = len(self._terminal)
+        trace_events = sum(len(trace) for trace in self._traces.values())
+        sample = [
+            (record.task_id, record.prompt, record.metadata, record.result_uris, record.error_message)
+            for record in list(self._tasks.values())[-_SIZE_SAMPLE:]
+        ]
+        per_task = (_deep_sizeof(sample) / len(sample)) if sample else 0
+        return {
+            "total": len(self._tasks),
+            "active": len(self._tasks) - terminal,
+            "terminal": terminal,
+            "evicted": self._evicted,
+            "traceEvents": trace_events,
+            "limits": {
+                "maxTerminal": self._max_terminal,
+                "terminalTtlSeconds": self._terminal_ttl,
+                "traceLimit": self._trace_limit,
+            },
+            "estimatedBytes": {
+                "tasks": int(per_task * len(self._tasks)),
+                "traces": _deep_sizeof(self._traces),
+            },
+        }
+
+    def _evict(self, task_id: str) -> ArchivedTask:
+        self._evicted += 1
+        record = self._tasks.pop(task_id)
+        trace = self._traces.pop(task_id, None)
+        return record.to_model(), list(trace or ())
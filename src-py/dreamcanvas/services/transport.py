@@ -0,0 +1,121 @@
+"""即梦 HTTP 连接池配置：API 与 CDN 下载分别使用独立的 ``httpx.AsyncClient``。"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict
+
+import httpx
+
+if TYPE_CHECKING:  # pragma: no cover
+    from httpx._types import ProxiesTypes
+
+logger = logging.getLogger(__name__)
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(slots=True, frozen=True)
+class TransportConfig:
+    """即梦客户端的连接配置。
+
+    签名 API 请求（提交、轮询）延迟敏感、响应小；结果图片下载体积大、耗时长。
+    两者使用各自的连接池，避免大文件下载占满连接导致轮询排队。
+    ``http2`` 开启后同一主机的请求复用一条多路复用连接，需要安装 ``h2``（``httpx[http2]``），
+    未安装时自动回退到 HTTP/1.1。``base_url`` 为空时连接即梦官方地址，
+    压测时可指向本地模拟服务（``dreamcanvas.devtools.jimeng_standin``）。
+    """
+
+    base_url: str | None = None
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    cdn_max_connections: int = 8
+    cdn_max_keepalive: int = 4
+    cdn_read_timeout: float = 60.0
+
+    @property
+    def http2_enabled(self) -> bool:
+        return self.http2 and _HTTP2_AVAILABLE
+
+    def api_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def cdn_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.cdn_max_connections,
+            max_keepalive_connections=self.cdn_max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def api_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(connect=self.connect_timeout, read=self.read_timeout, write=30.0, pool=10.0)
+
+    def cdn_timeout(self) -> httpx.Timeout:
+        # 下载可能在连接池外等待较久，pool 超时放宽到与读取一致。
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.cdn_read_timeout,
+            write=30.0,
+            pool=self.cdn_read_timeout,
+        )
+
+
+def parse_proxies(config: object) -> ProxiesTypes | None:
+    """解析 secrets 中的 ``proxy`` 配置：字符串或 ``{"http", "https"}`` 映射，空值与其他形状视为未配置。
+
+    httpx 要求映射的键是 ``http://`` 这样的 URL 形式，模板中的裸协议名在这里补全。
+    """
+
+    if isinstance(config, str):
+        return config.strip() or None
+    if isinstance(config, dict):
+        result: Dict[httpx.URL | str, httpx.URL | str | httpx.Proxy | None] = {}
+        for key, value in config.items():
+            if not isinstance(value, str) or not value.strip():
+                continue
+            pattern = str(key).strip()
+            result[pattern if "://" in pattern else f"{pattern}://"] = value.strip()
+        return result or None
+    if config is not None:
+        logger.warning("代理配置格式无效（%s），已忽略", type(config).__name__)
+    return None
+
+
+def build_api_client(
+    config: TransportConfig,
+    *,
+    base_url: str,
+    proxies: ProxiesTypes | None = None,
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=config.api_timeout(),
+        limits=config.api_limits(),
+        http2=_http2(config),
+        proxies=proxies,
+    )
+
+
+def build_cdn_client(config: TransportConfig, *, proxies: ProxiesTypes | None = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=config.cdn_timeout(),
+        limits=config.cdn_limits(),
+        http2=config.http2_enabled,
+        proxies=proxies,
+    )
+
+
+def _http2(config: TransportConfig) -> bool:
+    if config.http2 and not _HTTP2_AVAILABLE:
+        logger.warning("未安装 h2，即梦客户端回退为 HTTP/1.1；如需 HTTP/2 请安装 httpx[http2]")
+    return config.http2_enabled
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from collections.abc import AsyncIterator
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import pytest
 from httpx import AsyncClient
@@ -13,6 +13,7 @@ from dreamcanvas.config.settings import get_settings
 from dreamcanvas.models.tasks import TaskStatus
 from dreamcanvas.services.jimeng import JimengService
 from dreamcanvas.services.jimeng_client import JimengSubmissionResult
+from dreamcanvas.services.project_io import AsyncProjectStorage
 from dreamcanvas.services.projects import ProjectStorage
 
 
@@ -22,6 +23,7 @@ class MockJimengClient:
     def __init__(self) -> None:
         self.account_label = "mock"
         self._states: Dict[str, Dict[str, Any]] = {}
+        self.history_batches: List[List[str]] = []
 
     async def submit_generation(
         self,
@@ -30,6 +32,8 @@ class MockJimengClient:
         model: str | None,
         size: str | None,
         batch: int,
+        inline_poll: bool = True,
+        seed: int | None = None,
     ) -> JimengSubmissionResult:
         history_id = uuid.uuid4().hex
         scenario = "quota" if "#quota" in (prompt or "").lower() else "success"
@@ -46,6 +50,10 @@ class MockJimengClient:
             queue_info=None,
         )
 
+    async def fetch_histories(self, history_ids: List[str]) -> Dict[str, JimengSubmissionResult]:
+        self.history_batches.append(list(history_ids))
+        return {history_id: await self.fetch_history(history_id) for history_id in history_ids}
+
     async def fetch_history(self, history_id: str) -> JimengSubmissionResult:
         state = self._states.get(history_id)
         if state is None:
@@ -95,6 +103,13 @@ class MockJimengClient:
     async def fetch_resource(self, url: str) -> bytes:
         return b"mock-binary"
 
+    async def stream_resource(self, url: str, consume: Any, *, chunk_size: int = 65536) -> Any:
+        async def _chunks() -> AsyncIterator[bytes]:
+            yield b"mock-"
+            yield b"binary"
+
+        return await consume(_chunks())
+
     async def aclose(self) -> None:
         return None
 
@@ -110,20 +125,25 @@ async def api_client_fixture(
     monkeypatch.setenv("DC_LOG_DIR", str(base / "logs"))
     monkeypatch.setenv("DC_PROJECTS_DIR", str(base / "projects"))
     monkeypatch.setenv("DC_BACKUPS_DIR", str(base / "backups"))
+    monkeypatch.setenv("DC_TASKS_DIR", str(base / "tasks"))
     get_settings.cache_clear()
 
     app = create_app()
     app.state.project_storage = ProjectStorage(base / "projects")
+    app.state.project_io = AsyncProjectStorage(app.state.project_storage)
     app.state.jimeng_service = JimengService(
         config={"sessionid": "mock-session", "account_name": "mock"},
         client=MockJimengClient(),
         proxy_config=None,
         poll_interval=0.05,
         poll_timeout=2.0,
-        project_storage=app.state.project_storage,
+        project_storage=app.state.project_io,
     )
 
     async with AsyncClient(app=app, base_url="http://test") as client:
         yield client
 
+    await app.state.jimeng_service.aclose()
+    await app.state.project_io.aclose()
+
     get_settings.cache_clear()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from dreamcanvas.services.asset_downloader import AssetDownloader, DownloadResult
+from dreamcanvas.services.jimeng_client import JimengApiError, JimengClient
+from dreamcanvas.services.resilience import RetryPolicy
+
+
+class _InterruptedStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b"partial"
+        raise httpx.ReadError("connection reset")
+
+
+def _client(handler) -> JimengClient:
+    client = JimengClient(
+        sessionid="mock-session",
+        retry_policy=RetryPolicy(attempts=2, base_delay=0.001, max_delay=0.01),
+    )
+    client._cdn_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_downloads_stream_to_disk_and_retry_interrupted_transfers(tmp_path):
+    body = bytes(range(256)) * 1024
+    attempts: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        attempts[path] = attempts.get(path, 0) + 1
+        if path == "/missing.png":
+            return httpx.Response(404)
+        if path == "/flaky.png" and attempts[path] == 1:
+            return httpx.Response(200, stream=_InterruptedStream())
+        return httpx.Response(200, content=body)
+
+    client = _client(handler)
+    downloader = AssetDownloader(max_concurrent=2, per_task=2, chunk_size=4096)
+    try:
+        results = await downloader.download_all(
+            client,
+            [
+                ("https://cdn.example.invalid/ok.png", tmp_path / "a.png"),
+                ("https://cdn.example.invalid/flaky.png", tmp_path / "b.png"),
+                ("https://cdn.example.invalid/missing.png", tmp_path / "c.png"),
+            ],
+        )
+    finally:
+        await client.aclose()
+
+    assert isinstance(results[0], DownloadResult) and isinstance(results[1], DownloadResult)
+    assert isinstance(results[2], JimengApiError) and results[2].code == "404"
+    assert (tmp_path / "a.png").read_bytes() == body
+    assert (tmp_path / "b.png").read_bytes() == body
+    assert attempts["/flaky.png"] == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.png", "b.png"]
+    stats = downloader.stats()
+    assert stats["completed"] == 2 and stats["failed"] == 1 and stats["bytes"] == 2 * len(body)
+
+
+class _GatedClient:
+    """每个下载在对应的事件被触发前不会结束，用于观察下载名额的分配顺序。"""
+
+    def __init__(self) -> None:
+        self.started: list[str] = []
+        self.gates: dict[str, asyncio.Event] = {}
+
+    async def stream_resource(self, url, consume, *, chunk_size=65536):
+        self.started.append(url)
+        gate = self.gates.setdefault(url, asyncio.Event())
+
+        async def _chunks():
+            await gate.wait()
+            yield url.encode()
+
+        return await consume(_chunks())
+
+
+@pytest.mark.asyncio
+async def test_foreground_downloads_overtake_queued_background_downloads(tmp_path):
+    client = _GatedClient()
+    downloader = AssetDownloader(max_concurrent=2, per_task=4, max_background=2)
+    first = asyncio.create_task(downloader.download(client, "bg-1", tmp_path / "bg-1", background=True))
+    second = asyncio.create_task(downloader.download(client, "bg-2", tmp_path / "bg-2", background=True))
+    third = asyncio.create_task(downloader.download(client, "bg-3", tmp_path / "bg-3", background=True))
+    await asyncio.sleep(0.01)
+    assert client.started == ["bg-1", "bg-2"]
+    assert downloader.stats()["activeBackground"] == 2
+
+    preview = asyncio.create_task(downloader.download(client, "preview", tmp_path / "preview"))
+    await asyncio.sleep(0.01)
+    client.gates["bg-1"].set()
+    await first
+    await asyncio.sleep(0.01)
+    # 释放的名额先交给等待中的前台下载，后台下载继续排队。
+    assert client.started == ["bg-1", "bg-2", "preview"]
+
+    client.gates["preview"].set()
+    await preview
+    await asyncio.sleep(0.01)
+    assert client.started[-1] == "bg-3"
+    client.gates["bg-2"].set()
+    client.gates["bg-3"].set()
+    await asyncio.gather(second, third)
+    assert downloader.stats()["completed"] == 4
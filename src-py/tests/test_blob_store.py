@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import shutil
+import zipfile
+
+from dreamcanvas.services.blob_store import BlobStore, write_backup
+
+
+def _write(root, project_id: str, name: str, content: bytes):
+    path = root / project_id / "assets" / "images" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_duplicate_assets_share_one_blob_and_gc_respects_references(tmp_path):
+    projects = tmp_path / "projects"
+    store = BlobStore(projects / ".blobs")
+    digest = "ab" * 32
+    first = _write(projects, "p1", "t1-1.png", b"same-image")
+    second = _write(projects, "p2", "t2-1.png", b"same-image")
+    try:
+        assert store.adopt(first, digest, project_id="p1", asset_id="t1-1", relative_path="assets/images/t1-1.png") is False
+        assert store.adopt(second, digest, project_id="p2", asset_id="t2-1", relative_path="assets/images/t2-1.png") is True
+        assert first.stat().st_ino == second.stat().st_ino == store.blob_path(digest).stat().st_ino
+        assert store.refcount(digest) == 2
+        assert store.stats() == {"blobs": 1, "bytes": len(b"same-image"), "refs": 2}
+
+        store.release("p1")
+        first.unlink()
+        assert store.gc() == (0, 0)
+
+        store.release("p2", "t2-1")
+        assert store.gc() == (0, 0), "项目文件仍硬链接到 blob 时不回收"
+        second.unlink()
+        assert store.gc() == (1, len(b"same-image"))
+        assert not store.blob_path(digest).exists()
+    finally:
+        store.close()
+
+
+def test_backup_stores_linked_assets_once_and_relink_restores_them(tmp_path):
+    projects = tmp_path / "projects"
+    store = BlobStore(projects / ".blobs")
+    digest = "cd" * 32
+    for project_id in ("p1", "p2"):
+        path = _write(projects, project_id, "t-1.png", b"x" * 4096)
+        store.adopt(path, digest, project_id=project_id, asset_id="t-1", relative_path="assets/images/t-1.png")
+    (projects / "p1" / "manifest.json").write_text("{}", encoding="utf-8")
+    try:
+        archive = write_backup(projects, tmp_path / "backup.zip", store)
+    finally:
+        store.close()
+
+    with zipfile.ZipFile(archive) as payload:
+        names = payload.namelist()
+        assert "p1/manifest.json" in names
+        assert not any(name.endswith("t-1.png") for name in names)
+        assert f".blobs/cd/cd/{digest}" in names
+        restored = tmp_path / "restored"
+        payload.extractall(restored)
+
+    restored_store = BlobStore(restored / ".blobs")
+    try:
+        assert restored_store.relink(restored) == 2
+    finally:
+        restored_store.close()
+    assert (restored / "p2" / "assets" / "images" / "t-1.png").read_bytes() == b"x" * 4096
+
+
+def test_prune_releases_assets_dropped_outside_the_service(tmp_path):
+    projects = tmp_path / "projects"
+    store = BlobStore(projects / ".blobs")
+    digest = "ef" * 32
+    for project_id, asset_id in (("kept", "a"), ("kept", "dropped"), ("deleted", "a")):
+        path = _write(projects, project_id, f"{asset_id}.png", b"pruned")
+        store.adopt(path, digest, project_id=project_id, asset_id=asset_id, relative_path=f"assets/images/{asset_id}.png")
+    (projects / "kept" / "manifest.json").write_text("{}", encoding="utf-8")
+    (projects / "kept" / "assets.json").write_text('[{"id": "a", "uri": "assets/images/a.png"}]', encoding="utf-8")
+    (projects / "kept" / "assets" / "images" / "dropped.png").unlink()
+    shutil.rmtree(projects / "deleted")
+    try:
+        assert store.prune(projects) == 2
+        assert store.refcount(digest) == 1
+        assert store.gc() == (0, 0), "仍被保留的资源引用"
+
+        (projects / "kept" / "assets.json").write_text("[]", encoding="utf-8")
+        (projects / "kept" / "assets" / "images" / "a.png").unlink()
+        assert store.prune(projects) == 1
+        assert store.gc() == (1, len(b"pruned"))
+    finally:
+        store.close()
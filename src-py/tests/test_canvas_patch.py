@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from dreamcanvas.services.canvas_patch import CanvasConflictError, CanvasPatchError, apply_patch
+from dreamcanvas.services.projects import ProjectStorage
+
+
+def test_apply_patch_follows_rfc6902_without_touching_the_original():
+    original = {"store": {"shape:a": {"x": 1, "tags": ["a"]}, "shape:b": {"x": 2}}, "schema": {"v": 1}}
+    patched = apply_patch(
+        original,
+        [
+            {"op": "test", "path": "/store/shape:a/x", "value": 1},
+            {"op": "replace", "path": "/store/shape:a/x", "value": 5},
+            {"op": "add", "path": "/store/shape:a/tags/-", "value": "b"},
+            {"op": "copy", "from": "/store/shape:b", "path": "/store/shape:c"},
+            {"op": "move", "from": "/store/shape:b", "path": "/store/shape:d"},
+            {"op": "remove", "path": "/store/shape:a/tags/0"},
+            {"op": "add", "path": "/meta~1x", "value": True},
+        ],
+    )
+
+    assert patched["store"] == {"shape:a": {"x": 5, "tags": ["b"]}, "shape:c": {"x": 2}, "shape:d": {"x": 2}}
+    assert patched["meta/x"] is True
+    assert original["store"]["shape:a"] == {"x": 1, "tags": ["a"]}
+    assert "shape:b" in original["store"]
+    # 未被修改的子树与原文档共享。
+    assert patched["schema"] is original["schema"]
+
+    with pytest.raises(CanvasPatchError, match="第 2 个操作"):
+        apply_patch(original, [{"op": "add", "path": "/x", "value": 1}, {"op": "remove", "path": "/missing"}])
+
+
+def test_patches_are_logged_and_replayed_after_restart(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project = storage.create_project("增量保存")
+    project_id = project.manifest.id
+    assert project.manifest.canvas_version == 0
+
+    first = storage.patch_canvas(project_id, [{"op": "add", "path": "/store", "value": {}}], base_version=0)
+    storage.patch_canvas(project_id, [{"op": "add", "path": "/store/a", "value": {"x": 1}}], base_version=first.version)
+    with pytest.raises(CanvasConflictError) as excinfo:
+        storage.patch_canvas(project_id, [{"op": "remove", "path": "/store"}], base_version=first.version)
+    assert excinfo.value.current_version == 2
+
+    # canvas.json 未被重写，补丁只追加到操作日志。
+    assert json.loads((tmp_path / project_id / "canvas.json").read_text(encoding="utf-8")) == {}
+    storage.close()
+
+    restarted = ProjectStorage(tmp_path)
+    loaded = restarted.load_project(project_id)
+    assert loaded.canvas == {"store": {"a": {"x": 1}}}
+    assert loaded.manifest.canvas_version == 2
+
+
+def test_log_is_compacted_in_background_and_full_save_supersedes_it(tmp_path: Path):
+    storage = ProjectStorage(tmp_path, compact_ops=3)
+    project_id = storage.create_project("合并").manifest.id
+    for version in range(3):
+        storage.patch_canvas(project_id, [{"op": "add", "path": f"/k{version}", "value": version}], base_version=version)
+    storage.close()
+
+    project_dir = tmp_path / project_id
+    assert json.loads((project_dir / "canvas.json").read_text(encoding="utf-8")) == {"k0": 0, "k1": 1, "k2": 2}
+    [header] = (project_dir / "canvas.ops.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(header)["base"] == 3
+
+    restarted = ProjectStorage(tmp_path)
+    restarted.patch_canvas(project_id, [{"op": "add", "path": "/k3", "value": 3}], base_version=3)
+    payload = restarted.load_project(project_id)
+    assert payload.canvas == {"k0": 0, "k1": 1, "k2": 2, "k3": 3}
+    saved = restarted.save_project(payload.model_copy(update={"canvas": {"fresh": True}}))
+    assert saved.manifest.canvas_version == 5
+    assert not (project_dir / "canvas.ops.jsonl").exists()
+    with pytest.raises(CanvasConflictError):
+        restarted.patch_canvas(project_id, [{"op": "remove", "path": "/fresh"}], base_version=4)
+
+
+def test_torn_log_line_is_truncated_on_load(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project_id = storage.create_project("崩溃恢复").manifest.id
+    storage.patch_canvas(project_id, [{"op": "add", "path": "/a", "value": 1}], base_version=0)
+    storage.close()
+    log_path = tmp_path / project_id / "canvas.ops.jsonl"
+    with log_path.open("ab") as handle:
+        handle.write(b'{"v":2,"at":0,"ops":[{"op":"add","pa')
+
+    restarted = ProjectStorage(tmp_path)
+    result = restarted.patch_canvas(project_id, [{"op": "add", "path": "/b", "value": 2}], base_version=1)
+    assert result.version == 2
+    assert ProjectStorage(tmp_path).load_project(project_id).canvas == {"a": 1, "b": 2}
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import json
 from typing import Any
 
 import pytest
@@ -65,3 +66,71 @@ async def test_jimeng_cancel_task(api_client: AsyncClient):
     cancel_resp.raise_for_status()
     payload = cancel_resp.json()
     assert payload["task"]["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_jimeng_idempotency_key_rejects_different_body(api_client: AsyncClient):
+    headers = {"Idempotency-Key": "api-click-1"}
+    first = await api_client.post("/jimeng/tasks", json={"prompt": "幂等提交", "simulateDelayMs": 200}, headers=headers)
+    first.raise_for_status()
+    task_id = first.json()["task"]["taskId"]
+
+    repeat = await api_client.post("/jimeng/tasks", json={"prompt": "幂等提交", "simulateDelayMs": 200}, headers=headers)
+    assert repeat.json()["task"]["taskId"] == task_id
+    conflict = await api_client.post("/jimeng/tasks", json={"prompt": "换了提示词"}, headers=headers)
+    assert conflict.status_code == 409
+    assert conflict.json()["detail"]["taskId"] == task_id
+
+
+@pytest.mark.asyncio
+async def test_jimeng_history_long_poll(api_client: AsyncClient):
+    resp = await api_client.post("/jimeng/tasks", json={"prompt": "长轮询任务"})
+    resp.raise_for_status()
+    task = resp.json()["task"]
+
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    resp = await api_client.get(
+        "/jimeng/history",
+        params={"taskId": task["taskId"], "wait": 2, "sinceUpdatedAt": task["updatedAt"]},
+    )
+    resp.raise_for_status()
+    updated = resp.json()["task"]
+    assert updated["updatedAt"] > task["updatedAt"]
+    assert loop.time() - started < 1.5
+
+
+@pytest.mark.asyncio
+async def test_jimeng_history_long_poll_times_out(api_client: AsyncClient):
+    resp = await api_client.post("/jimeng/tasks", json={"prompt": "准备取消"})
+    resp.raise_for_status()
+    task = resp.json()["task"]
+
+    resp = await api_client.get(
+        "/jimeng/history",
+        params={"taskId": task["taskId"], "wait": 0.3, "sinceUpdatedAt": task["updatedAt"]},
+    )
+    resp.raise_for_status()
+    assert resp.json()["task"]["updatedAt"] == task["updatedAt"]
+    assert resp.json()["task"]["status"] == "running"
+
+
+@pytest.mark.asyncio
+async def test_jimeng_batch_submission_streams_acceptance(api_client: AsyncClient):
+    items = [{"prompt": f"批量渲染 {index}", "simulateDelayMs": 10} for index in range(5)]
+    resp = await api_client.post("/jimeng/tasks:batch", json={"items": items})
+    resp.raise_for_status()
+    tasks = resp.json()["tasks"]
+    assert [task["prompt"] for task in tasks] == [item["prompt"] for item in items]
+
+    lines: list[dict[str, Any]] = []
+    async with api_client.stream("POST", "/jimeng/tasks:batch", params={"stream": "true"}, json={"items": items}) as stream:
+        assert stream.headers["content-type"].startswith("application/x-ndjson")
+        async for line in stream.aiter_lines():
+            if line:
+                lines.append(json.loads(line))
+    assert sorted(line["index"] for line in lines) == list(range(5))
+    assert all(line["historyId"] for line in lines)
+
+    resp = await api_client.post("/jimeng/tasks:batch", json={"items": [{"prompt": "  "}]})
+    assert resp.status_code == 400
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from dreamcanvas.models.tasks import TaskStatus
+from dreamcanvas.services.jimeng_client import (
+    BASE_URL,
+    JimengApiError,
+    JimengClient,
+    JimengHistoryParser,
+    JimengTokenManager,
+)
+from dreamcanvas.services.resilience import CircuitBreaker, RetryPolicy
+from dreamcanvas.services.transport import TransportConfig, parse_proxies
+
+FIXTURES = Path(__file__).parent / "fixtures" / "jimeng"
+
+
+def _client(handler, **kwargs) -> JimengClient:
+    client = JimengClient(sessionid="mock-session", **kwargs)
+    client._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_fetch_histories_retries_transient_errors_with_fresh_signature():
+    signatures: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        signatures.append(request.headers["msToken"])
+        if len(signatures) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ret": "0", "data": {}})
+
+    client = _client(handler, retry_policy=RetryPolicy(attempts=3, base_delay=0.001, max_delay=0.01))
+    try:
+        results = await client.fetch_histories(["history-1"])
+    finally:
+        await client.aclose()
+
+    assert results["history-1"].history_id == "history-1"
+    assert len(set(signatures)) == 3
+    assert client.stats()["retries"] == 2
+    assert client.stats()["breaker"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_rejects_calls_until_probe_succeeds():
+    now = [0.0]
+    healthy = [False]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not healthy[0]:
+            raise httpx.ConnectError("boom", request=request)
+        return httpx.Response(200, json={"ret": "0", "data": {}})
+
+    client = _client(
+        handler,
+        retry_policy=RetryPolicy(attempts=1),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0]),
+    )
+    try:
+        for _ in range(2):
+            with pytest.raises(JimengApiError) as excinfo:
+                await client.fetch_histories(["history-1"])
+            assert excinfo.value.code == "network_error" and excinfo.value.retryable
+
+        requests = client.stats()["requests"]
+        with pytest.raises(JimengApiError) as excinfo:
+            await client.fetch_histories(["history-1"])
+        assert excinfo.value.code == "circuit_open" and excinfo.value.retryable
+        assert client.stats()["requests"] == requests
+
+        now[0] = 11.0
+        healthy[0] = True
+        await client.fetch_histories(["history-1"])
+        assert client.stats()["breaker"]["state"] == "closed"
+    finally:
+        await client.aclose()
+
+    assert client.stats()["breaker"]["opened"] == 1
+    assert client.stats()["breaker"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_does_not_wedge_half_open_breaker():
+    now = [0.0]
+    stalled = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if now[0] == 0.0:
+            raise httpx.ConnectError("boom", request=request)
+        if not stalled.is_set():
+            stalled.set()
+            await asyncio.sleep(10)
+        return httpx.Response(200, json={"ret": "0", "data": {}})
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+    client = _client(handler, retry_policy=RetryPolicy(attempts=1), breaker=breaker)
+    try:
+        with pytest.raises(JimengApiError):
+            await client.fetch_histories(["history-1"])
+        now[0] = 11.0
+        probe = asyncio.create_task(client.fetch_histories(["history-1"]))
+        await stalled.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert breaker.state == "half_open"
+        await client.fetch_histories(["history-1"])
+        assert breaker.state == "closed"
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_downloads_use_separate_cdn_pool_and_warmup_tolerates_errors():
+    def api_handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("offline", request=request)
+
+    def cdn_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"image-bytes")
+
+    client = _client(api_handler, transport=TransportConfig(cdn_max_connections=2))
+    client._cdn_client = httpx.AsyncClient(transport=httpx.MockTransport(cdn_handler))
+    try:
+        assert await client.fetch_resource("https://cdn.example.invalid/a.webp") == b"image-bytes"
+        assert await client.warmup() is False
+    finally:
+        await client.aclose()
+
+    assert client.stats()["breaker"]["consecutiveFailures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_proxy_config_from_secrets_template_builds_clients():
+    proxies = parse_proxies({"http": "http://127.0.0.1:7897", "https": " ", "all://": "http://127.0.0.1:7898"})
+    assert proxies == {"http://": "http://127.0.0.1:7897", "all://": "http://127.0.0.1:7898"}
+    assert parse_proxies(" http://127.0.0.1:7897 ") == "http://127.0.0.1:7897"
+    assert parse_proxies(7897) is None
+
+    client = JimengClient(sessionid="abc", proxies={"http": "http://127.0.0.1:7897"})
+    await client.aclose()
+
+
+def test_token_manager_caches_per_second_and_generates_unbiased_tokens(monkeypatch):
+    manager = JimengTokenManager(sessionid="mock-session")
+    monkeypatch.setattr("dreamcanvas.services.jimeng_client.time.time", lambda: 1_700_000_000.4)
+    first = manager.get_token("/mweb/v1/get_history_by_ids")
+    second = manager.get_token("/mweb/v1/get_history_by_ids")
+    other = manager.get_token("/mweb/v1/aigc_draft/generate")
+
+    assert first["cookie"] is second["cookie"] and first["sign"] == second["sign"]
+    assert other["sign"] != first["sign"]
+    assert first["sign"] == manager._generate_sign("/mweb/v1/get_history_by_ids", "1700000000")
+    assert first["cookie"] == manager._generate_cookie("1700000000")
+    assert first["msToken"] != second["msToken"]
+    assert len(first["msToken"]) == 107 and len(first["a_bogus"]) == 32
+    assert (first["msToken"] + first["a_bogus"]).isalnum()
+
+    monkeypatch.setattr("dreamcanvas.services.jimeng_client.time.time", lambda: 1_700_000_001.0)
+    assert manager.get_token("/mweb/v1/get_history_by_ids")["cookie"] != first["cookie"]
+
+    client = JimengClient(sessionid="mock-session")
+    headers = client._build_headers("/mweb/v1/get_history_by_ids", first, include_tokens=True)
+    assert list(headers)[6:8] == ["cookie", "device-time"]
+    assert headers["sign"] == first["sign"] and headers["a-bogus"] == first["a_bogus"]
+
+
+def _history_fixture(name: str) -> dict:
+    return json.loads((FIXTURES / f"history_{name}.json").read_text(encoding="utf-8"))["data"]["8312457690881"]
+
+
+def test_history_parser_defers_result_extraction_and_memoizes_queue_state():
+    parser = JimengHistoryParser()
+
+    queued = parser.parse("8312457690881", _history_fixture("queued"))
+    assert queued.status == TaskStatus.QUEUED and queued.result_urls == []
+    assert "第37位" in queued.queue_message and "2分30秒" in queued.queue_message
+    assert parser.parse("8312457690881", _history_fixture("queued")).queue_message is queued.queue_message
+    assert parser.parse("8312457690881", _history_fixture("running")).status == TaskStatus.RUNNING
+    assert len(parser) == 1
+
+    succeeded = parser.parse("8312457690881", _history_fixture("succeeded"))
+    assert succeeded.status == TaskStatus.SUCCEEDED
+    assert len(succeeded.result_urls) == 4
+    assert not any("upload-ref-0001" in url for url in succeeded.result_urls)
+    assert len(succeeded.preview_urls) == 4
+    assert all("image-1080" in url for url in succeeded.preview_urls)
+    assert [url.split("~")[0] for url in succeeded.preview_urls] == [url.split("~")[0] for url in succeeded.result_urls]
+    assert succeeded.raw is None
+    assert len(parser) == 0
+
+    failed = parser.parse("8312457690881", _history_fixture("failed"))
+    assert failed.status == TaskStatus.FAILED and failed.error_code == "2038"
+    assert failed.error_message == "输入的文字不符合平台规则，请修改后重试"
@@ -0,0 +1,513 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from dreamcanvas.models.tasks import TaskStatus
+from dreamcanvas.services.account_pool import AccountPool, AccountSlot, parse_accounts
+from dreamcanvas.services.admission import AdmissionController
+from dreamcanvas.services.blob_store import BlobStore
+from dreamcanvas.services.idempotency import IdempotencyCache, IdempotencyConflictError
+from dreamcanvas.services.jimeng import JimengService
+from dreamcanvas.services.jimeng_client import JimengApiError
+from dreamcanvas.services.poll_scheduler import PollPolicy, PollScheduler
+from dreamcanvas.services.project_io import AsyncProjectStorage
+from dreamcanvas.services.projects import ProjectStorage
+from dreamcanvas.services.result_cache import ResultCache
+from dreamcanvas.services.task_events import TaskEvent
+
+from conftest import MockJimengClient
+
+
+async def _wait_terminal(service: JimengService, task_ids: list[str], timeout: float = 3.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        tasks = [await service.get_task(task_id) for task_id in task_ids]
+        if all(task.status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED} for task in tasks):
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("任务未在限定时间内完成")
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_batches_concurrent_tasks():
+    client = MockJimengClient()
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=client,
+        poll_interval=0.05,
+        poll_timeout=2.0,
+    )
+    try:
+        tasks = [await service.submit_task({"prompt": f"批量任务 {index}"}) for index in range(30)]
+        task_ids = [task.task_id for task in tasks]
+        await _wait_terminal(service, task_ids)
+    finally:
+        await service.aclose()
+
+    polled = sum(len(batch) for batch in client.history_batches)
+    assert polled >= 60
+    assert len(client.history_batches) < polled / 5
+    assert max(len(batch) for batch in client.history_batches) <= 20
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_reschedules_batch_after_dispatch_error():
+    dispatched: list[list[str]] = []
+    done = asyncio.Event()
+
+    async def dispatch(account: str, keys: list[str]) -> None:
+        dispatched.append(list(keys))
+        if len(dispatched) == 1:
+            raise RuntimeError("boom")
+        done.set()
+
+    scheduler = PollScheduler(dispatch, error_backoff=0.01)
+    try:
+        scheduler.schedule("t1", "acc", 0)
+        scheduler.schedule("t2", "acc", 0)
+        await asyncio.wait_for(done.wait(), timeout=1)
+    finally:
+        await scheduler.aclose()
+
+    assert [sorted(batch) for batch in dispatched] == [["t1", "t2"], ["t1", "t2"]]
+    assert scheduler.stats()["failedBatches"] == 1
+
+
+def test_poll_policy_adapts_to_queue_and_latency():
+    policy = PollPolicy(base_interval=3.0, floor=1.0, ceiling=30.0, jitter=0.0)
+
+    deep = policy.next_delay(queue_info={"queue_status": 1, "queue_idx": 900, "queue_length": 1000})
+    assert deep == 30.0
+    waiting = {"queue_status": 1, "queue_idx": 3, "priority_queue_display_threshold": {"waiting_time_threshold": 20}}
+    assert policy.next_delay(queue_info=waiting) == 10.0
+
+    assert policy.next_delay(latency_key="3.0|1024x1024", running_for=5.0) == 3.0
+    policy.observe("3.0|1024x1024", 20.0)
+    assert policy.next_delay(latency_key="3.0|1024x1024", running_for=4.0) == 8.0
+    assert policy.next_delay(latency_key="3.0|1024x1024", running_for=19.0) == 1.0
+    assert policy.next_delay(latency_key="3.0|1024x1024", running_for=4.0, budget=0.5) == 0.5
+
+
+@pytest.mark.asyncio
+async def test_event_bus_streams_task_changes_with_filters():
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=MockJimengClient(),
+        poll_interval=0.05,
+        poll_timeout=2.0,
+    )
+    received: list[TaskEvent] = []
+
+    async def _consume(task_id: str) -> None:
+        async for event in service.events.subscribe(cursor=0, task_ids={task_id}, heartbeat=0.05):
+            if event is None:
+                continue
+            received.append(event)
+            if event.task.status == TaskStatus.SUCCEEDED:
+                return
+
+    try:
+        task = await service.submit_task({"prompt": "推送测试", "projectId": "p-1"})
+        await service.submit_task({"prompt": "另一个任务"})
+        await asyncio.wait_for(_consume(task.task_id), timeout=3.0)
+    finally:
+        await service.aclose()
+
+    assert {event.task_id for event in received} == {task.task_id}
+    assert [event.cursor for event in received] == sorted(event.cursor for event in received)
+    assert received[-1].project_id == "p-1"
+
+    events, reset = service.events.events_since(received[0].cursor, project_ids={"p-1"})
+    assert not reset
+    assert all(event.project_id == "p-1" for event in events)
+    assert service.events.events_since(service.events.cursor + 10)[1]
+
+
+def test_admission_controller_limits_rate_and_backs_off():
+    now = [0.0]
+    controller = AdmissionController(max_concurrent=2, rate=1.0, burst=2, backoff=4.0, clock=lambda: now[0])
+
+    assert controller.try_acquire() and controller.try_acquire()
+    assert not controller.try_acquire()
+    assert controller.wait_time() is None
+    controller.release()
+    assert not controller.try_acquire()
+    assert controller.wait_time() == pytest.approx(1.0)
+
+    now[0] = 1.0
+    assert controller.try_acquire()
+    controller.release()
+    controller.on_throttled()
+    assert controller.stats()["rate"] == 0.5
+    now[0] = 3.0
+    assert not controller.try_acquire()
+    assert controller.wait_time() == pytest.approx(2.0)
+    now[0] = 5.0
+    assert controller.try_acquire()
+    controller.on_success()
+    assert controller.stats()["rate"] == pytest.approx(0.6)
+
+
+class ThrottledMockClient(MockJimengClient):
+    """第三次提交时返回一次 1015 限流。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.submit_calls = 0
+
+    async def submit_generation(self, **kwargs):
+        self.submit_calls += 1
+        if self.submit_calls == 3:
+            raise JimengApiError("账号请求过于频繁", code="1015")
+        return await super().submit_generation(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_admission_queues_locally_and_retries_throttled_submissions():
+    client = ThrottledMockClient()
+    admission = AdmissionController(max_concurrent=2, rate=100.0, burst=2, backoff=0.05)
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=client,
+        poll_interval=0.02,
+        poll_timeout=3.0,
+        admission=admission,
+    )
+    try:
+        tasks = [await service.submit_task({"prompt": f"限流任务 {index}"}) for index in range(5)]
+        local = [task for task in tasks if task.task_id.startswith("local-")]
+        assert len(local) == 3
+        assert [task.metadata["queuePosition"] for task in local] == [1, 2, 3]
+        assert all(task.status == TaskStatus.QUEUED for task in local)
+
+        await _wait_terminal(service, [task.task_id for task in tasks], timeout=5.0)
+        finished = [await service.get_task(task.task_id) for task in tasks]
+        assert all(task.status == TaskStatus.SUCCEEDED for task in finished)
+        assert all("queuePosition" not in task.metadata for task in finished)
+
+        (account,) = (await service.diagnostics())["accounts"]
+        assert account["admission"]["throttled"] == 1
+        assert account["admission"]["running"] == 0
+        assert account["inFlight"] == 0
+        assert account["queued"] == 0
+    finally:
+        await service.aclose()
+
+
+def test_parse_accounts_accepts_single_and_list_configs():
+    [single] = parse_accounts({"sessionid": "a"})
+    assert single["sessionid"] == "a"
+    assert single["account_name"].startswith("account-")
+    accounts = parse_accounts(
+        {
+            "accounts": [
+                {"sessionid": "a", "account_name": "主"},
+                {"sessionid": ""},
+                {"sessionid": "可选：更多账号会按负载自动分配任务", "account_name": "备用"},
+                {"sessionid": "c"},
+                {"sessionid": "a", "account_name": "重复"},
+            ]
+        }
+    )
+    assert [item["sessionid"] for item in accounts] == ["a", "c"]
+    assert accounts[0]["account_name"] == "主"
+    # 未命名账号的名称只取决于 sessionid，与在列表中的位置无关。
+    assert parse_accounts([{"sessionid": "c"}])[0]["account_name"] == accounts[1]["account_name"]
+    with pytest.raises(ValueError):
+        parse_accounts([{"account_name": "空"}])
+    with pytest.raises(ValueError):
+        parse_accounts("sessionid")
+
+
+@pytest.mark.asyncio
+async def test_account_pool_routes_submissions_and_polls_by_owner():
+    clients = [MockJimengClient(), MockJimengClient()]
+    for index, client in enumerate(clients):
+        client.account_label = f"acc-{index}"
+    pool = AccountPool(
+        [
+            AccountSlot(name=client.account_label, client=client, admission=AdmissionController(max_concurrent=2))
+            for client in clients
+        ]
+    )
+    service = JimengService(config=None, pool=pool, poll_interval=0.02, poll_timeout=3.0)
+    try:
+        tasks = [await service.submit_task({"prompt": f"多账号 {index}"}) for index in range(6)]
+        owners = [task.metadata["account"] for task in tasks]
+        assert owners.count("acc-0") == 3 and owners.count("acc-1") == 3
+        assert sum(task.task_id.startswith("local-") for task in tasks) == 2
+
+        await _wait_terminal(service, [task.task_id for task in tasks], timeout=5.0)
+        finished = [await service.get_task(task.task_id) for task in tasks]
+        assert all(task.status == TaskStatus.SUCCEEDED for task in finished)
+
+        for client in clients:
+            # 每个账号只轮询自己提交的 history ID。
+            polled = {history_id for batch in client.history_batches for history_id in batch}
+            assert polled and polled <= set(client._states)
+
+        stats = {item["name"]: item for item in (await service.diagnostics())["accounts"]}
+        assert stats["acc-0"]["submitted"] == 3 and stats["acc-1"]["submitted"] == 3
+        assert all(item["inFlight"] == 0 and item["healthy"] for item in stats.values())
+    finally:
+        await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batch_submission_returns_placeholders_and_spreads_accounts():
+    clients = [MockJimengClient(), MockJimengClient()]
+    for index, client in enumerate(clients):
+        client.account_label = f"acc-{index}"
+    pool = AccountPool(
+        [
+            AccountSlot(name=client.account_label, client=client, admission=AdmissionController(max_concurrent=3))
+            for client in clients
+        ]
+    )
+    service = JimengService(config=None, pool=pool, poll_interval=0.02, poll_timeout=5.0)
+    try:
+        with pytest.raises(ValueError, match="第 2 项"):
+            await service.submit_batch([{"prompt": "正常"}, {"prompt": " "}])
+        assert not any(slot.queue for slot in pool)
+
+        tasks = await service.submit_batch([{"prompt": f"批量 {index}"} for index in range(20)])
+        assert [task.prompt for task in tasks] == [f"批量 {index}" for index in range(20)]
+        assert all(task.task_id.startswith("local-") for task in tasks)
+        owners = [task.metadata["account"] for task in tasks]
+        assert owners.count("acc-0") == 10 and owners.count("acc-1") == 10
+
+        await _wait_terminal(service, [task.task_id for task in tasks], timeout=6.0)
+        finished = [await service.get_task(task.task_id) for task in tasks]
+        assert all(task.status == TaskStatus.SUCCEEDED and task.metadata.get("historyId") for task in finished)
+    finally:
+        await service.aclose()
+
+
+class SlowSubmitClient(MockJimengClient):
+    async def submit_generation(self, **kwargs):
+        await asyncio.sleep(0.05)
+        return await super().submit_generation(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_idempotency_keys_coalesce_duplicate_submissions():
+    now = [0.0]
+    client = SlowSubmitClient()
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=client,
+        poll_interval=0.02,
+        poll_timeout=2.0,
+        idempotency=IdempotencyCache(window=60.0, clock=lambda: now[0]),
+        dedupe_identical=True,
+    )
+    try:
+        first, second = await asyncio.gather(
+            service.submit_task({"prompt": "重复提交"}, idempotency_key="click-1"),
+            service.submit_task({"prompt": "重复提交", "idempotencyKey": "click-1"}),
+        )
+        assert first.task_id == second.task_id
+        assert len(client._states) == 1
+
+        # 同一个幂等键换了参数属于客户端误用，不能悄悄返回旧任务。
+        with pytest.raises(IdempotencyConflictError) as conflict:
+            await service.submit_task({"prompt": "另一个提示词"}, idempotency_key="click-1")
+        assert conflict.value.task_id == first.task_id
+        identical = await service.submit_task({"prompt": "重复提交"})
+        assert identical.task_id == first.task_id
+        assert len(client._states) == 1
+
+        await _wait_terminal(service, [first.task_id])
+        # 参数指纹只合并进行中的任务；显式幂等键在窗口内仍返回已完成的任务。
+        assert (await service.submit_task({"prompt": "重复提交"}, idempotency_key="click-1")).task_id == first.task_id
+        assert (await service.submit_task({"prompt": "重复提交"})).task_id != first.task_id
+
+        now[0] = 61.0
+        assert (await service.submit_task({"prompt": "重复提交"}, idempotency_key="click-1")).task_id != first.task_id
+        stats = (await service.diagnostics())["idempotency"]
+        assert stats["hits"] == 3 and stats["misses"] == 3
+    finally:
+        await service.aclose()
+
+
+class FlakyPollClient(MockJimengClient):
+    """前两次批量查询抛出暂时性错误的客户端。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failures = 2
+
+    async def fetch_histories(self, history_ids):
+        if self.failures:
+            self.failures -= 1
+            raise JimengApiError("即梦 API 网络异常", code="network_error", retryable=True)
+        return await super().fetch_histories(history_ids)
+
+
+@pytest.mark.asyncio
+async def test_transient_poll_errors_defer_instead_of_failing():
+    client = FlakyPollClient()
+    service = JimengService(config={"sessionid": "mock-session"}, client=client, poll_interval=0.02, poll_timeout=3.0)
+    try:
+        task = await service.submit_task({"prompt": "网络抖动"})
+        await _wait_terminal(service, [task.task_id])
+        final = await service.get_task(task.task_id)
+    finally:
+        await service.aclose()
+
+    assert client.failures == 0
+    assert final.status == TaskStatus.SUCCEEDED
+
+
+@pytest.mark.asyncio
+async def test_succeeded_task_results_are_streamed_into_project(tmp_path):
+    storage = ProjectStorage(tmp_path / "projects")
+    project = storage.create_project("下载测试")
+    project_id = project.manifest.id
+    blobs = BlobStore(storage.root / ".blobs")
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=MockJimengClient(),
+        poll_interval=0.02,
+        poll_timeout=2.0,
+        project_storage=AsyncProjectStorage(storage),
+        blob_store=blobs,
+    )
+    try:
+        task = await service.submit_task({"prompt": "保存结果", "projectId": project_id})
+        await _wait_terminal(service, [task.task_id])
+        for _ in range(100):
+            final = await service.get_task(task.task_id)
+            if final.metadata.get("localUris"):
+                break
+            await asyncio.sleep(0.02)
+        trace = await service.diagnostics()
+    finally:
+        await service.aclose()
+
+    relative = final.metadata["localUris"][0]
+    assert (storage.root / project_id / relative).read_bytes() == b"mock-binary"
+    assert not list((storage.root / project_id / "assets" / "images").glob("*.part"))
+    assert trace["downloads"]["completed"] == 1
+    asset = storage.load_project(project_id).assets[0]
+    assert asset.metadata["downloaded"] and asset.metadata["bytes"] == len(b"mock-binary")
+    assert blobs.refcount(asset.metadata["sha256"]) == 1
+    assert blobs.blob_path(asset.metadata["sha256"]).read_bytes() == b"mock-binary"
+    blobs.close()
+
+
+@pytest.mark.asyncio
+async def test_seeded_results_are_cached_and_reused(tmp_path):
+    storage = ProjectStorage(tmp_path / "projects")
+    project_id = storage.create_project("缓存测试").manifest.id
+    cache = ResultCache(tmp_path / "result-cache")
+    client = MockJimengClient()
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=client,
+        poll_interval=0.02,
+        poll_timeout=2.0,
+        project_storage=AsyncProjectStorage(storage),
+        result_cache=cache,
+    )
+    try:
+        first = await service.submit_task({"prompt": "固定种子", "seed": 42})
+        await _wait_terminal(service, [first.task_id])
+        for _ in range(100):
+            if cache.stats()["entries"]:
+                break
+            await asyncio.sleep(0.02)
+
+        hit = await service.submit_task({"prompt": "固定种子", "seed": 42, "projectId": project_id})
+        assert hit.status == TaskStatus.SUCCEEDED and hit.metadata["cacheHit"]
+        assert hit.result_uris[0].startswith("file:")
+        assert len(client._states) == 1
+        for _ in range(100):
+            final = await service.get_task(hit.task_id)
+            if final.metadata.get("localUris"):
+                break
+            await asyncio.sleep(0.02)
+
+        other = await service.submit_task({"prompt": "固定种子", "seed": 43})
+        assert not other.metadata.get("cacheHit")
+        assert len(client._states) == 2
+        # 未关联项目的请求拿不到可访问的本地文件，照常提交上游。
+        detached = await service.submit_task({"prompt": "固定种子", "seed": 42})
+        assert not detached.metadata.get("cacheHit")
+        assert len(client._states) == 3
+        with pytest.raises(ValueError):
+            await service.submit_task({"prompt": "固定种子", "seed": "abc"})
+        stats = (await service.diagnostics())["resultCache"]
+    finally:
+        await service.aclose()
+        cache.close()
+
+    assert (storage.root / project_id / final.metadata["localUris"][0]).read_bytes() == b"mock-binary"
+    assert stats["hits"] == 1 and stats["entries"] == 1
+
+
+class PreviewMockClient(MockJimengClient):
+    """成功结果附带 1080 预览图；原图下载较慢。"""
+
+    async def fetch_history(self, history_id):
+        result = await super().fetch_history(history_id)
+        if result.status == TaskStatus.SUCCEEDED:
+            result.preview_urls = [url.replace(".png", "~1080.webp") for url in result.result_urls]
+        return result
+
+    async def stream_resource(self, url, consume, *, chunk_size=65536):
+        preview = "~1080" in url
+
+        async def _chunks():
+            if not preview:
+                await asyncio.sleep(0.1)
+            yield b"preview" if preview else b"full-resolution"
+
+        return await consume(_chunks())
+
+
+@pytest.mark.asyncio
+async def test_preview_is_persisted_before_full_resolution(tmp_path):
+    storage = ProjectStorage(tmp_path / "projects")
+    project_id = storage.create_project("预览测试").manifest.id
+    blobs = BlobStore(storage.root / ".blobs")
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=PreviewMockClient(),
+        poll_interval=0.02,
+        poll_timeout=2.0,
+        project_storage=AsyncProjectStorage(storage),
+        blob_store=blobs,
+    )
+    stages: list[str] = []
+    try:
+        task = await service.submit_task({"prompt": "先看预览", "projectId": project_id})
+        for _ in range(200):
+            current = await service.get_task(task.task_id)
+            stage = current.metadata.get("assetStage")
+            if stage and (not stages or stages[-1] != stage):
+                stages.append(stage)
+                if stage == "preview":
+                    asset = storage.load_project(project_id).assets[0]
+                    assert asset.metadata["preview"]
+                    assert (storage.root / project_id / asset.uri).read_bytes() == b"preview"
+            if stage == "full":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await service.aclose()
+
+    assert stages == ["preview", "full"]
+    asset = storage.load_project(project_id).assets[0]
+    assert not asset.metadata["preview"]
+    assert (storage.root / project_id / asset.uri).read_bytes() == b"full-resolution"
+    assert (storage.root / project_id / asset.metadata["previewUri"]).read_bytes() == b"preview"
+    # 原图与保留的预览图都仍被资源引用，对账不应释放它们，gc 也不应回收。
+    try:
+        assert blobs.prune(storage.root) == 0
+        assert blobs.gc() == (0, 0)
+        assert blobs.stats()["refs"] == 2
+    finally:
+        blobs.close()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from dreamcanvas.devtools.jimeng_standin import StandinConfig, StandinServer
+from dreamcanvas.models.tasks import TaskStatus
+from dreamcanvas.services.jimeng_client import JimengApiError, JimengClient
+from dreamcanvas.services.transport import TransportConfig
+
+
+@pytest.mark.asyncio
+async def test_real_client_runs_against_standin_server():
+    config = StandinConfig(
+        queue_depth=2,
+        queue_drain=20.0,
+        generate_seconds=0.1,
+        generate_sigma=0.0,
+        api_latency=0.0,
+        submit_rate=0.01,
+        submit_burst=1,
+        image_bytes=200_000,
+        seed=7,
+    )
+    with StandinServer(config) as server:
+        client = JimengClient(sessionid="standin", transport=TransportConfig(base_url=server.url))
+        try:
+            first = await client.submit_generation(prompt="离线压测", model="3.0", size="1024x1024", batch=2)
+            assert first.status == TaskStatus.QUEUED and first.queue_message
+
+            with pytest.raises(JimengApiError) as throttled:
+                await client.submit_generation(prompt="超出限速", model="3.0", size="1024x1024", batch=1)
+            assert throttled.value.code == "1015"
+
+            result = first
+            for _ in range(100):
+                result = await client.fetch_history(first.history_id)
+                if result.status == TaskStatus.SUCCEEDED:
+                    break
+                await asyncio.sleep(0.02)
+            assert result.status == TaskStatus.SUCCEEDED and len(result.result_urls) == 2
+
+            async def _consume(chunks):
+                return sum([len(chunk) async for chunk in chunks])
+
+            assert await client.stream_resource(result.result_urls[0], _consume) == 200_000
+        finally:
+            await client.aclose()
+        stats = server.standin.stats()
+    assert stats["generate"] == 2 and stats["throttled"] == 1 and stats["images"] == 1
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from dreamcanvas.models.project import GenerationRecord
+from dreamcanvas.services import projects
+from dreamcanvas.services.projects import ProjectStorage
+
+
+def _record(record_id: str) -> GenerationRecord:
+    return GenerationRecord(id=record_id, prompt="p", session_id="s", status="succeeded", created_at=0)
+
+
+def test_listing_reads_catalog_without_parsing_projects(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    storage = ProjectStorage(tmp_path)
+    first = storage.create_project("一号")
+    second = storage.create_project("二号")
+    storage.append_history(first.manifest.id, _record("r1"))
+    storage.append_history(first.manifest.id, _record("r2"))
+    storage.reconcile()
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("列表不应读取项目 JSON")
+
+    monkeypatch.setattr(projects, "_read_json", fail)
+    monkeypatch.setattr(projects.ProjectManifest, "model_validate_json", fail)
+    summaries = {item.manifest.id: item for item in storage.list_projects()}
+
+    assert summaries[first.manifest.id].history_count == 2
+    assert summaries[second.manifest.id].manifest.name == "二号"
+    assert storage.diagnostics()["projectCount"] == 2
+
+
+def test_reconcile_picks_up_changes_made_outside_the_service(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    edited = storage.create_project("外部编辑").manifest.id
+    removed = storage.create_project("将被删除").manifest.id
+    storage.close()
+
+    history_path = tmp_path / edited / "history.json"
+    history_path.write_text(json.dumps([_record("a").model_dump(by_alias=True)] * 3), encoding="utf-8")
+    shutil.rmtree(tmp_path / removed)
+
+    restarted = ProjectStorage(tmp_path)
+    result = restarted.reconcile()
+    assert result == {"scanned": 1, "updated": 1, "removed": 1}
+    [summary] = restarted.list_projects()
+    assert (summary.manifest.id, summary.history_count) == (edited, 3)
+
+    # 未变化的项目再次对账时不会重新解析。
+    assert restarted.reconcile()["updated"] == 0
+
+
+def test_listing_sees_projects_written_by_another_process(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project_id = storage.create_project("服务创建").manifest.id
+    assert [item.manifest.name for item in storage.list_projects()] == ["服务创建"]
+
+    # 模拟桌面端绕过服务直接写入：新建一个项目目录，并改写已有项目的清单。
+    manifest_path = tmp_path / project_id / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest_path.write_text(json.dumps({**manifest, "name": "桌面改名"}), encoding="utf-8")
+    created = tmp_path / "desktop"
+    created.mkdir()
+    (created / "manifest.json").write_text(json.dumps({**manifest, "id": "desktop", "name": "桌面创建"}), encoding="utf-8")
+
+    names = {item.manifest.id: item.manifest.name for item in storage.list_projects()}
+    assert names == {project_id: "桌面改名", "desktop": "桌面创建"}
+
+
+def test_append_history_reindexes_when_catalog_is_stale(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project_id = storage.create_project("过期索引").manifest.id
+    history_path = tmp_path / project_id / "history.json"
+    history_path.write_text(json.dumps([_record("a").model_dump(by_alias=True)] * 2), encoding="utf-8")
+
+    storage.append_history(project_id, _record("b"))
+
+    [summary] = storage.catalog.summaries()
+    assert summary.history_count == 3
+    assert storage.reconcile(rebuild=True)["updated"] == 1
+    assert storage.list_projects()[0].history_count == 3
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from dreamcanvas.models.project import ProjectPayload
+from dreamcanvas.services.project_io import AsyncProjectStorage
+from dreamcanvas.services.projects import ProjectSaveResult, ProjectStorage
+
+
+class SlowStorage(ProjectStorage):
+    def __init__(self, root: Path) -> None:
+        super().__init__(root)
+        self.release = threading.Event()
+
+    def persist_project(self, payload: ProjectPayload) -> ProjectSaveResult:
+        self.release.wait(timeout=5)
+        return super().persist_project(payload)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_save_still_completes_without_blocking_the_loop(tmp_path: Path):
+    storage = SlowStorage(tmp_path)
+    io = AsyncProjectStorage(storage, max_workers=2)
+    project = await io.create_project("异步保存")
+    renamed = project.model_copy(update={"manifest": project.manifest.model_copy(update={"name": "已改名"})})
+
+    save = asyncio.create_task(io.persist_project(renamed))
+    ticks_started = time.perf_counter()
+    await asyncio.sleep(0.05)
+    # 保存在线程中阻塞时事件循环仍能及时调度其他协程。
+    assert time.perf_counter() - ticks_started < 0.5
+    assert (await io.load_project(project.manifest.id)).manifest.name == "异步保存"
+
+    save.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await save
+    storage.release.set()
+    await io.aclose()
+
+    assert ProjectStorage(tmp_path).load_project(project.manifest.id).manifest.name == "已改名"
+    stats = io.stats()
+    assert stats["pending"] == 0
+    assert stats["operations"]["persist_project"] == {**stats["operations"]["persist_project"], "count": 1, "cancelled": 1}
+    assert stats["operations"]["load_project"]["count"] == 1
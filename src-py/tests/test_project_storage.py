@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from dreamcanvas.models.project import AssetPayload
+from dreamcanvas.services.projects import ProjectStorage
+
+
+def _asset(asset_id: str, project_id: str) -> AssetPayload:
+    return AssetPayload(id=asset_id, project_id=project_id, kind="image", uri=f"assets/{asset_id}.png", created_at=1, updated_at=1)
+
+
+def test_save_rewrites_only_changed_sections(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project = storage.load_project(storage.create_project("脏区保存").manifest.id)
+    project_id = project.manifest.id
+
+    moved = storage.persist_project(project.model_copy(update={"canvas": {"shape": {"x": 1}}}))
+    assert set(moved.written) == {"manifest", "canvas"}
+    assert moved.payload.manifest.canvas_version == 1
+
+    unchanged = storage.persist_project(moved.payload)
+    assert unchanged.written == {}
+
+    with_asset = storage.persist_project(moved.payload.model_copy(update={"assets": [_asset("a", project_id)]}))
+    assert set(with_asset.written) == {"manifest", "assets"}
+    assert with_asset.payload.manifest.canvas_version == 1
+    assert storage.diagnostics()["saves"]["filesSkipped"] == 2 + 4 + 2
+
+    # 重新加载得到的内容与上次写入一致，不会被当作变化。
+    assert storage.persist_project(storage.load_project(project_id)).written == {}
+
+
+def test_files_changed_outside_the_storage_are_rewritten(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project = storage.load_project(storage.create_project("外部修改").manifest.id)
+    assets_path = tmp_path / project.manifest.id / "assets.json"
+    assets_path.write_text(json.dumps([{"id": "stray"}]), encoding="utf-8")
+
+    result = storage.persist_project(project)
+
+    assert "assets" in result.written
+    assert json.loads(assets_path.read_text(encoding="utf-8")) == []
+
+
+def test_asset_save_keeps_pending_canvas_patches(tmp_path: Path):
+    storage = ProjectStorage(tmp_path)
+    project_id = storage.create_project("补丁与资源").manifest.id
+    storage.patch_canvas(project_id, [{"op": "add", "path": "/a", "value": 1}], base_version=0)
+    storage.close()
+
+    restarted = ProjectStorage(tmp_path)
+    payload = restarted.load_project(project_id)
+    result = restarted.persist_project(payload.model_copy(update={"assets": [_asset("a", project_id)]}))
+
+    assert set(result.written) == {"manifest", "assets"}
+    assert result.payload.manifest.canvas_version == 1
+    assert (tmp_path / project_id / "canvas.ops.jsonl").exists()
+    restarted.patch_canvas(project_id, [{"op": "add", "path": "/b", "value": 2}], base_version=1)
+    assert restarted.load_project(project_id).canvas == {"a": 1, "b": 2}
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from dreamcanvas.models.project import AssetPayload, ProjectPayload
+from dreamcanvas.services.project_io import AsyncProjectStorage
+from dreamcanvas.services.project_writes import ProjectWriteQueue
+from dreamcanvas.services.projects import ProjectStorage
+
+
+def _add_asset(asset_id: str):
+    def mutate(payload: ProjectPayload) -> ProjectPayload:
+        asset = AssetPayload(
+            id=asset_id,
+            project_id=payload.manifest.id,
+            kind="image",
+            uri=f"assets/images/{asset_id}.png",
+            created_at=1,
+            updated_at=1,
+        )
+        return payload.model_copy(update={"assets": [*payload.assets, asset]})
+
+    return mutate
+
+
+@pytest.mark.asyncio
+async def test_concurrent_mutations_are_coalesced_into_one_save(tmp_path: Path):
+    io = AsyncProjectStorage(ProjectStorage(tmp_path))
+    project_id = (await io.create_project("批量入库")).manifest.id
+    writes = ProjectWriteQueue(io, window=0.02)
+
+    results = await asyncio.gather(*(writes.submit(project_id, _add_asset(f"a{index}")) for index in range(10)))
+
+    assert {asset.id for asset in (await io.load_project(project_id)).assets} == {f"a{index}" for index in range(10)}
+    assert all(result is results[0] for result in results)
+    assert io.stats()["operations"]["persist_project"]["count"] == 1
+    assert writes.stats()["coalesced"] == 9
+    await io.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failing_mutation_does_not_drop_the_rest_of_the_batch(tmp_path: Path):
+    io = AsyncProjectStorage(ProjectStorage(tmp_path))
+    project_id = (await io.create_project("部分失败")).manifest.id
+    writes = ProjectWriteQueue(io, window=0.02)
+
+    def broken(_payload: ProjectPayload) -> ProjectPayload:
+        raise ValueError("boom")
+
+    ok, failed, missing = await asyncio.gather(
+        writes.submit(project_id, _add_asset("kept")),
+        writes.submit(project_id, broken),
+        writes.submit("no-such-project", _add_asset("lost")),
+        return_exceptions=True,
+    )
+
+    assert "assets" in ok.written
+    assert isinstance(failed, ValueError)
+    assert isinstance(missing, FileNotFoundError)
+    assert [asset.id for asset in (await io.load_project(project_id)).assets] == ["kept"]
+    await writes.aclose()
+    await io.aclose()
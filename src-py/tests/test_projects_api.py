@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+from httpx import AsyncClient
+
+from dreamcanvas.config.settings import get_settings
+from dreamcanvas.services.projects import ProjectStorage
+
+
+@pytest.mark.asyncio
+async def test_patch_canvas_endpoint_applies_and_rejects_stale_versions(api_client: AsyncClient):
+    storage = ProjectStorage(get_settings().projects_dir)
+    project_id = storage.create_project("接口增量保存").manifest.id
+
+    resp = await api_client.patch(
+        f"/projects/{project_id}/canvas",
+        json={"baseVersion": 0, "ops": [{"op": "add", "path": "/store", "value": {"a": 1}}]},
+    )
+    resp.raise_for_status()
+    assert resp.json()["version"] == 1
+    assert storage.load_project(project_id).canvas == {"store": {"a": 1}}
+
+    stale = await api_client.patch(
+        f"/projects/{project_id}/canvas",
+        json={"baseVersion": 0, "ops": [{"op": "remove", "path": "/store"}]},
+    )
+    assert stale.status_code == 409
+    assert stale.json()["detail"]["currentVersion"] == 1
+
+    invalid = await api_client.patch(
+        f"/projects/{project_id}/canvas",
+        json={"baseVersion": 1, "ops": [{"op": "remove", "path": "/missing"}]},
+    )
+    assert invalid.status_code == 422
+
+    missing = await api_client.patch(
+        "/projects/" + "0" * 32 + "/canvas",
+        json={"baseVersion": 0, "ops": [{"op": "add", "path": "/a", "value": 1}]},
+    )
+    assert missing.status_code == 404
+    storage.close()
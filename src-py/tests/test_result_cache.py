@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from dreamcanvas.services.result_cache import ResultCache, result_cache_key
+
+
+def _image(tmp_path, name: str, content: bytes):
+    path = tmp_path / "src" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_cache_key_normalizes_request_and_depends_on_seed():
+    base = {"model": "3.0", "size": "1024x1024", "batch": 1, "seed": 42}
+    assert result_cache_key(prompt="未来  城市", **base) == result_cache_key(prompt=" 未来 城市 ", **base)
+    assert result_cache_key(prompt="未来城市", **base) != result_cache_key(prompt="未来城市", **{**base, "seed": 43})
+
+
+def test_result_cache_evicts_by_age_and_lru_size(tmp_path):
+    now = [1000.0]
+    cache = ResultCache(tmp_path / "cache", max_bytes=20, max_age=100.0, clock=lambda: now[0])
+    try:
+        assert cache.get("a" * 64) is None
+        stored = cache.put("a" * 64, [_image(tmp_path, "a.png", b"0123456789")])
+        assert cache.get("a" * 64) == stored and stored[0].read_bytes() == b"0123456789"
+
+        now[0] += 10
+        cache.put("b" * 64, [_image(tmp_path, "b.png", b"0123456789")])
+        now[0] += 10
+        assert cache.get("a" * 64) is not None
+        # 超出容量时淘汰最久未使用的 b，而不是最早写入的 a。
+        cache.put("c" * 64, [_image(tmp_path, "c.png", b"0123456789")])
+        assert cache.get("b" * 64) is None
+        assert cache.get("a" * 64) is not None
+
+        now[0] += 95
+        assert cache.get("a" * 64) is None
+        assert not (tmp_path / "cache" / "aa" / ("a" * 64)).exists()
+        stats = cache.stats()
+        assert stats["entries"] == 1 and stats["evicted"] == 2
+    finally:
+        cache.close()
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import pytest
+
+from dreamcanvas.config.settings import get_settings
+
+
+def test_blank_limits_mean_unlimited(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DC_JIMENG_MAX_CONCURRENT", "")
+    monkeypatch.setenv("DC_JIMENG_SUBMIT_RATE", "")
+    monkeypatch.setenv("DC_JIMENG_BASE_URL", "")
+
+    get_settings.cache_clear()
+    try:
+        settings = get_settings()
+    finally:
+        get_settings.cache_clear()
+
+    assert settings.jimeng_max_concurrent is None
+    assert settings.jimeng_submit_rate is None
+    assert settings.jimeng_base_url is None
@@ -25,3 +25,10 @@ async def test_system_backup(api_client: AsyncClient):
     archive = Path(payload["path"])
     assert archive.exists()
     assert archive.suffix == ".zip"
+
+
+@pytest.mark.asyncio
+async def test_system_blob_gc(api_client: AsyncClient):
+    resp = await api_client.post("/system/blobs/gc")
+    resp.raise_for_status()
+    assert resp.json() == {"releasedRefs": 0, "removedBlobs": 0, "freedBytes": 0}
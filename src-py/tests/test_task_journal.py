@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from dreamcanvas.models.tasks import GenerationTaskInfo, TaskStatus
+from dreamcanvas.services.jimeng import JimengService
+from dreamcanvas.services.task_journal import TaskJournal
+from dreamcanvas.services.task_registry import TaskArchive, TaskRecord, TaskRegistry
+
+from conftest import MockJimengClient
+
+
+def _task(task_id: str, status: TaskStatus, updated_at: int) -> GenerationTaskInfo:
+    return GenerationTaskInfo(
+        task_id=task_id,
+        prompt="日志测试",
+        status=status,
+        metadata={"historyId": task_id},
+        created_at=1,
+        updated_at=updated_at,
+    )
+
+
+def test_journal_replay_and_compaction(tmp_path: Path) -> None:
+    journal = TaskJournal(tmp_path, segment_max_bytes=256, compact_after_segments=2, max_terminal_records=3)
+    journal.load()
+    for index in range(10):
+        journal.append(_task(f"done-{index}", TaskStatus.SUCCEEDED, updated_at=index))
+    journal.append(_task("live", TaskStatus.RUNNING, updated_at=1), {"historyId": "live", "createdMs": 1})
+    journal.append(_task("live", TaskStatus.RUNNING, updated_at=2), {"historyId": "live", "createdMs": 1})
+    journal.drop("done-9")
+    journal.compact()
+    journal.close()
+
+    stats = journal.stats()
+    assert stats["compactions"] >= 1
+    assert stats["segments"] <= 2
+
+    entries = TaskJournal(tmp_path).load()
+    assert entries["live"].task["updatedAt"] == 2
+    assert entries["live"].context == {"historyId": "live", "createdMs": 1}
+    assert "done-9" not in entries
+    assert {key for key in entries if key.startswith("done-")} == {"done-6", "done-7", "done-8"}
+
+
+def test_journal_skips_torn_records(tmp_path: Path) -> None:
+    journal = TaskJournal(tmp_path)
+    journal.load()
+    journal.append(_task("a", TaskStatus.QUEUED, updated_at=1))
+    journal.close()
+    segment = next(tmp_path.glob("segment-*.jsonl"))
+    with segment.open("a", encoding="utf-8") as handle:
+        handle.write('{"op":"put","task":{"taskId":')
+
+    assert list(TaskJournal(tmp_path).load()) == ["a"]
+
+
+
+def test_unserializable_record_does_not_stop_the_writer(tmp_path: Path) -> None:
+    journal = TaskJournal(tmp_path)
+    journal.load()
+    journal.append({"taskId": "bad", (1, 2): "元组键无法写成 JSON"})
+    journal.append(_task("good", TaskStatus.QUEUED, updated_at=1))
+    journal.flush()
+    journal.append(_task("later", TaskStatus.QUEUED, updated_at=2))
+    journal.close()
+
+    assert sorted(TaskJournal(tmp_path).load()) == ["good", "later"]
+
+@pytest.mark.asyncio
+async def test_service_resumes_polling_after_restart(tmp_path: Path) -> None:
+    client = MockJimengClient()
+    first = JimengService(
+        config={"sessionid": "mock-session"},
+        client=client,
+        poll_interval=5.0,
+        poll_timeout=30.0,
+        journal=TaskJournal(tmp_path),
+    )
+    task = await first.submit_task({"prompt": "重启恢复"})
+    await first.aclose()
+
+    second = JimengService(
+        config={"sessionid": "mock-session"},
+        client=client,
+        poll_interval=0.05,
+        poll_timeout=30.0,
+        journal=TaskJournal(tmp_path),
+    )
+    try:
+        assert await second.restore() == 1
+        restored = await second.wait_for_task(task.task_id, timeout=2.0)
+        while restored.status != TaskStatus.SUCCEEDED:
+            restored = await second.wait_for_task(task.task_id, since_updated_at=restored.updated_at, timeout=2.0)
+        assert restored.result_uris
+        assert any(event["event"] == "restored" for event in await second.get_trace(task.task_id))
+    finally:
+        await asyncio.wait_for(second.aclose(), timeout=5.0)
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_terminal_tasks_to_archive(tmp_path: Path) -> None:
+    service = JimengService(
+        config={"sessionid": "mock-session"},
+        client=MockJimengClient(),
+        poll_interval=0.02,
+        poll_timeout=2.0,
+        registry=TaskRegistry(max_terminal=2, trace_limit=3),
+        archive=TaskArchive(tmp_path / "archive.sqlite3"),
+    )
+    try:
+        task_ids = []
+        for index in range(5):
+            task = await service.submit_task({"prompt": f"淘汰 {index}"})
+            task_ids.append(task.task_id)
+            while task.status != TaskStatus.SUCCEEDED:
+                task = await service.wait_for_task(task.task_id, since_updated_at=task.updated_at, timeout=2.0)
+
+        stats = await service.diagnostics()
+        assert stats["registry"]["terminal"] == 2
+        assert stats["registry"]["evicted"] == 3
+        assert stats["registry"]["estimatedBytes"]["tasks"] > 0
+        assert stats["archive"]["tasks"] == 3
+
+        archived = await service.get_task(task_ids[0])
+        assert archived.status == TaskStatus.SUCCEEDED
+        assert 0 < len(await service.get_trace(task_ids[0])) <= 3
+    finally:
+        await service.aclose()
+
+    reopened = TaskArchive(tmp_path / "archive.sqlite3")
+    assert reopened.load(task_ids[0]) is not None
+    reopened.close()
+
+
+def test_task_record_tracks_dirty_fields_and_caches_snapshot() -> None:
+    record = TaskRecord.from_model(_task("rec", TaskStatus.QUEUED, updated_at=1))
+    snapshot = record.to_model()
+    assert record.to_model() is snapshot
+
+    assert not record.apply_result(TaskStatus.QUEUED, [], None, None)
+    assert not record.dirty
+    assert record.apply_result(TaskStatus.SUCCEEDED, ["https://example.invalid/a.png"], None, None)
+    assert record.set_metadata("localUris", ["a.png"])
+    assert record.dirty == {"status", "result_uris", "metadata"}
+
+    updated = record.to_model()
+    assert updated is not snapshot
+    assert snapshot.status == TaskStatus.QUEUED and "localUris" not in snapshot.metadata
+    assert updated.status == TaskStatus.SUCCEEDED and updated.metadata["localUris"] == ["a.png"]
+    assert record.to_payload() == updated.model_dump(by_alias=True, mode="json")
+
+    record.set_metadata("extra", 1)
+    assert "extra" not in updated.metadata
@@ -1,15 +1,56 @@
 import http from "k6/http";
 import { check, sleep } from "k6";
+import { Trend } from "k6/metrics";
+
+// 后端需以 DC_JIMENG_BASE_URL 指向本地即梦模拟服务启动（见 scripts/run-perf.ps1 -Standin）。
+const BASE_URL = __ENV.BASE_URL || "http://127.0.0.1:18500";
+const WAIT_SECONDS = Number(__ENV.WAIT_SECONDS || 20);
+
+const submitLatency = new Trend("jimeng_submit_ms", true);
+const completion = new Trend("jimeng_completion_ms", true);
 
 export const options = {
-  vus: 1,
-  duration: "30s"
+  scenarios: {
+    generate: {
+      executor: "constant-vus",
+      vus: Number(__ENV.VUS || 5),
+      duration: __ENV.DURATION || "60s",
+    },
+  },
+  thresholds: {
+    http_req_failed: ["rate<0.01"],
+    jimeng_submit_ms: ["p(95)<500"],
+  },
 };
 
 export default function () {
-  const res = http.get("http://localhost:18500/healthz");
-  check(res, {
-    "status is 200": (r) => r.status === 200
-  });
-  sleep(1);
+  const health = http.get(`${BASE_URL}/healthz`);
+  check(health, { "health is 200": (r) => r.status === 200 });
+
+  const started = Date.now();
+  const res = http.post(
+    `${BASE_URL}/jimeng/tasks`,
+    JSON.stringify({ prompt: `压测任务 ${__VU}-${__ITER}`, model: "3.0", size: "1024x1024", batch: 1 }),
+    { headers: { "Content-Type": "application/json", "Idempotency-Key": `k6-${__VU}-${__ITER}` } }
+  );
+  submitLatency.add(Date.now() - started);
+  if (!check(res, { "submit is 200": (r) => r.status === 200 })) {
+    sleep(1);
+    return;
+  }
+
+  let task = res.json("task");
+  while (!["succeeded", "failed", "cancelled"].includes(task.status) && Date.now() - started < 240000) {
+    const poll = http.get(
+      `${BASE_URL}/jimeng/history?taskId=${encodeURIComponent(task.taskId)}&wait=${WAIT_SECONDS}&sinceUpdatedAt=${task.updatedAt}`,
+      { timeout: `${WAIT_SECONDS + 10}s` }
+    );
+    if (poll.status !== 200) {
+      sleep(1);
+      continue;
+    }
+    task = poll.json("task");
+  }
+  completion.add(Date.now() - started);
+  check(task, { "task succeeded": (t) => t.status === "succeeded" });
 }